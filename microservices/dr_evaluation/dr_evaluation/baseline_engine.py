@@ -0,0 +1,164 @@
+import warnings
+import numpy as np
+import pandas as pd
+
+from .calendar_index import get_calendar_index, get_pdp_mask, to_dates
+from .day_matrix import as_day_matrix
+
+class XInYBaselineEngine:
+    '''
+    X-in-Y baselines (see baseline_functions.get_X_in_Y_baseline) of many event days in one pass,
+    on (days x 96) arrays of power and weather.
+    The days that can be picked (workdays that are neither PDP days, holidays nor all NaN) and the daily
+    scores are computed once; the last-Y window, top-X selection, adjustment ratio and baseline of all
+    event days are then computed with array operations.
+    '''
+    def __init__(self, power, weather, dates, PDP_dates=()):
+        '''
+        power, weather: (days x 96) arrays
+        dates: dates of the rows, sorted
+        PDP_dates: days that can't be picked
+        '''
+        self.power = np.asarray(power, dtype=float)
+        self.weather = np.asarray(weather, dtype=float)
+        self.dates = to_dates(dates)
+
+        is_pdp = get_pdp_mask(self.dates, PDP_dates)
+        is_workday = get_calendar_index().workday_mask(self.dates)
+
+        self.power_eligible = is_workday & ~is_pdp & ~np.isnan(self.power).all(axis=1)
+        self.weather_eligible = is_workday & ~is_pdp & ~np.isnan(self.weather).all(axis=1)
+
+    @classmethod
+    def from_pivots(cls, demand_pivot, weather_pivot, PDP_dates=()):
+        '''
+        demand_pivot, weather_pivot: DayMatrix or create_pivot() frames
+        '''
+        power = as_day_matrix(demand_pivot)
+        weather = as_day_matrix(weather_pivot)
+        dates = np.union1d(power.dates, weather.dates)
+        return cls(power.reindex(dates).values, weather.reindex(dates).values, dates, PDP_dates)
+
+    def get_positions(self, days):
+        '''
+        Row of each day, -1 if the day isn't in the arrays
+        '''
+        days = to_dates(days)
+        positions = np.searchsorted(self.dates, days)
+        positions[positions >= len(self.dates)] = 0
+        found = (self.dates[positions] == days) if len(self.dates) else np.zeros(len(days), dtype=bool)
+        return np.where(found, positions, -1)
+
+    def _get_last_Y_days(self, eligible, event_days, Y, window_starts, window_ends, exclude_event_day):
+        # Days each event day's data would have, i.e. its own window
+        in_window = (self.dates[None, :] >= window_starts[:, None]) & (self.dates[None, :] < window_ends[:, None])
+        candidates = eligible[None, :] & in_window
+        if exclude_event_day:
+            candidates &= self.dates[None, :] != event_days[:, None]
+
+        not_enough = candidates.sum(axis=1) < Y
+        assert not not_enough.any(), "not enough data for {} days: {}".format(Y, event_days[not_enough])
+
+        # Last Y days up to the event day (included)
+        candidates &= self.dates[None, :] <= event_days[:, None]
+        rank_from_last = np.cumsum(candidates[:, ::-1], axis=1)[:, ::-1]
+        return candidates & (rank_from_last <= Y)
+
+    @staticmethod
+    def _get_top(scores, window, X):
+        # The X days of the window with the highest scores, X can be an int or one per event day
+        masked = np.where(window, scores, -np.inf)
+        if np.isscalar(X):
+            kth = min(X, masked.shape[1]) - 1
+            if kth < 0:
+                return np.zeros_like(window)
+            top = np.argpartition(-masked, kth, axis=1)[:, :kth+1]
+            selected = np.zeros_like(window)
+            selected[np.arange(len(masked))[:, None], top] = True
+        else:
+            ranks = np.argsort(np.argsort(-masked, axis=1, kind='mergesort'), axis=1, kind='mergesort')
+            selected = ranks < np.asarray(X)[:, None]
+        return selected & window
+
+    def mean_of_days(self, values, days):
+        '''
+        Mean (NaN skipped) of the rows of values selected by each row of the (event days x days) mask
+        '''
+        present = ~np.isnan(values)
+        days = days.astype(float)
+        sums = days @ np.where(present, values, 0)
+        counts = days @ present.astype(float)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    def baselines(self, event_days, X=3, Y=10, windows=None, event_start_h=12, event_end_h=18,
+                  include_last=False, adj_ratio=True, min_ratio=1.0, max_ratio=1.3,
+                  weather_mapping=False, method='max', exclude_event_day=False):
+        '''
+        Same arguments as get_X_in_Y_baseline, for a list of event days
+        windows: optional (start, end) dates of the data each event day would be evaluated on on its own
+            (e.g. get_month_window), defaults to all the days
+        exclude_event_day: get_X_in_Y_baseline only leaves the event day out if it's a PDP day, set to
+            leave it out anyway
+        Returns dict of arrays, one row per event day:
+            'baseline': (event days x 96) baselines
+            'ratio': adjustment ratios
+            'y_days', 'x_days': (event days x days) masks of the last Y days and of the X days picked
+        '''
+        event_days = to_dates(event_days)
+        n = len(event_days)
+        if windows is None:
+            window_starts = np.full(n, self.dates[0] if len(self.dates) else np.datetime64('NaT'), dtype='datetime64[D]')
+            window_ends = np.full(n, self.dates[-1] + 1 if len(self.dates) else np.datetime64('NaT'), dtype='datetime64[D]')
+        else:
+            window_starts = to_dates([start for start, end in windows])
+            window_ends = to_dates([end for start, end in windows])
+
+        y_days = self._get_last_Y_days(self.power_eligible, event_days, Y, window_starts, window_ends,
+                                       exclude_event_day)
+
+        # Columns of the whole hours of the event (e.g. 14:00, 15:00, 16:00, 17:00)
+        cols = 4 * np.arange(event_start_h, event_end_h + include_last * 1)
+
+        if X is None:
+            X = y_days.sum(axis=1)
+
+        if weather_mapping:
+            window = self._get_last_Y_days(self.weather_eligible, event_days, Y, window_starts, window_ends,
+                                           exclude_event_day)
+            if method == 'proximity':
+                # Closest weather to the event day's
+                positions = self.get_positions(event_days)
+                event_weather = np.where((positions >= 0)[:, None], self.weather[positions][:, cols], np.nan)
+                scores = -np.nansum(np.abs(event_weather[:, None, :] - self.weather[None, :, cols]), axis=2)
+            else:
+                scores = np.broadcast_to(np.nansum(self.weather[:, cols], axis=1), window.shape)
+        else:
+            window = y_days
+            scores = np.broadcast_to(np.nansum(self.power[:, cols], axis=1), window.shape)
+
+        x_days = self._get_top(scores, window, X)
+
+        # Baseline is the average of the days selected
+        baseline = self.mean_of_days(self.power, x_days & self.power_eligible[None, :])
+
+        ratio = np.ones(n)
+        if adj_ratio:
+            # 4 hours before the event, take the first 3 and average them
+            pre_event = slice((event_start_h - 4) * 4, (event_start_h - 1) * 4)
+            positions = self.get_positions(event_days)
+            event_pre = np.full((n, pre_event.stop - pre_event.start), np.nan)
+            event_pre[positions >= 0] = self.power[positions[positions >= 0], pre_event]
+            with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                ratio = np.nanmean(event_pre, axis=1) / np.nanmean(baseline[:, pre_event], axis=1)
+            ratio = np.where(ratio < min_ratio, min_ratio, ratio)
+            ratio = np.where(ratio > max_ratio, max_ratio, ratio)
+            ratio = np.where(np.isnan(ratio), 1, ratio)
+
+        return {
+            'baseline': baseline * ratio[:, None],
+            'ratio': ratio,
+            'y_days': y_days,
+            'x_days': x_days
+        }
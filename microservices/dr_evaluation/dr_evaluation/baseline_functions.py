@@ -4,7 +4,12 @@ from pandas.tseries.offsets import CustomBusinessDay
 import numpy as np
 import datetime
 
+from .calendar_index import get_calendar_index, get_pdp_mask
+from .day_matrix import DayMatrix
+
 def make_baseline(x_days, pivot, name="Temperature", freq="15min"):
+    if isinstance(pivot, DayMatrix):
+        pivot = pivot.to_pivot()
     baseline=pivot[pivot.index.isin(x_days)].mean(axis=0)
     baseline_df=baseline.to_frame(name)
 
@@ -35,7 +40,10 @@ def select_demand(data): #removed _
 
 def create_pivot(df_col, freq="15min"): #removed _
 
-    if freq=="15min": # we are using 15 minute intervals so we can accurately calculate cost
+    if freq=="15min" and df_col.shape[1] == 1: # one row per day, reshaped without a MultiIndex
+        data_pivot = DayMatrix.from_series(df_col.iloc[:, 0]).to_pivot()
+
+    elif freq=="15min": # we are using 15 minute intervals so we can accurately calculate cost
         data=df_col.copy()
         data["date"] = data.index.date
         data["combined"]=data.index.hour+(data.index.minute*(1.0/60.0))
@@ -67,10 +75,8 @@ def _remove_event_day(data, event_day, PDP_dates): #removes all event days speci
 
         #data = data[~(data.index.date == event_index.date())]
         data = data[~(data.index.date == event_day)]
-        for i in PDP_dates:
-
-            data=data[~(data.index.date == i)]
-        return data
+        is_PDP = get_pdp_mask(data.index, PDP_dates)
+        return data[~is_PDP]
 
     except Exception as e:
         print(e)
@@ -80,17 +86,11 @@ def _remove_event_day(data, event_day, PDP_dates): #removes all event days speci
 
 def _remove_WE_holidays_NaN(data):
 
-    no_WE = ~((data.index.weekday == 5) | (data.index.weekday == 6)) # remove if WE
-
-    cal = calendar()
-    start = datetime.datetime.strftime(data.index.min(),"%Y-%m-%d")
-    end =datetime.datetime.strftime(data.index.max(),"%Y-%m-%d")
-    hol_cal = cal.holidays(start=start, end=end)
-    no_hol = ~data.index.isin(hol_cal) # remove if it is a national holiday
+    workday = get_calendar_index().workday_mask(data.index) # remove if WE or a national holiday
 
     no_NaN = ~data.isna().all(axis=1) # remove if has any NaN for any hour
 
-    return data[no_WE & no_hol & no_NaN]
+    return data[workday & no_NaN]
 
 
 def _get_last_Y_days(data, event_index, Y):
@@ -176,6 +176,12 @@ def get_X_in_Y_baseline(data, weather_pivot, event_day,PDP_dates,
                         max_ratio=1.3,
                         sampling="quarterly", weather_mapping=False, method='max'):
 
+    # DayMatrix are used through a pivot frame on their memory
+    if isinstance(data, DayMatrix):
+        data = data.to_pivot()
+    if isinstance(weather_pivot, DayMatrix):
+        weather_pivot = weather_pivot.to_pivot()
+
     event_data= data[data.index.date == event_day]
 
     data = _remove_event_day(data, event_index,PDP_dates)
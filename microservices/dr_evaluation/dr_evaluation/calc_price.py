@@ -2,81 +2,118 @@ from electricitycostcalculator.cost_calculator.cost_calculator import CostCalcul
 from electricitycostcalculator.openei_tariff.openei_tariff_analyzer import *
 from electricitycostcalculator.cost_calculator.tariff_structure import *
 from .utils import  get_month_window
-from .get_greenbutton_id import *
+from .get_greenbutton_id import get_greenbutton_id
 import datetime as dtime
 from datetime import timedelta
+from functools import lru_cache
 from .get_data import get_df
 import numpy as np
 import pandas as pd
+import threading
 import math
+import time
 import os
 
-calculator = CostCalculator()
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))+'/'
+TARIFFS_PATH = os.path.join(PROJECT_ROOT, 'tariffs.csv')
+
+# Number of (tariff, date range) price vectors kept in memory
+PRICE_CACHE_SIZE = 4096
+
+# Tariffs are rebuilt after this many seconds, so that edits to the OpenEI/PDP events files are picked up
+TARIFF_TTL_SECONDS = 60 * 60
+
+# tariff key -> (expiry time, CostCalculator)
+_calculators = {}
+_calculators_lock = threading.Lock()
 
 def eval_nan(x):
     if (not type(x) == str) and math.isnan(x):
         return None
     return x
 
-def calc_price(power_vector, site, start_datetime, end_datetime):
-    tarrifs = pd.read_csv(os.path.join(PROJECT_ROOT, 'tariffs.csv'), index_col='meter_id')
-    meter_id = get_greenbutton_id(site)
-    tariff = tarrifs.loc[meter_id]
-    tariff = dict(tariff)
+@lru_cache(maxsize=1)
+def _read_tariffs(mtime):
+    return pd.read_csv(TARIFFS_PATH, index_col='meter_id')
+
+def get_tariff_options(meter_id):
+    '''
+    returns the tariff options of a meter from tariffs.csv (read again only when the file changes)
+    '''
+    return dict(_get_tariff_options(meter_id, os.path.getmtime(TARIFFS_PATH)))
+
+@lru_cache(maxsize=None)
+def _get_tariff_options(meter_id, mtime):
+    tariff = dict(_read_tariffs(mtime).loc[meter_id])
     tariff['distrib_level_of_interest'] = eval_nan(tariff['distrib_level_of_interest'])
     tariff['option_exclusion'] = eval_nan(tariff['option_exclusion'])
     tariff['option_mandatory'] = eval_nan(tariff['option_mandatory'])
+    return tariff
+
+def calc_price(power_vector, site, start_datetime, end_datetime):
+    meter_id = get_greenbutton_id(site)
+    tariff = dict(get_tariff_options(meter_id))
 
     total_price = calc_total_price(power_vector, tariff, start_datetime, end_datetime, site)
     return total_price
 
-def calc_total_price(power_vector, tariff_options, start_datetime, end_datetime, site, interval='15min'):
+def _get_tariff_key(tariff_options):
     '''
-    returns the total energy cost of power consumption over the given window
-    the granularity is determined from the length of the vector and the time window
-    TODO: Demand charges
+    hashable key of the tariff options used to build the OpenEI tariff; NaN's (which never equal themselves)
+    are replaced by None
+    '''
+    names = ['utility_id', 'sector', 'tariff_rate_of_interest', 'distrib_level_of_interest', 'phasewing', 'tou',
+             'option_exclusion', 'option_mandatory']
+    return tuple(None if np.ndim(tariff_options[name]) == 0 and pd.isna(tariff_options[name])
+                 else tariff_options[name] for name in names)
 
-    power_vector: a pandas series of power consumption (kW) over the given window
-    tariff_options: a dictionary of the form {
-        utility_id: '14328',
-        sector: 'Commercial',
-        tariff_rate_of_interest: 'A-1 Small General Service',
-        distrib_level_of_interest=None, #TODO: Figure out what this is
-        phasewing='Single',
-        tou=True
-    }
-    start_datetime: the datetime object representing the start time (starts )
-    end_datetime: the datetime object representing the start time
+def _get_calculator(tariff_key):
+    '''
+    returns a CostCalculator loaded with the tariff; the OpenEI json and the PDP events are parsed
+    once per tariff and TARIFF_TTL_SECONDS
     '''
+    now = time.time()
+    with _calculators_lock:
+        cached = _calculators.get(tariff_key)
+    if cached is not None and cached[0] > now:
+        return cached[1]
 
-    time_delta = end_datetime - start_datetime
-    interval_15_min = (3600*24*time_delta.days + time_delta.seconds)/(60*15)
-    if len(power_vector) == interval_15_min or interval == '15min':
-        energy_vector = power_15min_to_hourly_energy(power_vector)
-        energy_vector.index = pd.date_range(start=start_datetime, end=end_datetime, freq='1h')
-    else:
-        energy_vector = power_vector
-    energy_vector = energy_vector / 1000
-    if pd.isna(tariff_options['phasewing']):
-        tariff_options['phasewing'] = None
-    tariff = OpenEI_tariff(tariff_options['utility_id'],
-                  tariff_options['sector'],
-                  tariff_options['tariff_rate_of_interest'],
-                  tariff_options['distrib_level_of_interest'],
-                  tariff_options['phasewing'],
-                  tariff_options['tou'],
-                  option_exclusion=tariff_options['option_exclusion'],
-                  option_mandatory=tariff_options['option_mandatory'])
+    calculator = _load_calculator(tariff_key)
+    with _calculators_lock:
+        _calculators[tariff_key] = (now + TARIFF_TTL_SECONDS, calculator)
+    return calculator
+
+def _load_calculator(tariff_key):
+    utility_id, sector, tariff_rate_of_interest, distrib_level_of_interest, phasewing, tou, \
+        option_exclusion, option_mandatory = tariff_key
+    calculator = CostCalculator()
+    tariff = OpenEI_tariff(utility_id,
+                  sector,
+                  tariff_rate_of_interest,
+                  distrib_level_of_interest,
+                  phasewing,
+                  tou,
+                  option_exclusion=option_exclusion,
+                  option_mandatory=option_mandatory)
     tariff.read_from_json()
     #tariff_struct_from_openei_data(tariff, calculator, pdp_event_filenames='PDP_events.json')
     tariff_struct_from_openei_data(tariff, calculator, pdp_event_filenames='PDP_events_dict.json')
+    return calculator
+
+@lru_cache(maxsize=PRICE_CACHE_SIZE)
+def _get_energy_prices(calculator, start_datetime, end_datetime):
+    '''
+    returns the hourly energy price vector of the tariff (calculator) over the given window;
+    cached per calculator, so the vectors of a rebuilt tariff are computed again
+    '''
     pd_prices, map_prices = calculator.get_electricity_price(timestep=TariffElemPeriod.HOURLY,
                                                         range_date=(start_datetime.replace(tzinfo=pytz.timezone('US/Pacific')),
                                                                     end_datetime.replace(tzinfo=pytz.timezone('US/Pacific'))))
     pd_prices = pd_prices.fillna(0)
     #energyPrices = pd_prices.customer_energy_charge.values + pd_prices.pdp_non_event_energy_credit.values + pd_prices.pdp_event_energy_charge.values
     energyPrices = pd_prices.customer_energy_charge.values + pd_prices.pdp_event_energy_charge.values
+    # shared between callers, so make sure it can't be modified
+    energyPrices.setflags(write=False)
 
     #cannot just add demand prices
     demandPrices = pd_prices.customer_demand_charge_season.values + pd_prices.pdp_non_event_demand_credit.values + pd_prices.customer_demand_charge_tou.values
@@ -91,6 +128,36 @@ def calc_total_price(power_vector, tariff_options, start_datetime, end_datetime,
     #     demand_charge=increased_demand*demandPrices
     #     print(demand_charge)
 
+    return energyPrices
+
+def calc_total_price(power_vector, tariff_options, start_datetime, end_datetime, site, interval='15min'):
+    '''
+    returns the total energy cost of power consumption over the given window
+    the granularity is determined from the length of the vector and the time window
+    TODO: Demand charges
+
+    power_vector: a pandas series of power consumption (kW) over the given window
+    tariff_options: a dictionary of the form {
+        utility_id: '14328',
+        sector: 'Commercial',
+        tariff_rate_of_interest: 'A-1 Small General Service',
+        distrib_level_of_interest=None, #TODO: Figure out what this is
+        phasewing='Single',
+        tou=True
+    }
+    start_datetime: the datetime object representing the start time (starts )
+    end_datetime: the datetime object representing the start time
+    '''
+
+    time_delta = end_datetime - start_datetime
+    interval_15_min = (3600*24*time_delta.days + time_delta.seconds)/(60*15)
+    if len(power_vector) == interval_15_min or interval == '15min':
+        energy_vector = power_15min_to_hourly_energy(power_vector)
+        energy_vector.index = pd.date_range(start=start_datetime, end=end_datetime, freq='1h')
+    else:
+        energy_vector = power_vector
+    energy_vector = energy_vector / 1000
+    energyPrices = _get_energy_prices(_get_calculator(_get_tariff_key(tariff_options)), start_datetime, end_datetime)
     return energyPrices @ energy_vector
 
 def power_15min_to_hourly_energy(power_vector):
@@ -0,0 +1,98 @@
+import threading
+import numpy as np
+import pandas as pd
+from functools import lru_cache
+from pandas.tseries.holiday import USFederalHolidayCalendar
+
+from .pdp_events import pdp_events
+
+# Days covered up front; dates outside are added on first use
+HORIZON_START = '2010-01-01'
+HORIZON_END = '2031-01-01'
+
+def to_dates(values):
+    '''
+    datetime64[D] array of the days of a DatetimeIndex (local days if it's tz-aware)
+    or of a list of datetime.date/str/datetime64
+    '''
+    if isinstance(values, pd.DatetimeIndex):
+        if values.tz is not None:
+            values = values.tz_localize(None)
+        return values.values.astype('datetime64[D]')
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'M':
+        return values.astype('datetime64[D]')
+    if len(values) == 0:
+        return np.array([], dtype='datetime64[D]')
+    return pd.to_datetime(list(values)).values.astype('datetime64[D]')
+
+class CalendarIndex:
+    '''
+    Weekend, federal holiday and PDP-day bitmaps, one bit per day over the whole data horizon,
+    so that filtering dates is an array lookup instead of building calendars and looping over dates
+    '''
+    def __init__(self, pdp_dates=(), start=HORIZON_START, end=HORIZON_END):
+        self.pdp_dates = to_dates(pdp_dates)
+        self._lock = threading.Lock()
+        self._build(np.datetime64(start, 'D'), np.datetime64(end, 'D'))
+
+    def _build(self, start, end):
+        days = np.arange(start, end, dtype='datetime64[D]')
+        holidays = USFederalHolidayCalendar().holidays(start=str(start), end=str(end - 1))
+        is_weekend = ~np.is_busday(days)
+        is_holiday = np.isin(days, holidays.values.astype('datetime64[D]'))
+        is_pdp = np.isin(days, self.pdp_dates)
+        # Swapped at once, readers never see a partial update
+        self._bitmaps = (start, end, {'weekend': is_weekend, 'holiday': is_holiday, 'pdp': is_pdp})
+
+    def _lookup(self, dates, name):
+        dates = to_dates(dates)
+        start, end, bitmaps = self._bitmaps
+        if len(dates) and (dates.min() < start or dates.max() >= end):
+            with self._lock:
+                start, end, bitmaps = self._bitmaps
+                if dates.min() < start or dates.max() >= end:
+                    self._build(min(start, dates.min()), max(end, dates.max() + 1))
+                start, end, bitmaps = self._bitmaps
+        return bitmaps[name][(dates - start).astype(np.int64)]
+
+    def weekend_mask(self, dates):
+        return self._lookup(dates, 'weekend')
+
+    def holiday_mask(self, dates):
+        return self._lookup(dates, 'holiday')
+
+    def pdp_mask(self, dates):
+        return self._lookup(dates, 'pdp')
+
+    def workday_mask(self, dates):
+        '''
+        True for the dates that are neither weekends nor federal holidays
+        '''
+        return ~self.weekend_mask(dates) & ~self.holiday_mask(dates)
+
+    def workdays(self, start, end):
+        '''
+        DatetimeIndex of the workdays from start to end (both included), as utils.get_workdays
+        '''
+        days = np.arange(to_dates([start])[0], to_dates([end])[0] + 1, dtype='datetime64[D]')
+        return pd.DatetimeIndex(days[self.workday_mask(days)])
+
+@lru_cache(maxsize=256)
+def _get_calendar_index(pdp_dates):
+    return CalendarIndex(pdp_dates)
+
+def _get_key(pdp_dates):
+    return tuple(np.unique(to_dates(pdp_dates if pdp_dates is not None else ())))
+
+def get_calendar_index(utility_id=None):
+    '''
+    Shared CalendarIndex with the PDP days of the utility (see pdp_events), without PDP days if utility_id is None
+    '''
+    return _get_calendar_index(_get_key(pdp_events.get(utility_id, ()) if utility_id is not None else ()))
+
+def get_pdp_mask(dates, pdp_dates):
+    '''
+    True for the dates that are in pdp_dates (PDP/event days, or any other days to leave out);
+    the bitmap of each set of days is built once and shared, e.g. with get_calendar_index(utility_id)
+    '''
+    return _get_calendar_index(_get_key(pdp_dates)).pdp_mask(dates)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from .calendar_index import to_dates
+
+SLOTS_PER_DAY = 96
+SLOT_NS = 15 * 60 * 10**9
+DAY_NS = SLOTS_PER_DAY * SLOT_NS
+
+class DayMatrix:
+    '''
+    15 min data with one row per day: values is a contiguous (days x 96) float array, dates the day of
+    each row (datetime64[D], sorted) and valid the (days x 96) bitmap of the slots that have a reading.
+    Same content as create_pivot(), without the MultiIndex/unstack.
+    '''
+    def __init__(self, values, dates, valid=None):
+        self.values = np.ascontiguousarray(values, dtype=float)
+        self.dates = to_dates(dates)
+        self.valid = ~np.isnan(self.values) if valid is None else valid
+
+    @classmethod
+    def from_series(cls, series):
+        '''
+        From a 15 min series; tz-aware indexes are split into days on the local wall clock, as create_pivot()
+        does (i.e. on DST days a slot can be missing, or keep the last of its two readings)
+        '''
+        index = series.index
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        ns = index.values.astype('datetime64[ns]').view('i8')
+        values = np.asarray(series.values, dtype=float)
+        if len(ns) == 0:
+            return cls(np.zeros((0, SLOTS_PER_DAY)), np.array([], dtype='datetime64[D]'))
+
+        days = ns // DAY_NS
+        slots = (ns % DAY_NS) // SLOT_NS
+
+        # Regular series of whole days: just a reshape
+        n_days = days[-1] - days[0] + 1
+        if len(ns) == n_days * SLOTS_PER_DAY and slots[0] == 0 and (np.diff(ns) == SLOT_NS).all():
+            dates = np.arange(days[0], days[-1] + 1).astype('datetime64[D]')
+            return cls(values.reshape(n_days, SLOTS_PER_DAY), dates)
+
+        # Otherwise put each reading in its day/slot (the last one if there are several)
+        unique_days, rows = np.unique(days, return_inverse=True)
+        positions = rows * SLOTS_PER_DAY + slots
+        last = ~pd.Index(positions).duplicated(keep='last')
+        matrix = np.full(len(unique_days) * SLOTS_PER_DAY, np.nan)
+        matrix[positions[last]] = values[last]
+        return cls(matrix.reshape(-1, SLOTS_PER_DAY), unique_days.astype('datetime64[D]'))
+
+    @classmethod
+    def from_pivot(cls, pivot):
+        '''
+        From a create_pivot() frame (15 min columns)
+        '''
+        columns = np.arange(SLOTS_PER_DAY) / 4.0
+        pivot = pivot.reindex(columns=columns)
+        return cls(pivot.values, pivot.index)
+
+    @property
+    def index(self):
+        return pd.DatetimeIndex(self.dates)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def reindex(self, dates):
+        '''
+        Rows of dates (all NaN for the days that aren't in the matrix)
+        '''
+        dates = to_dates(dates)
+        if len(dates) == len(self.dates) and (dates == self.dates).all():
+            return self
+        positions = np.searchsorted(self.dates, dates)
+        positions[positions >= len(self.dates)] = 0
+        found = (self.dates[positions] == dates) if len(self.dates) else np.zeros(len(dates), dtype=bool)
+        values = np.full((len(dates), SLOTS_PER_DAY), np.nan)
+        values[found] = self.values[positions[found]]
+        return DayMatrix(values, dates)
+
+    def to_pivot(self):
+        '''
+        create_pivot() frame on the same memory as values (no copy)
+        '''
+        index = pd.DatetimeIndex(self.dates, name='date')
+        columns = pd.Index(np.arange(SLOTS_PER_DAY) / 4.0, name='combined')
+        return pd.DataFrame(self.values, index=index, columns=columns, copy=False)
+
+def as_day_matrix(data):
+    '''
+    DayMatrix of a DayMatrix, a create_pivot() frame or a 15 min series
+    '''
+    if isinstance(data, DayMatrix):
+        return data
+    if isinstance(data, pd.Series):
+        return DayMatrix.from_series(data)
+    return DayMatrix.from_pivot(data)
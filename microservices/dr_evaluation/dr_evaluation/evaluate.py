@@ -1,17 +1,35 @@
 import pymortar
 import pandas as pd
-import pickle
 from .utils import get_date_str
 from .daily_data import get_daily_data
+from .get_data import get_df
+from .model_store import model_registry
 
-def evaluate(site, date, model_name='best'):
-    cli = pymortar.Client()
+def load_model(site, model_name='best'):
+    '''
+    Model from the shared registry (loaded from ./models/<site>/<model_name>.json on first use,
+    or from the pickle of models stored before the artifact format)
+    '''
+    return model_registry.get(site, model_name)
+
+def get_batch_df(site, model, dates):
+    '''
+    Fetch the data needed to evaluate all the dates with a single get_df over the union of their windows
+    '''
+    windows = [model.get_data_window(pd.to_datetime(date).date()) for date in dates]
+    start = min(windows, key=lambda window: pd.to_datetime(window[0]))[0]
+    end = max(windows, key=lambda window: pd.to_datetime(window[1]))[1]
+    return get_df(site, start, end, agg='MEAN', interval='15min')
+
+def evaluate(site, date, model_name='best', model=None, data=None):
+    '''
+    model: optional, already loaded model (loaded from ./models/<site>/<model_name> if not given)
+    data: optional, already fetched data covering the model's window for date (see get_batch_df),
+        or SiteDataProvider to slice it from
+    '''
     date = pd.to_datetime(date).date()
-    import sys
-    best_model_path = './models/{}/{}'.format(site, model_name)
-    model_file = open(best_model_path, 'rb')
-    best_model = pickle.load(model_file)
-    actual, prediction, event_weather, baseline_weather = best_model.predict(site, date)
+    best_model = model if model is not None else load_model(site, model_name)
+    actual, prediction, event_weather, baseline_weather = best_model.predict(site, date, data=data)
     weather_mean=event_weather[((event_weather.index.hour>=14) & (event_weather.index.hour<=18))].mean()
     daily_data = get_daily_data(site, actual, prediction)
     return {
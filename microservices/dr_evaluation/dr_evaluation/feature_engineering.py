@@ -1,5 +1,14 @@
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+
+TEMP_CUTOFFS = [40, 50, 60, 70, 80]
+
+# Time of week slots (15 min) that always get an indicator column: Monday to Friday
+NUM_WEEKDAY_SLOTS = 480
+
+# All time of week slots, Monday to Sunday
+NUM_TIME_OF_WEEK_SLOTS = 672
 
 def get_time_of_week(dt):
     return int(96 * dt.dayofweek + 4 * dt.hour + dt.minute / 15)
@@ -16,6 +25,74 @@ def get_t_cutoff_values(temp, cutoffs):
         results[-1] = temp - cutoffs[-1]
     return results
 
+def get_time_of_week_index(index):
+    '''
+    Vectorized get_time_of_week() of a DatetimeIndex
+    '''
+    return np.asarray(96 * index.dayofweek + 4 * index.hour + index.minute // 15, dtype=np.int64)
+
+def get_t_cutoff_matrix(temp, cutoffs=TEMP_CUTOFFS):
+    '''
+    Vectorized get_t_cutoff_values(): one row per temperature, one column per piecewise-linear segment
+    (NaN temperatures give the same row as get_t_cutoff_values)
+    '''
+    temp = np.asarray(temp, dtype=float)
+    cutoffs = np.asarray(cutoffs, dtype=float)
+    with np.errstate(invalid='ignore'):
+        first = np.fmin(cutoffs[0], temp)
+        middle = np.maximum(np.minimum(temp[:, None], cutoffs[1:]) - cutoffs[:-1], 0)
+        last = np.where(temp > cutoffs[-1], temp - cutoffs[-1], 0)
+    return np.column_stack([first, middle, last])
+
+def get_time_of_week_indicators(index, sparse=False, columns=None):
+    '''
+    Indicator matrix of the time of week of each timestamp, with a column for each weekday slot
+    and each other slot present in index (or for each of the given columns, which have to
+    include all the slots of index); returns (matrix, time of week of each column)
+    '''
+    time_of_week = get_time_of_week_index(index)
+    if columns is None:
+        columns = np.union1d(np.arange(NUM_WEEKDAY_SLOTS), time_of_week)
+    columns = np.asarray(columns)
+    positions = np.searchsorted(columns, time_of_week)
+    n = len(time_of_week)
+    if sparse:
+        indicators = sp.csr_matrix((np.ones(n, dtype=np.uint8), positions, np.arange(n + 1)),
+                                   shape=(n, len(columns)))
+    else:
+        indicators = np.zeros((n, len(columns)), dtype=np.uint8)
+        indicators[np.arange(n), positions] = 1
+    return indicators, columns
+
+def _get_ridge_continuous_features(weather, previous_weather=None):
+    weather = np.asarray(weather, dtype=float)
+    # Get changes in weather from last 15 minutes (first row wraps around, as np.roll, unless the
+    # weather preceding it is given)
+    change = weather - np.roll(weather, 1)
+    if previous_weather is not None and len(weather):
+        change[0] = weather[0] - previous_weather
+    return np.column_stack([change, get_t_cutoff_matrix(weather)])
+
+def get_ridge_feature_names(time_of_week_columns, cutoffs=TEMP_CUTOFFS):
+    return list(time_of_week_columns) + ['change'] + ['temp_cutoff_' + str(i) for i in cutoffs] + ['max_cutoff']
+
+def create_ridge_design_matrix(df, sparse=False, time_of_week_columns=None, previous_weather=None):
+    '''
+    Design matrix of the ridge model, i.e. the features of create_ridge_features() without the columns of df,
+    straight from the index and df['weather']; sparse returns a scipy.sparse CSR matrix
+    time_of_week_columns: fixed indicator columns, e.g. np.arange(NUM_TIME_OF_WEEK_SLOTS), so that matrices
+        of different periods have the same columns
+    previous_weather: weather of the row preceding df, for the 'change' of the first row
+    Returns (X, feature names)
+    '''
+    indicators, columns = get_time_of_week_indicators(df.index, sparse=sparse, columns=time_of_week_columns)
+    continuous = _get_ridge_continuous_features(df['weather'].values, previous_weather)
+    if sparse:
+        X = sp.hstack([indicators, sp.csr_matrix(continuous)], format='csr')
+    else:
+        X = np.hstack([indicators, continuous])
+    return X, get_ridge_feature_names(columns)
+
 def create_ridge_features(df):
     '''
     Create feautures for dataframe with format:
@@ -25,28 +102,13 @@ def create_ridge_features(df):
         index:
             - 15 minute interval timestamps
     '''
-    # Get time of week
-    df['time_of_week'] = [get_time_of_week(t) for t in df.index]
-    decoy = pd.DataFrame({
-    'time_of_week':np.arange(0, 480)
-    })
-    df = df.append(decoy, sort=False)
-    indicators = pd.get_dummies(df['time_of_week'])
-    df = df.merge(indicators, left_index=True, right_index=True)
-    df = df.drop(labels=['time_of_week'], axis=1)
-    df = df.iloc[:-480]
-
-    # Get changes in weather from last 15 minutes
-    df['change'] = (df['weather'] - np.roll(df['weather'], 1))
-    
-    # Get temperature cutoffs
-    cutoffs = [40, 50, 60, 70, 80]
-    arr = df['weather'].apply(lambda t: get_t_cutoff_values(t, cutoffs)).values
-    a = np.array(arr.tolist())
-    t_features = pd.DataFrame(a)
-    t_features.columns = ['temp_cutoff_' + str(i) for i in cutoffs] + ['max_cutoff']
-    t_features.index = df.index
-    df = df.merge(t_features, left_index=True, right_index=True)
-
-    return df
+    # Get time of week indicators
+    indicators, columns = get_time_of_week_indicators(df.index)
+    indicators = pd.DataFrame(indicators, index=df.index, columns=columns)
+
+    # Get changes in weather from last 15 minutes and temperature cutoffs
+    continuous = pd.DataFrame(_get_ridge_continuous_features(df['weather'].values), index=df.index,
+                              columns=get_ridge_feature_names([]))
 
+    # The indicators are new frames, no need to copy them (and consolidate) once more
+    return pd.concat([df.drop(columns=['time_of_week'], errors='ignore'), indicators, continuous], axis=1, copy=False)
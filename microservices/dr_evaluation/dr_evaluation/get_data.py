@@ -1,12 +1,40 @@
 import pymortar
 import pandas as pd
 import os
+import sys
+import threading
 import numpy as np
 
-from .utils import get_closest_station
+from .utils import get_closest_station, slice_window
+
+# Caches shared with the other microservices, see microservices/xbos_cache
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from xbos_cache import TimeSeriesCache, MetadataCache, SingleFlight
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))+'/'
 cli = pymortar.Client()
 
+# On-disk cache of historical weather/power data, partitioned by (pacific) day
+ts_cache = TimeSeriesCache(os.path.join(PROJECT_ROOT, 'cache'), tz='US/Pacific')
+
+# uuid's of each site's meters and weather sensors, resolved once per day instead of on every fetch
+metadata_cache = MetadataCache(cli)
+
+# Identical pymortar fetches in flight at the same time share a single call
+upstream_fetches = SingleFlight()
+
+WEATHER_QUERY = """SELECT ?t
+    WHERE {
+            ?t rdf:type/rdfs:subClassOf* brick:Weather_Temperature_Sensor
+        };"""
+
+EAGLE_POWER_QUERY = """SELECT ?meter WHERE {
+            ?meter rdf:type brick:Building_Electric_Meter
+        };"""
+
+GB_POWER_QUERY = """SELECT ?meter WHERE {
+            ?meter rdf:type brick:Green_Button_Meter
+        };"""
+
 # def adjust(df, site):
 #     site_map = pd.read_csv(os.path.join(PROJECT_ROOT, 'site_meters_map.csv'), index_col='site')
 #     multiplier=site_map.loc[site,'eagle_multiplier']
@@ -24,92 +52,73 @@ def adjust(df):
         df.columns=['combined meters']
     return df
 
-def get_weather(site, start, end, agg, window, cli):
-    weather_query = """SELECT ?t
-    WHERE {
-            ?t rdf:type/rdfs:subClassOf* brick:Weather_Temperature_Sensor
-        };"""
+def get_weather(site, start, end, agg, window, cli, cache=ts_cache):
+    if cache is None:
+        return _fetch_weather(site, start, end, agg, window, cli)
+
+    def fetch_func(fetch_start, fetch_end):
+        return _fetch_weather(site, fetch_start, fetch_end, agg, window, cli)
+
+    return cache.fetch((site, 'weather', str.upper(agg), window), start, end, agg, window, fetch_func)
+
+
+def _fetch_uuids(site, start, end, agg, window, uuids, cli):
+    """
+    Fetch the timeseries of the given uuid's, without running a view query
+    returns an empty dataframe if there are no uuid's
+    """
+    if not uuids:
+        return pd.DataFrame()
+
+    # Concurrent identical fetches (e.g. the same site and range for several requests) share one pymortar call
+    key = (site, pd.Timestamp(start).value, pd.Timestamp(end).value, str.upper(agg), window, tuple(uuids))
+    return upstream_fetches.do(key, _fetch_uuids_upstream, site, start, end, agg, window, uuids, cli)
+
+def _fetch_uuids_upstream(site, start, end, agg, window, uuids, cli):
     query_agg = eval('pymortar.' + str.upper(agg))
     request = pymortar.FetchRequest(
         sites=[site],
-        views = [
-            pymortar.View(name='weather', definition=weather_query)
-        ],
         time = pymortar.TimeParams(start=start, end=end),
         dataFrames=[
             pymortar.DataFrame(
-            name='weather',
+            name='data',
             aggregation=query_agg,
             window=window,
-            timeseries=[
-                pymortar.Timeseries(
-                    view='weather',
-                    dataVars=['?t'])
-            ])
+            uuids=uuids)
         ]
     )
     result = cli.fetch(request)
-    return result['weather']
+    return result['data']
 
+def _fetch_weather(site, start, end, agg, window, cli):
+    uuids = metadata_cache.get_uuids(site, WEATHER_QUERY)
+    return _fetch_uuids(site, start, end, agg, window, uuids, cli)
 
-def get_power(site, start, end, agg, window, cli):
 
-    eagle_power_query = """SELECT ?meter WHERE {
-            ?meter rdf:type brick:Building_Electric_Meter
-        };"""
+def get_power(site, start, end, agg, window, cli, cache=ts_cache):
+    if cache is None:
+        return _fetch_power(site, start, end, agg, window, cli)
 
-    gb_power_query = """SELECT ?meter WHERE {
-            ?meter rdf:type brick:Green_Button_Meter
-        };"""
-    query_agg = eval('pymortar.' + str.upper(agg))
-    request_gb = pymortar.FetchRequest(
-        sites=[site],
-        views = [
-            pymortar.View(name='power', definition=gb_power_query)
-        ],
-        time = pymortar.TimeParams(start=start, end=end),
-        dataFrames=[
-            pymortar.DataFrame(
-            name='power',
-            aggregation=query_agg,
-            window=window,
-            timeseries=[
-                pymortar.Timeseries(
-                    view='power',
-                    dataVars=['?meter'])
-            ])
-        ]
-    )
-    request_eagle = pymortar.FetchRequest(
-        sites=[site],
-        views = [
-            pymortar.View(name='power', definition=eagle_power_query)
-        ],
-        time = pymortar.TimeParams(start=start, end=end),
-        dataFrames=[
-            pymortar.DataFrame(
-            name='power',
-            aggregation=query_agg,
-            window=window,
-            timeseries=[
-                pymortar.Timeseries(
-                    view='power',
-                    dataVars=['?meter'])
-            ])
-        ]
-    )
-    result_gb = cli.fetch(request_gb)
-    result_eagle = cli.fetch(request_eagle)
+    def fetch_func(fetch_start, fetch_end):
+        return _fetch_power(site, fetch_start, fetch_end, agg, window, cli)
+
+    return cache.fetch((site, 'power', str.upper(agg), window), start, end, agg, window, fetch_func)
+
+
+def _fetch_power(site, start, end, agg, window, cli):
+
+    result_gb = _fetch_uuids(site, start, end, agg, window, metadata_cache.get_uuids(site, GB_POWER_QUERY), cli)
+    result_eagle = _fetch_uuids(site, start, end, agg, window, metadata_cache.get_uuids(site, EAGLE_POWER_QUERY), cli)
     try:
-        power_gb=result_gb['power']*4000 #adjusts to from energy to power (15 min period), and from kw to w
-        power_eagle=adjust(result_eagle['power'])
+        power_gb=result_gb*4000 #adjusts to from energy to power (15 min period), and from kw to w
+        power_eagle=adjust(result_eagle)
         power_eagle.columns=[power_gb.columns[0]]
         power=power_gb.fillna(value=power_eagle) # power uses available gb data, fills NA with eagle data
     except:
-        if np.size(result_gb['power'])>1:
-            power=result_gb['power']*4000
-        elif np.size(result_eagle['power'])>1:
-            power=adjust(result_eagle['power'])
+        if np.size(result_gb)>1:
+            power=result_gb*4000
+        elif np.size(result_eagle)>1:
+            power=adjust(result_eagle)
         else:
             print("no data")
 
@@ -143,3 +152,58 @@ def get_df(site, start, end, agg='MEAN', interval='15min'):
     data.columns = ['power', 'weather']
 
     return data
+
+
+class SiteDataProvider:
+    '''
+    Sliding in-memory window of a site's data (as returned by get_df).
+    Requests are sliced from the window; only the part of a request that isn't loaded yet is fetched,
+    e.g. the 30-day windows of consecutive days cost one extra day each instead of 30.
+    max_span (pd.Timedelta) bounds the window: data furthest from the last request is dropped.
+    '''
+    def __init__(self, site, agg='MEAN', interval='15min', max_span=None):
+        self.site = site
+        self.agg = agg
+        self.interval = interval
+        self.max_span = pd.Timedelta(max_span) if max_span is not None else None
+        self.data = None
+        self.start = None
+        self.end = None
+        self._lock = threading.Lock()
+
+    def _fetch(self, start, end):
+        return get_df(self.site, start.isoformat(), end.isoformat(), agg=self.agg, interval=self.interval)
+
+    def _trim(self, start, end):
+        if self.max_span is None or self.end - self.start <= self.max_span:
+            return
+        if start - self.start >= self.end - end:
+            # moving forward, drop the oldest data
+            self.start = min(start, self.end - self.max_span)
+            self.data = self.data[self.data.index >= self.start]
+        else:
+            # moving backward, drop the newest data
+            self.end = max(end, self.start + self.max_span)
+            self.data = self.data[self.data.index < self.end]
+
+    def get(self, start, end):
+        '''
+        Returns a copy of the data in [start, end)
+        '''
+        start = pd.to_datetime(start)
+        end = pd.to_datetime(end)
+        with self._lock:
+            if self.data is None or end < self.start or start > self.end:
+                self.data = self._fetch(start, end)
+                self.start, self.end = start, end
+            elif start < self.start or end > self.end:
+                parts = [self.data]
+                if start < self.start:
+                    parts.insert(0, self._fetch(start, self.start))
+                if end > self.end:
+                    parts.append(self._fetch(self.end, end))
+                data = pd.concat(parts, sort=True)
+                self.data = data[~data.index.duplicated(keep='last')].sort_index()
+                self.start, self.end = min(start, self.start), max(end, self.end)
+            self._trim(start, end)
+            return slice_window(self.data, start, end)
@@ -1,10 +1,58 @@
+import os
+import json
+import time
+import uuid
+import threading
 import pymortar
 
+from .get_data import cli
+
 TED_meters = set(['jesse-turner-center'])
 
-client = pymortar.Client()
+PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))+'/'
+GREENBUTTON_IDS_PATH = os.path.join(PROJECT_ROOT, 'greenbutton_ids.json')
 
-def get_greenbutton_id(site, use_TED_meter=False):
+# Sites whose meter id couldn't be resolved are only retried after this many seconds (or by a refresh)
+FAILED_LOOKUP_RETRY_SECONDS = 5 * 60
+
+# site -> meter id, shared by the whole process and persisted in GREENBUTTON_IDS_PATH
+_greenbutton_ids = {}
+# site -> time of the last failed lookup
+_failed_lookups = {}
+_greenbutton_ids_lock = threading.Lock()
+_stop_refresh = threading.Event()
+
+def _get_key(site, use_TED_meter):
+    return site + '/TED' if use_TED_meter else site
+
+def _load_greenbutton_ids():
+    if not os.path.exists(GREENBUTTON_IDS_PATH):
+        return
+    try:
+        with open(GREENBUTTON_IDS_PATH) as f:
+            ids = json.load(f)
+    except Exception as e:
+        print('error reading %s: %s' % (GREENBUTTON_IDS_PATH, e))
+        return
+    with _greenbutton_ids_lock:
+        for key, meter_id in ids.items():
+            _greenbutton_ids.setdefault(key, meter_id)
+
+def _save_greenbutton_ids():
+    with _greenbutton_ids_lock:
+        ids = dict(_greenbutton_ids)
+    tmp_path = GREENBUTTON_IDS_PATH + '.' + uuid.uuid4().hex + '.tmp'
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump(ids, f, indent=4, sort_keys=True)
+        os.replace(tmp_path, GREENBUTTON_IDS_PATH)
+    except Exception as e:
+        print('error writing %s: %s' % (GREENBUTTON_IDS_PATH, e))
+
+def fetch_greenbutton_id(site, use_TED_meter=False):
+    '''
+    Resolve the site's meter id from pymortar (bypasses the memo)
+    '''
     if use_TED_meter or site in TED_meters:
         power_query = """SELECT ?meter WHERE {
             ?meter rdf:type/rdfs:subClassOf* brick:Building_Electric_Meter
@@ -13,6 +61,7 @@ def get_greenbutton_id(site, use_TED_meter=False):
         power_query = """SELECT ?meter WHERE {
                 ?meter rdf:type/rdfs:subClassOf* brick:Green_Button_Meter
             };"""
+    # The id is the first meter column of a day of data, whatever order the site's metadata lists its meters in
     query_agg = pymortar.MAX
     start = '2019-01-01T00:00:00-08:00'
     end = '2019-01-02T00:00:00-08:00'
@@ -34,8 +83,80 @@ def get_greenbutton_id(site, use_TED_meter=False):
             ])
         ]
     )
-    result = client.fetch(request)
+    result = cli.fetch(request)
     return result['power'].columns[0]
 
+def _resolve(site, use_TED_meter):
+    '''
+    Fetch the meter id of the site and memoize it, or the failure
+    '''
+    key = _get_key(site, use_TED_meter)
+    try:
+        meter_id = fetch_greenbutton_id(site, use_TED_meter)
+    except Exception:
+        with _greenbutton_ids_lock:
+            _failed_lookups[key] = time.time()
+        raise
+    with _greenbutton_ids_lock:
+        _greenbutton_ids[key] = meter_id
+        _failed_lookups.pop(key, None)
+    return meter_id
+
+def get_greenbutton_id(site, use_TED_meter=False):
+    '''
+    Returns the memoized meter id of the site; only goes to the network the
+    first time a site is seen (i.e. if it wasn't warmed up or persisted before);
+    after a failed lookup, raises LookupError until FAILED_LOOKUP_RETRY_SECONDS have passed
+    '''
+    key = _get_key(site, use_TED_meter)
+    with _greenbutton_ids_lock:
+        meter_id = _greenbutton_ids.get(key)
+        failed_at = _failed_lookups.get(key)
+    if meter_id is not None:
+        return meter_id
+    if failed_at is not None and time.time() - failed_at < FAILED_LOOKUP_RETRY_SECONDS:
+        raise LookupError("meter id of %s couldn't be resolved, retrying later" % key)
+
+    meter_id = _resolve(site, use_TED_meter)
+    _save_greenbutton_ids()
+    return meter_id
+
+def refresh_greenbutton_ids(sites):
+    '''
+    Re-resolve the memoized meter ids of the sites (their TED meter ids too, if they were looked up)
+    and persist them; sites that fail keep their previous meter id
+    '''
+    for site in sites:
+        with _greenbutton_ids_lock:
+            lookups = [use_TED_meter for use_TED_meter in (False, True)
+                       if not use_TED_meter or _get_key(site, True) in _greenbutton_ids]
+        for use_TED_meter in lookups:
+            try:
+                _resolve(site, use_TED_meter)
+            except Exception as e:
+                print("couldn't resolve meter id for %s: %s" % (_get_key(site, use_TED_meter), e))
+    _save_greenbutton_ids()
+
+def warm_greenbutton_ids(sites, refresh_interval=None):
+    '''
+    Load the persisted meter ids and resolve the sites that are still missing;
+    if refresh_interval (seconds) is given, all sites are re-resolved periodically in a background thread
+    '''
+    with _greenbutton_ids_lock:
+        missing = [site for site in sites if _get_key(site, False) not in _greenbutton_ids]
+    if missing:
+        refresh_greenbutton_ids(missing)
+
+    if refresh_interval:
+        def refresh_loop():
+            while not _stop_refresh.wait(refresh_interval):
+                refresh_greenbutton_ids(sites)
+
+        thread = threading.Thread(target=refresh_loop, name='greenbutton-id-refresh', daemon=True)
+        thread.start()
+        return thread
+
+_load_greenbutton_ids()
+
 
 # print(get_greenbutton_id('ciee', "2018-01-01T10:00:00-07:00", "2018-08-12T10:00:00-07:00"))
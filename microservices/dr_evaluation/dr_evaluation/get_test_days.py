@@ -9,6 +9,7 @@ import datetime
 
 from .get_data import get_weather, get_df
 from .utils import get_window_of_day
+from .calendar_index import get_calendar_index, get_pdp_mask, to_dates
 
 import pymortar
 
@@ -17,10 +18,8 @@ cli = pymortar.Client()
 def _remove_PDP_days(data, PDP_list):
     
     try:
-        for i in PDP_list:
-            day=datetime.datetime.strptime(str(i), "%Y-%m-%d").date()
-            data=data[~(data.index.date == day)]       
-        return data
+        is_PDP = get_pdp_mask(data.index, PDP_list)
+        return data[~is_PDP]
     
     except:
         print('error in _remove_PDP_days')
@@ -29,55 +28,75 @@ def _remove_PDP_days(data, PDP_list):
 
 def _remove_WE_holidays_NaN(data, start, end):
     
-    no_WE = ~((data.index.weekday == 5) | (data.index.weekday == 6)) # remove if WE
-
-    cal = calendar() 
-#     start = datetime.datetime.strftime(data.index.min(),"%Y-%m-%d")
-#     end =datetime.datetime.strftime(data.index.max(),"%Y-%m-%d")
-
-    hol_cal = cal.holidays(start=start, end=end)
-    #hol_cal=pd.to_datetime(hol_cal).tz_localize("America/Los_Angeles") 
-    no_hol = ~data.index.isin(hol_cal) # remove if it is a national holiday   
+    # start, end: the data's window, the calendar index already covers it
+    workday = get_calendar_index().workday_mask(data.index) # remove if WE or a national holiday
     no_NaN = ~data.isna().all(axis=1) # remove if has any NaN for any hour
 
     
-    return data[no_WE & no_hol & no_NaN]
+    return data[workday & no_NaN]
+
+def _get_day(timestamp):
+    # Pacific day of a timestamp (naive ones are taken as pacific)
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tz is not None:
+        timestamp = timestamp.tz_convert('US/Pacific').tz_localize(None)
+    return np.datetime64(timestamp.date())
+
+def _get_daily_weather(site, start, end, agg, cli):
+    '''
+    24h weather of all the stations from start to end, indexed by (pacific) day
+    '''
+    weather = get_weather(site, start, end, agg=agg, window='24h', cli=cli)
+    index = weather.index if weather.index.tz is not None else weather.index.tz_localize('UTC')
+
+    # The 24h windows shift by an hour over DST, each one is the day it mostly covers
+    local = index.tz_convert('US/Pacific').tz_localize(None) + pd.Timedelta(hours=12)
+    return pd.DataFrame(weather.values, index=pd.DatetimeIndex(to_dates(local)), columns=weather.columns)
+
+def get_valid_test_days(data):
+    '''
+    isValidTestDay() of all the days of data (as returned by get_df) at once
+    Returns boolean Series indexed by day
+    '''
+    days = pd.DatetimeIndex(to_dates(data.index))
+    grouped = data.groupby(days)
+    size = grouped.size()
+
+    # Every column needs at most half NaN, at most half zeros and at least 3 distinct values (NaN included)
+    not_nan = data.isna().groupby(days).sum().le(0.5 * size, axis=0)
+    not_zero = (data == 0).groupby(days).sum().le(0.5 * size, axis=0)
+    not_flat = grouped.nunique(dropna=False) >= 3
+    return (not_nan & not_zero & not_flat).all(axis=1)
 
 def isValidTestDay(date, site):
     start, end = get_window_of_day(date)
     data  =  get_df(site, start, end, agg='MEAN', interval='15min')
-    for column in data.columns:
-        col = data[column]
-        if col.isna().sum() > 0.5*len(data):
-            return False
-        if (col == 0).sum() > 0.5*len(data):
-            return False
-        if len(col.unique()) < 3:
-            return False
-    return True
+    valid = get_valid_test_days(data)
+    return bool(valid.get(pd.to_datetime(date).normalize(), False))
 
 #%%
-def get_test_data(site, PDP_days, start_search, end_search, cli=cli, fraction_test=0.5):
-    means=[]
-    maxes = []
-    for day in PDP_days:
-        start, end = get_window_of_day(day)
-        weather_mean =  get_weather(site, start, end, agg='MEAN', window='24h', cli=cli)
-        means.append(weather_mean)   
-        weather_max =  get_weather(site, start, end, agg='MAX', window='24h', cli=cli)
-        maxes.append(weather_max)
-        
-    means = pd.concat(means, sort=True)
-    maxes = pd.concat(maxes, sort=True)
-    mean_cutoff = means.median().mean()
-    max_cutoff = maxes.median().mean()
+def get_test_data(site, PDP_days, start_search, end_search, cli=cli, fraction_test=0.5, data=None):
+    '''
+    data: get_df() data from start_search to end_search, fetched if not given
+    '''
+    # Daily weather of the search range and of the PDP days, in one fetch per aggregation
+    windows = [get_window_of_day(day) for day in PDP_days]
+    fetch_start = min([pd.Timestamp(start_search)] + [pd.Timestamp(start) for start, end in windows])
+    fetch_end = max([pd.Timestamp(end_search)] + [pd.Timestamp(end) for start, end in windows])
+    weather_mean_all = _get_daily_weather(site, fetch_start.isoformat(), fetch_end.isoformat(), 'MEAN', cli)
+    weather_max_all = _get_daily_weather(site, fetch_start.isoformat(), fetch_end.isoformat(), 'MAX', cli)
+
+    is_PDP_mean = get_pdp_mask(weather_mean_all.index, PDP_days)
+    is_PDP_max = get_pdp_mask(weather_max_all.index, PDP_days)
+    mean_cutoff = weather_mean_all[is_PDP_mean].median().mean()
+    max_cutoff = weather_max_all[is_PDP_max].median().mean()
 
-    weather_mean_all =  get_weather(site, start_search, end_search, agg='MEAN', window='24h', cli=cli)
     weather_mean = weather_mean_all.mean(axis=1)  
-    weather_max_all =  get_weather(site, start_search, end_search, agg='MAX', window='24h', cli=cli)
     weather_max = weather_max_all.mean(axis=1)
     
     weather = pd.DataFrame({'mean': weather_mean,'max': weather_max})
+    in_search = (to_dates(weather.index) >= _get_day(start_search)) & (to_dates(weather.index) < _get_day(end_search))
+    weather = weather[in_search]
     
     
     weather=_remove_PDP_days(weather, PDP_days) 
@@ -89,7 +108,11 @@ def get_test_data(site, PDP_days, start_search, end_search, cli=cli, fraction_te
     
     above_cutoff = above_max_cutoff & above_mean_cuttoff
     qualified = above_cutoff[above_cutoff]
-    valid_filter = [isValidTestDay(day, site) for day in qualified.index]
+
+    # Validity of all the days from the 15 min data of the whole range
+    if data is None:
+        data = get_df(site, start_search, end_search, agg='MEAN', interval='15min')
+    valid_filter = get_valid_test_days(data).reindex(qualified.index, fill_value=False).values
     qualified = qualified[valid_filter]
     num_testing_samples=int(np.ceil(np.size(qualified)*fraction_test))
         
@@ -0,0 +1,119 @@
+import numpy as np
+import scipy.sparse as sp
+
+DEFAULT_ALPHAS = [0.0001, .001, 0.01, 0.05, 0.1, 0.5, 1, 10]
+
+class IncrementalRidge:
+    '''
+    Ridge regression fitted from sufficient statistics (X'X, X'y and the sums of X, y and y'y),
+    so new samples are folded in without going over the old ones again.
+    For a given alpha, same model as sklearn's Ridge(normalize=True), i.e. with intercept and the columns
+    of X centered and scaled to unit norm. Alpha is chosen among alphas by the leave-one-out error, as
+    RidgeCV(normalize=True) does, when all the samples are given at once (fit(), or the first partial_fit());
+    the leverages it needs aren't kept in the statistics, so later partial_fit() calls keep that alpha
+    and only re-solve the coefficients.
+    X can be dense or scipy.sparse.
+    '''
+    def __init__(self, alphas=DEFAULT_ALPHAS):
+        self.alphas = list(alphas)
+        self.n_samples_ = 0
+        self.xtx_ = None
+        self.xty_ = None
+        self.x_sum_ = None
+        self.y_sum_ = 0.0
+        self.yty_ = 0.0
+        self.alpha_ = None
+        self.coef_ = None
+        self.intercept_ = 0.0
+
+    def partial_fit(self, X, y):
+        '''
+        Add the samples to the statistics and re-solve (choosing alpha if these are the first samples)
+        '''
+        first = self.xtx_ is None
+        y = np.asarray(y, dtype=float)
+        if sp.issparse(X):
+            X = X.tocsr().astype(float)
+            xtx = (X.T @ X).toarray()
+            x_sum = np.asarray(X.sum(axis=0)).ravel()
+        else:
+            X = np.asarray(X, dtype=float)
+            xtx = X.T @ X
+            x_sum = X.sum(axis=0)
+        xty = X.T @ y
+
+        if self.xtx_ is None:
+            self.xtx_, self.xty_, self.x_sum_ = xtx, xty, x_sum
+        else:
+            self.xtx_ = self.xtx_ + xtx
+            self.xty_ = self.xty_ + xty
+            self.x_sum_ = self.x_sum_ + x_sum
+        self.n_samples_ += len(y)
+        self.y_sum_ += y.sum()
+        self.yty_ += y @ y
+
+        if first:
+            self._solve(X, y)
+        else:
+            self._solve()
+        return self
+
+    def fit(self, X, y):
+        self.__init__(alphas=self.alphas)
+        return self.partial_fit(X, y)
+
+    def _solve(self, X=None, y=None):
+        '''
+        Solve for the coefficients; X, y (all the samples of the statistics) choose alpha by leave-one-out,
+        otherwise alpha_ is kept
+        '''
+        n = self.n_samples_
+        x_mean = self.x_sum_ / n
+        y_mean = self.y_sum_ / n
+
+        # Centered statistics
+        xtx = self.xtx_ - n * np.outer(x_mean, x_mean)
+        xty = self.xty_ - n * x_mean * y_mean
+
+        # Scale columns to unit norm (constant columns are left as they are, as sklearn does)
+        x_scale = np.sqrt(np.maximum(np.diag(xtx), 0))
+        x_scale[x_scale == 0] = 1
+        gram = xtx / np.outer(x_scale, x_scale)
+        xty = xty / x_scale
+
+        # gram = V diag(eigvals) V', every alpha is then solved in O(p^2)
+        eigvals, eigvecs = np.linalg.eigh(gram)
+        eigvals = np.maximum(eigvals, 0)
+        z = eigvecs.T @ xty
+
+        if X is not None:
+            self.alpha_ = self._select_alpha(X, y, x_mean, x_scale, y_mean, eigvals, eigvecs, z)
+        coef = eigvecs @ (z / (eigvals + self.alpha_))
+        self.coef_ = coef / x_scale
+        self.intercept_ = y_mean - x_mean @ self.coef_
+
+    def _select_alpha(self, X, y, x_mean, x_scale, y_mean, eigvals, eigvecs, z, chunk_size=10000):
+        '''
+        Alpha with the lowest mean squared leave-one-out error (the first one on ties), the criterion of RidgeCV:
+        the leave-one-out error of sample i is r_i / (1 - h_ii), with r_i its residual and
+        h_ii = 1/n + sum_k P_ik^2 / (eigvals_k + alpha) its leverage (the intercept isn't penalized),
+        where P = Z V are the centered and scaled samples in the eigenbasis of the gram matrix
+        '''
+        alphas = np.asarray(self.alphas, dtype=float)
+        n = len(y)
+        shrink = 1 / (eigvals[:, None] + alphas)
+        # Coefficients of every alpha in the eigenbasis
+        coefs = z[:, None] * shrink
+        # P = X (V / x_scale) - (x_mean / x_scale) V, by chunks of rows since Z is dense even when X is sparse
+        basis = eigvecs / x_scale[:, None]
+        offset = x_mean @ basis
+        errors = np.zeros(len(alphas))
+        for start in range(0, n, chunk_size):
+            P = X[start:start + chunk_size] @ basis - offset
+            residuals = (y[start:start + chunk_size] - y_mean)[:, None] - P @ coefs
+            leverages = 1 / n + (P ** 2) @ shrink
+            errors += np.sum((residuals / (1 - leverages)) ** 2, axis=0)
+        return self.alphas[int(np.argmin(errors))]
+
+    def predict(self, X):
+        return X @ self.coef_ + self.intercept_
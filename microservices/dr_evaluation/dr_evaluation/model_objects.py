@@ -13,32 +13,81 @@ from sklearn.linear_model import RidgeCV
 from scipy import special
 from abc import ABC, abstractmethod
 
-from .feature_engineering import create_ridge_features
-from .utils import get_window_of_day, get_workdays, get_closest_station, get_month_window
-from .static_models import weather_model, power_model
+from .feature_engineering import create_ridge_features, create_ridge_design_matrix, NUM_TIME_OF_WEEK_SLOTS
+from .calendar_index import get_calendar_index, get_pdp_mask, to_dates
+from .incremental_ridge import IncrementalRidge, DEFAULT_ALPHAS as RIDGE_ALPHAS
+from .utils import get_window_of_day, get_workdays, get_closest_station, get_month_window, slice_window
+from .static_models import weather_model, power_model, weather_model_days, power_model_days
 from .get_data import get_df
 
+def _get_window(site, data, start, end):
+    '''
+    Returns the data of the site in [start, end): fetched with get_df if data is None,
+    sliced from data if it's a DataFrame, or from data.get() if it's a SiteDataProvider
+    '''
+    if data is None:
+        return get_df(site, start, end, agg='MEAN', interval='15min')
+    if isinstance(data, pd.DataFrame):
+        return slice_window(data, start, end)
+    return data.get(start, end)
+
 class BaselineModel(ABC):
 
     @abstractmethod
-    def train(self, site, exclude_dates):
+    def train(self, site, exclude_dates, data=None):
         '''
         Train model on building data, from 2016-01-01 to today.
         Arguments:
             site (str): building site name
             exclude dates (list of datetime.date or string in YYYY-MM-DD format): dates to exclude from training
+            data (pd.DataFrame or SiteDataProvider): optional, already fetched data covering the
+                training window or provider to get it from; fetched with get_df if not given
         '''
         pass
 
     @abstractmethod
-    def predict(self, site, date):
+    def predict(self, site, date, data=None):
         '''
         Arguments:
             site (str): building site name
             exclude dates (datetime.date or string in YYYY-MM-DD format): dates to predict on
+            data (pd.DataFrame or SiteDataProvider): optional, already fetched data covering
+                get_data_window(date) or provider to get it from; fetched with get_df if not given
         '''
         pass
 
+    def get_data_window(self, event_day):
+        '''
+        Returns the start and end timestamp of the data needed to predict the event day
+        '''
+        return get_month_window(event_day)
+
+    def get_data(self, site, event_day, data=None):
+        '''
+        Returns the data needed to predict the event day, sliced from data if given
+        '''
+        start, end = self.get_data_window(event_day)
+        return _get_window(site, data, start, end)
+
+
+def _predict_days(model, site, event_days, data, model_days):
+    if len(event_days) == 0:
+        return []
+
+    # Data of all the event days at once; each day is still evaluated on its own window only
+    windows = [model.get_data_window(event_day) for event_day in event_days]
+    start = min(windows, key=lambda window: pd.to_datetime(window[0]))[0]
+    end = max(windows, key=lambda window: pd.to_datetime(window[1]))[1]
+    data = _get_window(site, data, start, end)
+
+    day_windows = [(pd.to_datetime(start).date(), pd.to_datetime(end).date()) for start, end in windows]
+    results = model_days(event_days, data, model.exclude_dates, model.X, model.Y, windows=day_windows)
+
+    predictions = []
+    for event_day, (actual, prediction, baseline_weather) in zip(event_days, results):
+        event_weather=data[event_day.strftime("%Y-%m-%d")][['weather']]
+        predictions.append((actual, prediction, event_weather, baseline_weather))
+    return predictions
 
 class WeatherModel(BaselineModel):
 
@@ -55,21 +104,27 @@ class WeatherModel(BaselineModel):
         self.site = None
         self.exclude_dates = None
 
-    def train(self, site, exclude_dates):
+    def train(self, site, exclude_dates, data=None):
         self.site = site
         self.exclude_dates = exclude_dates
         return
 
-    def predict(self, site, event_day):
+    def predict(self, site, event_day, data=None):
         # Get the correct data for prediction
-        start, end = get_month_window(event_day)
-        data = get_df(site, start, end, agg='MEAN', interval='15min')
+        data = self.get_data(site, event_day, data)
         #added two lines below
         #data['weather'] = data['weather'].interpolate()
         event_weather=data[event_day.strftime("%Y-%m-%d")][['weather']]
         actual, prediction,baseline_weather = weather_model(event_day, data, self.exclude_dates, self.X, self.Y)
         return actual, prediction, event_weather, baseline_weather
 
+    def predict_days(self, site, event_days, data=None):
+        '''
+        predict() of many event days at once, with one fetch and the X-in-Y engine
+        Returns list of predict() results
+        '''
+        return _predict_days(self, site, event_days, data, weather_model_days)
+
 class PowerModel(BaselineModel):
 
     def __init__(self, init_args, rmse=None):
@@ -85,15 +140,14 @@ class PowerModel(BaselineModel):
         self.site = None
         self.exclude_dates = None
 
-    def train(self, site, exclude_dates):
+    def train(self, site, exclude_dates, data=None):
         self.site = site
         self.exclude_dates = exclude_dates
         return
 
-    def predict(self, site, event_day):
+    def predict(self, site, event_day, data=None):
         # Get the correct data for prediction
-        start, end = get_month_window(event_day)
-        data = get_df(site, start, end, agg='MEAN', interval='15min')
+        data = self.get_data(site, event_day, data)
         #added two lines below
         #data['weather'] = data['weather'].interpolate()
         event_weather=data[event_day.strftime("%Y-%m-%d")][['weather']]
@@ -101,6 +155,13 @@ class PowerModel(BaselineModel):
         actual, prediction, baseline_weather = power_model(event_day, data, self.exclude_dates, self.X, self.Y)
         return actual, prediction, event_weather, baseline_weather
 
+    def predict_days(self, site, event_days, data=None):
+        '''
+        predict() of many event days at once, with one fetch and the X-in-Y engine
+        Returns list of predict() results
+        '''
+        return _predict_days(self, site, event_days, data, power_model_days)
+
 class RidgeModel(BaselineModel):
 
     def __init__(self, rmse=None):
@@ -109,61 +170,92 @@ class RidgeModel(BaselineModel):
         self.name = "Ridge Model"
         self.site = None
         self.exclude_dates = None
+        self.trained_until = None
+        self.last_weather = None
 
 
-    def train(self, site, exclude_dates):
+    def train(self, site, exclude_dates, data=None):
         """
         Fit the regression model for a site during for the specified window
         exclude_dates is a an optional set of datetime.date objects to exclude from training
-        cli: pymortar client
+        data: optional, already fetched data covering the training window or SiteDataProvider (sliced locally)
         """
         start_train = pd.to_datetime('2016-01-01').tz_localize('US/Pacific').isoformat()
         end_train = pd.to_datetime(datetime.datetime.today().date()).tz_localize('US/Pacific').isoformat()
-        alphas = [0.0001, .001, 0.01, 0.05, 0.1, 0.5, 1, 10]
 
+        self.site = site
+        self.exclude_dates = list(exclude_dates)
+        self.model = IncrementalRidge(alphas=RIDGE_ALPHAS)
+        # The first row has no preceding weather, its 'change' wraps around to the last row as in
+        # create_ridge_features()
+        self.last_weather = None
+        self._fit_window(site, start_train, end_train, data)
+
+    def update(self, site, exclude_dates=(), end=None, data=None):
+        """
+        Fold the days from the end of the last training window until end (default: today) into the model,
+        without going over the previous days again (e.g. nightly retraining)
+        exclude_dates: additional dates to exclude (e.g. new DR-event days)
+        data: optional, already fetched data covering the new days or SiteDataProvider (sliced locally)
+        """
+        if (not isinstance(self.model, IncrementalRidge) or getattr(self, 'trained_until', None) is None
+                or self.model.xtx_ is None):
+            # Models trained before incremental fitting was supported, or loaded from a version 1 model artifact
+            # (which only keeps the coefficients)
+            return self.train(site, list(self.exclude_dates or []) + list(exclude_dates), data=data)
+
+        if end is None:
+            end = pd.to_datetime(datetime.datetime.today().date()).tz_localize('US/Pacific').isoformat()
+        if pd.to_datetime(end) <= pd.to_datetime(self.trained_until):
+            return
+
+        self.exclude_dates = list(self.exclude_dates) + list(exclude_dates)
+        self._fit_window(site, self.trained_until, end, data)
+
+    def _fit_window(self, site, start, end, data=None):
         # Get data from pymortar
-        data = get_df(site, start_train, end_train)
+        data = _get_window(site, data, start, end)
 
-        # Get weekdays
-        data['date'] = data.index.date
-        weekdays = get_workdays(start_train, end_train)
-        day_filter = [d in weekdays for d in data['date']]
+        # Keep workdays that aren't excluded
+        dates = to_dates(data.index)
+        day_filter = get_calendar_index().workday_mask(dates) & ~get_pdp_mask(dates, self.exclude_dates)
         df = data[day_filter]
 
-        # Exclude dates
-        day_filter = [d not in exclude_dates for d in df.index.date]
-        df = df[day_filter]
+        # Create ridge features, with the same columns whatever the window
+        X, columns = create_ridge_design_matrix(df, sparse=True,
+                                                time_of_week_columns=np.arange(NUM_TIME_OF_WEEK_SLOTS),
+                                                previous_weather=self.last_weather)
+        y = df['power'].values
 
-        # Create ridge features
-        df = create_ridge_features(df)
-
-        # Remove NA rows
-        df = df.dropna()
-        df = df[df['power'] != 0]
+        # Remove NA rows (only the weather features, from 'change' on, can be NA)
+        finite = np.isfinite(X[:, columns.index('change'):].toarray()).all(axis=1) & np.isfinite(y)
+        rows = finite & (y != 0)
 
         # Train model
-        X_train, y_train = df.drop(['power', 'weather', 'date'], axis=1), df['power']
-        model = RidgeCV(normalize=True, alphas=alphas)
-        model.fit(pd.DataFrame(X_train), y_train)
-
-        # Train Error
-        y_pred = model.predict(pd.DataFrame(X_train))
-        self.model = model
+        if rows.any():
+            self.model.partial_fit(X[rows], y[rows])
+        self.trained_until = end
+        if len(df):
+            self.last_weather = df['weather'].values[-1]
 
-    def predict(self, site, event_day):
-        start, end = get_window_of_day(event_day)
+    def get_data_window(self, event_day):
+        return get_window_of_day(event_day)
 
+    def predict(self, site, event_day, data=None):
         # Get data from pymortar
         #changed line below
-        data = get_df(site, start, end, agg='MEAN', interval='15min')
+        data = self.get_data(site, event_day, data)
         data['weather'] = data['weather'].interpolate()
         event_weather=data[event_day.strftime("%Y-%m-%d")][['weather']]
 
-        # Get ridge features
-        df = create_ridge_features(data)
-
-        # Take away power from predicting data
-        X_test, actual = df.drop(['power', 'weather'], axis=1), df['power']
+        actual = data['power']
+        if isinstance(self.model, IncrementalRidge):
+            X_test, _ = create_ridge_design_matrix(data, sparse=True,
+                                                   time_of_week_columns=np.arange(NUM_TIME_OF_WEEK_SLOTS))
+        else:
+            # Models trained with RidgeCV on the create_ridge_features() frame
+            df = create_ridge_features(data)
+            X_test = df.drop(['power', 'weather'], axis=1)
 
         # Predict for the specified event date
         baseline = self.model.predict(X_test)
@@ -0,0 +1,266 @@
+""" Versioned on-disk format of the trained baseline models, and in-process registry of the loaded ones. """
+
+import os
+import json
+import uuid
+import pickle
+import datetime
+import threading
+import numpy as np
+import pandas as pd
+
+from .model_objects import WeatherModel, PowerModel, RidgeModel
+from .incremental_ridge import IncrementalRidge
+
+FORMAT_VERSION = 2
+# Version 1 artifacts don't have the .npz of training statistics
+SUPPORTED_VERSIONS = (1, 2)
+MODELS_DIR = 'models'
+
+_MODEL_CLASSES = {
+    'WeatherModel': WeatherModel,
+    'PowerModel': PowerModel,
+    'RidgeModel': RidgeModel,
+}
+
+
+# IncrementalRidge attributes stored in the .npz, to keep updating a loaded model incrementally
+_RIDGE_STATISTICS = ('xtx_', 'xty_', 'x_sum_', 'y_sum_', 'yty_', 'n_samples_')
+
+
+def get_artifact_paths(site, model_name, root=MODELS_DIR):
+    """ Paths of the metadata (.json), coefficients (.npy) and training statistics (.npz) of a model. """
+    base = os.path.join(root, site, model_name)
+    return base + '.json', base + '.npy', base + '.npz'
+
+
+def _to_date_strings(dates):
+    return [str(pd.to_datetime(date).date()) for date in (dates if dates is not None else [])]
+
+
+def _atomic_write(path, write_func, mode):
+    # Readers (e.g. other processes) never see a partially written file; the temporary file is unique
+    # to this write, so concurrent saves of the same model (threads or processes) don't clobber each other
+    tmp_path = path + '.' + uuid.uuid4().hex + '.tmp'
+    try:
+        with open(tmp_path, mode) as f:
+            write_func(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def save_model(model, site, model_name, root=MODELS_DIR, trained_at=None):
+    """ Store a trained model as JSON metadata plus, for ridge models, a .npy array of coefficients and a .npz of
+    training statistics.
+
+    Note
+    ----
+    The array holds the intercept followed by the coefficients, so it can be memory-mapped and shared by
+    processes. The .npz holds the sufficient statistics of IncrementalRidge with trained_until and last_weather,
+    so that update() of a loaded ridge model only folds in the new days.
+
+    Parameters
+    ----------
+    model       : BaselineModel
+        Trained model.
+    site        : str
+        Building name.
+    model_name  : str
+        Name to store the model as - 'best', 'weather_5_10'...
+    root        : str
+        Models folder.
+    trained_at  : datetime.date
+        Training date, defaults to today.
+
+    """
+
+    class_name = type(model).__name__
+    if class_name not in _MODEL_CLASSES:
+        raise ValueError('unsupported model type {}'.format(class_name))
+
+    metadata = {
+        'version': FORMAT_VERSION,
+        'type': class_name,
+        'name': model.name,
+        'site': model.site,
+        'rmse': None if model.rmse is None else float(model.rmse),
+        'trained_at': str(trained_at or datetime.date.today()),
+        'exclude_dates': _to_date_strings(model.exclude_dates),
+    }
+
+    coefficients = None
+    if isinstance(model, RidgeModel):
+        if not isinstance(model.model, IncrementalRidge):
+            # Models trained with RidgeCV predict on a different feature frame
+            raise ValueError('only ridge models fitted with IncrementalRidge can be stored')
+        metadata['alpha'] = model.model.alpha_
+        coefficients = np.concatenate(([model.model.intercept_], model.model.coef_))
+        statistics = {name: getattr(model.model, name) for name in _RIDGE_STATISTICS}
+        statistics['trained_until'] = np.array(model.trained_until or '')
+        statistics['last_weather'] = np.array(np.nan if model.last_weather is None else model.last_weather,
+                                              dtype=float)
+    else:
+        metadata['init_args'] = [model.X, model.Y]
+
+    json_path, npy_path, npz_path = get_artifact_paths(site, model_name, root)
+    os.makedirs(os.path.dirname(json_path), exist_ok=True)
+    if coefficients is not None:
+        _atomic_write(npy_path, lambda f: np.save(f, coefficients), 'wb')
+        _atomic_write(npz_path, lambda f: np.savez(f, **statistics), 'wb')
+    _atomic_write(json_path, lambda f: json.dump(metadata, f, indent=2), 'w')
+
+
+def load_model_artifact(site, model_name, root=MODELS_DIR, mmap=True):
+    """ Load a model stored with save_model().
+
+    Parameters
+    ----------
+    site        : str
+        Building name.
+    model_name  : str
+        Stored model name.
+    root        : str
+        Models folder.
+    mmap        : bool
+        Memory-map the coefficients instead of reading them.
+
+    Returns
+    -------
+    BaselineModel
+        Model, ready to predict.
+
+    """
+
+    json_path, npy_path, npz_path = get_artifact_paths(site, model_name, root)
+    with open(json_path) as f:
+        metadata = json.load(f)
+    if metadata.get('version') not in SUPPORTED_VERSIONS:
+        raise ValueError('unsupported model format version {} in {}'.format(metadata.get('version'), json_path))
+
+    model_class = _MODEL_CLASSES[metadata['type']]
+    if model_class is RidgeModel:
+        model = RidgeModel(rmse=metadata['rmse'])
+        coefficients = np.load(npy_path, mmap_mode='r' if mmap else None)
+        model.model = IncrementalRidge()
+        model.model.alpha_ = metadata['alpha']
+        model.model.intercept_ = float(coefficients[0])
+        model.model.coef_ = coefficients[1:]
+        if metadata['version'] == 1:
+            # No statistics, update() retrains the model
+            model.trained_until = metadata['trained_until']
+            model.last_weather = np.nan if metadata['last_weather'] is None else metadata['last_weather']
+        else:
+            with np.load(npz_path) as statistics:
+                for name in _RIDGE_STATISTICS:
+                    value = statistics[name]
+                    setattr(model.model, name, value if value.ndim else value.item())
+                model.trained_until = str(statistics['trained_until']) or None
+                model.last_weather = float(statistics['last_weather'])
+    else:
+        model = model_class(tuple(metadata['init_args']), rmse=metadata['rmse'])
+
+    model.name = metadata['name']
+    model.site = metadata['site']
+    model.exclude_dates = [pd.to_datetime(date).date() for date in metadata['exclude_dates']]
+    return model
+
+
+class ModelRegistry:
+
+    def __init__(self, root=MODELS_DIR):
+        """ Constructor.
+
+        Note
+        ----
+        Models are loaded once and shared by all requests (and threads); a model is reloaded when its file
+        changes, e.g. after retraining. Models stored as pickles by older versions are still loaded.
+
+        Parameters
+        ----------
+        root    : str
+            Models folder.
+
+        """
+
+        self.root = root
+
+        # (site, model name) -> (file modification time, model)
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _get_path(self, site, model_name):
+        json_path, _, _ = get_artifact_paths(site, model_name, self.root)
+        if os.path.exists(json_path):
+            return json_path, True
+        return os.path.join(self.root, site, model_name), False
+
+    def get(self, site, model_name='best'):
+        """ Get a model, loading it if it isn't loaded yet or its file changed.
+
+        Parameters
+        ----------
+        site        : str
+            Building name.
+        model_name  : str
+            Model name - 'best', 'weather_5_10'...
+
+        Returns
+        -------
+        BaselineModel
+            Model.
+
+        """
+
+        path, is_artifact = self._get_path(site, model_name)
+        mtime = os.path.getmtime(path)
+
+        with self._lock:
+            loaded = self._models.get((site, model_name))
+            if loaded is not None and loaded[0] == mtime:
+                return loaded[1]
+
+        if is_artifact:
+            model = load_model_artifact(site, model_name, self.root)
+        else:
+            with open(path, 'rb') as model_file:
+                model = pickle.load(model_file)
+
+        with self._lock:
+            self._models[(site, model_name)] = (mtime, model)
+        return model
+
+    def load_all(self):
+        """ Load all the models of the models folder, e.g. at server start.
+
+        Returns
+        -------
+        list(tuple)
+            (site, model name) of the models that failed to load.
+
+        """
+
+        failed = []
+        if not os.path.isdir(self.root):
+            return failed
+
+        for site in sorted(os.listdir(self.root)):
+            site_dir = os.path.join(self.root, site)
+            if not os.path.isdir(site_dir):
+                continue
+            names = set()
+            for file_name in os.listdir(site_dir):
+                name, extension = os.path.splitext(file_name)
+                if extension in ('.json', ''):
+                    names.add(name)
+            for model_name in sorted(names):
+                try:
+                    self.get(site, model_name)
+                except Exception:
+                    failed.append((site, model_name))
+        return failed
+
+
+model_registry = ModelRegistry()
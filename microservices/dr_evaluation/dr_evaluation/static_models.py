@@ -16,6 +16,8 @@ from scipy import special
 from .feature_engineering import get_time_of_week, get_t_cutoff_values
 from .utils import get_window_of_day, get_workdays, get_closest_station, mean_absolute_percentage_error
 from .baseline_functions import create_pivot, get_X_in_Y_baseline,  make_baseline
+from .baseline_engine import XInYBaselineEngine
+from .day_matrix import DayMatrix
 
 def power_model(event_day, data, PDP_dates, X=10,Y=10): #event_day input must be in datetime.date(yyyy, mm, dd) format
     #power and weather are column names
@@ -78,6 +80,53 @@ def weather_model(event_day,data, PDP_dates,X=10,Y=10):
 
     #PDP is just a placeholder for now
 
+def _model_days(event_days, data, PDP_dates, windows, **kwargs):
+    if len(PDP_dates) and type(PDP_dates[0]) == str:
+        PDP_dates = pd.to_datetime(PDP_dates).date
+
+    demand = DayMatrix.from_series(data['power'])
+    weather = DayMatrix.from_series(data['weather'])
+    engine = XInYBaselineEngine.from_pivots(demand, weather, PDP_dates)
+    result = engine.baselines(event_days, windows=windows,
+                              event_start_h=14,
+                              event_end_h=18,
+                              adj_ratio=True,
+                              min_ratio=1.0,
+                              max_ratio=1.5,
+                              **kwargs)
+
+    # make_baseline() of the weather, on all the days of the pivot
+    weather_baselines = engine.mean_of_days(engine.weather, result['x_days'])
+    with np.errstate(invalid='ignore'):
+        baseline_weather_means = np.array([np.nanmean(row) if (~np.isnan(row)).any() else np.nan
+                                           for row in weather_baselines])
+
+    positions = engine.get_positions(event_days)
+    results = []
+    for i, event_day in enumerate(event_days):
+        if positions[i] < 0:
+            raise IndexError("no data for event day {}".format(event_day))
+        prediction = to_indexed_series(result['baseline'][i], event_day)
+        actual = to_indexed_series(engine.power[positions[i]], event_day)
+        results.append((actual, prediction, baseline_weather_means[i]))
+    return results
+
+def power_model_days(event_days, data, PDP_dates, X=10, Y=10, windows=None):
+    '''
+    power_model() of many event days at once with the X-in-Y engine
+    data: covers all the event days' data
+    windows: (start, end) of the data each event day would have on its own (e.g. get_month_window)
+    Returns list of (actual, prediction, baseline weather mean), one per event day
+    '''
+    return _model_days(event_days, data, PDP_dates, windows, X=X, Y=Y)
+
+def weather_model_days(event_days, data, PDP_dates, X=10, Y=10, windows=None):
+    '''
+    weather_model() of many event days at once with the X-in-Y engine (same arguments as power_model_days)
+    '''
+    # Same as weather_model, which always picks 5 out of 10 days
+    return _model_days(event_days, data, PDP_dates, windows, X=5, Y=10, weather_mapping=True, method='max')
+
 def to_indexed_series(array, date):
     index = pd.date_range(date, periods=96, freq='15min')
     result = pd.Series(array, index=index)
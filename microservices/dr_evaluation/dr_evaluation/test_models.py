@@ -2,18 +2,68 @@ from .pdp_events import pdp_events
 from .model_objects import all_models
 from .get_test_days import get_test_data, get_window_of_day
 from .get_greenbutton_id import *
+from .calc_price import get_tariff_options
+from .get_data import get_df
+from .model_store import save_model
 
 from sklearn.metrics import mean_squared_error
 import datetime
 import os
 import pandas as pd
 import numpy as np
-import pickle
 import operator
+from concurrent import futures
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))+'/'
 
-
-def test_models(site, models='all'):
+# Full history of the site, prefetched once and shared by the workers of the tournament
+_shared_data = None
+
+def _init_worker(data):
+    global _shared_data
+    _shared_data = data
+
+def _train_model(site, model_name, dr_event_dates, exclude_dates):
+    '''
+    Initialize and train a model on the shared data (runs in a worker)
+    '''
+    model_class = all_models[model_name]['model_object']
+    init_args = all_models[model_name]['init_args']
+    if init_args is not None:
+        model = model_class(init_args)
+    else:
+        model = model_class()
+    if model_name[:5] == 'power' or model_name[:7] == 'weather':
+        model.train(site, dr_event_dates)
+    else:
+        model.train(site, exclude_dates, data=_shared_data)
+    return model
+
+def _score_days(site, model, dates):
+    '''
+    Mean squared errors of the model on the dates, predicted from the shared data (runs in a worker)
+    '''
+    errors = []
+    if hasattr(model, 'predict_days'):
+        # X-in-Y models evaluate all the days in one pass
+        predictions = model.predict_days(site, dates, data=_shared_data)
+    else:
+        predictions = (model.predict(site, date, data=_shared_data) for date in dates)
+    for actual, prediction, event_weather,baseline_weather in predictions:
+        try:
+            errors.append(mean_squared_error(actual, prediction))
+        except Exception as e:
+            print(e)
+    return errors
+
+def _split(items, n):
+    '''
+    Split items into (at most) n chunks of consecutive items
+    '''
+    size = int(np.ceil(len(items) / float(n))) if len(items) else 1
+    return [items[i:i+size] for i in range(0, len(items), size)]
+
+
+def test_models(site, models='all', max_workers=None):
 
     # initialize directory for model files
     if not os.path.exists('models'):
@@ -29,17 +79,18 @@ def test_models(site, models='all'):
     end_train = pd.to_datetime(datetime.datetime.today().date()).tz_localize('US/Pacific').isoformat()
 
     #get meter id to differentiate between pdp days
-    tarrifs = pd.read_csv(os.path.join(PROJECT_ROOT, 'tariffs.csv'), index_col='meter_id')
     meter_id = get_greenbutton_id(site)
-    tariff = tarrifs.loc[meter_id]
-    tariff = dict(tariff)
+    tariff = get_tariff_options(meter_id)
     utility_id=tariff['utility_id']
 
     # Use datetime.date objects for DR-event days
 
     dr_event_dates = [pd.to_datetime(d).date() for d in pdp_events[utility_id]]
+    # Fetch the whole history once; all models train and predict on slices of it instead of hitting pymortar
+    data = get_df(site, start_train, end_train, agg='MEAN', interval='15min')
+
     # Get days that are similar to DR-event days to test the regression model on
-    test_days, train_days = get_test_data(site, dr_event_dates, start_train, end_train)
+    test_days, train_days = get_test_data(site, dr_event_dates, start_train, end_train, data=data)
 
     # train baseline model on days exlcuding event days and our test set
     exclude_dates = np.concatenate((test_days, dr_event_dates))
@@ -48,46 +99,34 @@ def test_models(site, models='all'):
     model_errors = {}
     response = {}
 
-    for model_name in models:
-
-        # initialize the model
-        model_class = all_models[model_name]['model_object']
-        init_args = all_models[model_name]['init_args']
-        if init_args is not None:
-            model = model_class(init_args)
-        else:
-            model = model_class()
-        if model_name[:5] == 'power' or model_name[:7] == 'weather':
-            model.train(site, dr_event_dates)
-        else:
-            model.train(site, exclude_dates)
-
-        # test on all test days
-        errors = []
-
-        for date in test_days:
-            actual, prediction, event_weather,baseline_weather = model.predict(site, date)
-            try:
-                errors.append(mean_squared_error(actual, prediction))
-            except Exception as e:
-                print(e)
-
-        test_rmse = np.sqrt(np.mean(errors))
-        model.rmse = test_rmse
-        #write_file_path = 'models/{}/{}.txt'.format(site, model_name)
-        write_file_path = 'models/{}/{}'.format(site, model_name)
-        write_file = open(write_file_path, 'wb')
-        pickle.dump(model, write_file)
-
-        model_errors[model] = test_rmse
-        response[model_name] = test_rmse
+    max_workers = max_workers or os.cpu_count() or 1
+    with futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(data,)) as executor:
+
+        # train all models in parallel, one model per worker
+        train_futures = {model_name: executor.submit(_train_model, site, model_name, dr_event_dates, exclude_dates)
+                         for model_name in models}
+        trained_models = {model_name: future.result() for model_name, future in train_futures.items()}
+
+        # test on all test days, each model's days are split across the workers
+        score_futures = {model_name: [executor.submit(_score_days, site, model, dates)
+                                      for dates in _split(list(test_days), max_workers)]
+                         for model_name, model in trained_models.items()}
+
+        for model_name, model in trained_models.items():
+            errors = []
+            for future in score_futures[model_name]:
+                errors.extend(future.result())
+
+            test_rmse = np.sqrt(np.mean(errors))
+            model.rmse = test_rmse
+            save_model(model, site, model_name)
+
+            model_errors[model] = test_rmse
+            response[model_name] = test_rmse
 
     best_model = min(model_errors.items(), key=operator.itemgetter(1))[0]
 
 
-    #write_file_path = 'models/{}/best.txt'.format(site)
-    write_file_path = 'models/{}/best'.format(site)
-    write_file = open(write_file_path, 'wb')
-    pickle.dump(best_model, write_file)
+    save_model(best_model, site, 'best')
 
     return response
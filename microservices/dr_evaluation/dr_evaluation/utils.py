@@ -1,11 +1,11 @@
 import pandas as pd
 import os, sys
-from pandas.tseries.holiday import USFederalHolidayCalendar
-from pandas.tseries.offsets import CustomBusinessDay
 from sklearn.utils import check_array
 import numpy as np
 from datetime import timedelta
 
+from .calendar_index import get_calendar_index
+
 PROJECT_ROOT = os.path.abspath(os.path.dirname(__file__))+'/'
 
 def mean_absolute_percentage_error(y_true, y_pred):
@@ -17,8 +17,7 @@ def mean_absolute_percentage_error(y_true, y_pred):
 def get_workdays(start,end):
     start = pd.to_datetime(start).date()
     end = pd.to_datetime(end).date()
-    us_bd = CustomBusinessDay(calendar=USFederalHolidayCalendar())
-    workdays = pd.DatetimeIndex(start=start, end=end, freq=us_bd)
+    workdays = get_calendar_index().workdays(start, end)
     return workdays
 
 # Returns the start and end timestamp of a single day
@@ -48,3 +47,9 @@ def get_month_window(date, time_delta=2):
     start_ts = pd.to_datetime(start_date).tz_localize('US/Pacific').isoformat()
     end_ts = pd.to_datetime(end_date).tz_localize('US/Pacific').isoformat()
     return start_ts, end_ts
+
+# Returns a copy of the rows of data in [start, end)
+def slice_window(data, start, end):
+    start = pd.to_datetime(start)
+    end = pd.to_datetime(end)
+    return data[(data.index >= start) & (data.index < end)].copy()
@@ -19,7 +19,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   package='dr_evaluation',
   syntax='proto3',
   serialized_options=None,
-  serialized_pb=_b('\n\x13\x64r_evaluation.proto\x12\rdr_evaluation\"B\n\x07Request\x12\x10\n\x08\x62uilding\x18\x01 \x01(\t\x12\x11\n\tevent_day\x18\x02 \x01(\x03\x12\x12\n\nmodel_name\x18\x03 \x01(\t\"(\n\x04\x43ost\x12\x0e\n\x06\x61\x63tual\x18\x01 \x01(\x01\x12\x10\n\x08\x62\x61seline\x18\x02 \x01(\x01\"+\n\x08OAT_Mean\x12\r\n\x05\x65vent\x18\x01 \x01(\x01\x12\x10\n\x08\x62\x61seline\x18\x02 \x01(\x01\"\xca\x01\n\x05Reply\x12\x10\n\x08\x62uilding\x18\x01 \x01(\t\x12\x11\n\tevent_day\x18\x02 \x01(\t\x12!\n\x04\x63ost\x18\x03 \x01(\x0b\x32\x13.dr_evaluation.Cost\x12)\n\x08oat_mean\x18\x04 \x01(\x0b\x32\x17.dr_evaluation.OAT_Mean\x12\x15\n\rbaseline_type\x18\x05 \x01(\t\x12\x15\n\rbaseline_rmse\x18\x06 \x01(\x01\x12\x0e\n\x06\x61\x63tual\x18\x07 \x03(\x01\x12\x10\n\x08\x62\x61seline\x18\x08 \x03(\x01\x32Q\n\x0c\x44REvaluation\x12\x41\n\x0fGetDREvaluation\x12\x16.dr_evaluation.Request\x1a\x14.dr_evaluation.Reply\"\x00\x62\x06proto3')
+  serialized_pb=_b('\n\x13\x64r_evaluation.proto\x12\rdr_evaluation\"B\n\x07Request\x12\x10\n\x08\x62uilding\x18\x01 \x01(\t\x12\x11\n\tevent_day\x18\x02 \x01(\x03\x12\x12\n\nmodel_name\x18\x03 \x01(\t\"I\n\x0c\x42\x61tchRequest\x12\x11\n\tbuildings\x18\x01 \x03(\t\x12\x12\n\nevent_days\x18\x02 \x03(\x03\x12\x12\n\nmodel_name\x18\x03 \x01(\t\"(\n\x04\x43ost\x12\x0e\n\x06\x61\x63tual\x18\x01 \x01(\x01\x12\x10\n\x08\x62\x61seline\x18\x02 \x01(\x01\"+\n\x08OAT_Mean\x12\r\n\x05\x65vent\x18\x01 \x01(\x01\x12\x10\n\x08\x62\x61seline\x18\x02 \x01(\x01\"\xd9\x01\n\x05Reply\x12\x10\n\x08\x62uilding\x18\x01 \x01(\t\x12\x11\n\tevent_day\x18\x02 \x01(\t\x12!\n\x04\x63ost\x18\x03 \x01(\x0b\x32\x13.dr_evaluation.Cost\x12)\n\x08oat_mean\x18\x04 \x01(\x0b\x32\x17.dr_evaluation.OAT_Mean\x12\x15\n\rbaseline_type\x18\x05 \x01(\t\x12\x15\n\rbaseline_rmse\x18\x06 \x01(\x01\x12\x0e\n\x06\x61\x63tual\x18\x07 \x03(\x01\x12\x10\n\x08\x62\x61seline\x18\x08 \x03(\x01\x12\r\n\x05\x65rror\x18\t \x01(\t2\xa0\x01\n\x0c\x44REvaluation\x12\x41\n\x0fGetDREvaluation\x12\x16.dr_evaluation.Request\x1a\x14.dr_evaluation.Reply\"\x00\x12M\n\x14GetDREvaluationBatch\x12\x1b.dr_evaluation.BatchRequest\x1a\x14.dr_evaluation.Reply\"\x00\x30\x01\x62\x06proto3')
 )
 
 
@@ -70,6 +70,51 @@ _REQUEST = _descriptor.Descriptor(
 )
 
 
+_BATCHREQUEST = _descriptor.Descriptor(
+  name='BatchRequest',
+  full_name='dr_evaluation.BatchRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='buildings', full_name='dr_evaluation.BatchRequest.buildings', index=0,
+      number=1, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='event_days', full_name='dr_evaluation.BatchRequest.event_days', index=1,
+      number=2, type=3, cpp_type=2, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='model_name', full_name='dr_evaluation.BatchRequest.model_name', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=106,
+  serialized_end=179,
+)
+
+
 _COST = _descriptor.Descriptor(
   name='Cost',
   full_name='dr_evaluation.Cost',
@@ -103,8 +148,8 @@ _COST = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=106,
-  serialized_end=146,
+  serialized_start=181,
+  serialized_end=221,
 )
 
 
@@ -141,8 +186,8 @@ _OAT_MEAN = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=148,
-  serialized_end=191,
+  serialized_start=223,
+  serialized_end=266,
 )
 
 
@@ -209,6 +254,13 @@ _REPLY = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='error', full_name='dr_evaluation.Reply.error', index=8,
+      number=9, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
@@ -221,13 +273,14 @@ _REPLY = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=194,
-  serialized_end=396,
+  serialized_start=269,
+  serialized_end=486,
 )
 
 _REPLY.fields_by_name['cost'].message_type = _COST
 _REPLY.fields_by_name['oat_mean'].message_type = _OAT_MEAN
 DESCRIPTOR.message_types_by_name['Request'] = _REQUEST
+DESCRIPTOR.message_types_by_name['BatchRequest'] = _BATCHREQUEST
 DESCRIPTOR.message_types_by_name['Cost'] = _COST
 DESCRIPTOR.message_types_by_name['OAT_Mean'] = _OAT_MEAN
 DESCRIPTOR.message_types_by_name['Reply'] = _REPLY
@@ -240,6 +293,13 @@ Request = _reflection.GeneratedProtocolMessageType('Request', (_message.Message,
   ))
 _sym_db.RegisterMessage(Request)
 
+BatchRequest = _reflection.GeneratedProtocolMessageType('BatchRequest', (_message.Message,), dict(
+  DESCRIPTOR = _BATCHREQUEST,
+  __module__ = 'dr_evaluation_pb2'
+  # @@protoc_insertion_point(class_scope:dr_evaluation.BatchRequest)
+  ))
+_sym_db.RegisterMessage(BatchRequest)
+
 Cost = _reflection.GeneratedProtocolMessageType('Cost', (_message.Message,), dict(
   DESCRIPTOR = _COST,
   __module__ = 'dr_evaluation_pb2'
@@ -269,8 +329,8 @@ _DREVALUATION = _descriptor.ServiceDescriptor(
   file=DESCRIPTOR,
   index=0,
   serialized_options=None,
-  serialized_start=398,
-  serialized_end=479,
+  serialized_start=489,
+  serialized_end=649,
   methods=[
   _descriptor.MethodDescriptor(
     name='GetDREvaluation',
@@ -281,6 +341,15 @@ _DREVALUATION = _descriptor.ServiceDescriptor(
     output_type=_REPLY,
     serialized_options=None,
   ),
+  _descriptor.MethodDescriptor(
+    name='GetDREvaluationBatch',
+    full_name='dr_evaluation.DREvaluation.GetDREvaluationBatch',
+    index=1,
+    containing_service=None,
+    input_type=_BATCHREQUEST,
+    output_type=_REPLY,
+    serialized_options=None,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_DREVALUATION)
 
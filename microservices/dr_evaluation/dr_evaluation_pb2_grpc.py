@@ -19,6 +19,11 @@ class DREvaluationStub(object):
         request_serializer=dr__evaluation__pb2.Request.SerializeToString,
         response_deserializer=dr__evaluation__pb2.Reply.FromString,
         )
+    self.GetDREvaluationBatch = channel.unary_stream(
+        '/dr_evaluation.DREvaluation/GetDREvaluationBatch',
+        request_serializer=dr__evaluation__pb2.BatchRequest.SerializeToString,
+        response_deserializer=dr__evaluation__pb2.Reply.FromString,
+        )
 
 
 class DREvaluationServicer(object):
@@ -33,6 +38,15 @@ class DREvaluationServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def GetDREvaluationBatch(self, request, context):
+    """A server-to-client streaming RPC.
+    Evaluates every (building, event day) pair of the request; replies are streamed as soon as they are ready,
+    so they are not in request order. A pair that can't be evaluated is returned with its error set.
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
 
 def add_DREvaluationServicer_to_server(servicer, server):
   rpc_method_handlers = {
@@ -41,6 +55,11 @@ def add_DREvaluationServicer_to_server(servicer, server):
           request_deserializer=dr__evaluation__pb2.Request.FromString,
           response_serializer=dr__evaluation__pb2.Reply.SerializeToString,
       ),
+      'GetDREvaluationBatch': grpc.unary_stream_rpc_method_handler(
+          servicer.GetDREvaluationBatch,
+          request_deserializer=dr__evaluation__pb2.BatchRequest.FromString,
+          response_serializer=dr__evaluation__pb2.Reply.SerializeToString,
+      ),
   }
   generic_handler = grpc.method_handlers_generic_handler(
       'dr_evaluation.DREvaluation', rpc_method_handlers)
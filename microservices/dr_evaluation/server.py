@@ -11,12 +11,40 @@ from datetime import datetime
 
 import xbos_services_getter
 from dr_evaluation import evaluate
+from dr_evaluation.get_greenbutton_id import warm_greenbutton_ids
 
 import dr_evaluation_pb2
 import dr_evaluation_pb2_grpc
 
 METER_DATA_HOST_ADDRESS = 'localhost:1234'
 _ONE_DAY_IN_SECONDS = 60 * 60 * 24
+GREENBUTTON_ID_REFRESH_SECONDS = _ONE_DAY_IN_SECONDS
+EVALUATION_WORKERS = 8     # Threads shared by all batch requests to load sites and evaluate days
+
+
+class EvaluationRequest:
+
+    def __init__(self, building, event_day, model_name):
+        """ Per-request state of a DR evaluation.
+
+        Note
+        ----
+        The servicer handles requests concurrently, so nothing request specific may be stored on the servicer itself.
+
+        Parameters
+        ----------
+        building    : str
+            Building name.
+        event_day   : datetime.datetime
+            Event day (UTC).
+        model_name  : str
+            Baseline model name - 'best', 'weather_5_10'...
+
+        """
+
+        self.building = building
+        self.event_day = event_day
+        self.model_name = model_name
 
 
 class DREvaluationServicer(dr_evaluation_pb2_grpc.DREvaluationServicer):
@@ -24,15 +52,19 @@ class DREvaluationServicer(dr_evaluation_pb2_grpc.DREvaluationServicer):
     def __init__(self):
         """ Constructor - store class variables. """
 
-        # Request parameters
-        self.building = None
-        self.event_day = None
-        self.model_name = None
-
         # List of buildings
         building_names_stub = xbos_services_getter.get_building_zone_names_stub()
         self.supported_buildings = xbos_services_getter.get_buildings(building_names_stub)
 
+        # Resolve the meter id's used for the tariff lookup now, so that requests never wait on them
+        warm_greenbutton_ids(self.supported_buildings, refresh_interval=GREENBUTTON_ID_REFRESH_SECONDS)
+
+        # Load the stored models once, all requests share them
+        evaluate.model_registry.load_all()
+
+        # Sites and days of batch requests are loaded and evaluated in parallel on this pool
+        self.evaluation_executor = futures.ThreadPoolExecutor(max_workers=EVALUATION_WORKERS)
+
     def get_parameters(self, request):
         """ Storing and error checking request parameters.
 
@@ -43,31 +75,134 @@ class DREvaluationServicer(dr_evaluation_pb2_grpc.DREvaluationServicer):
 
         Returns
         -------
-        str
-            Error message. If no error message, then return None.
+        EvaluationRequest, str
+            Request parameters, error message. If no error message, then return None.
 
         """
 
-        self.building = request.building
-        self.event_day = request.event_day
-        self.model_name = request.model_name
+        building = request.building
+        event_day = request.event_day
+        model_name = request.model_name
+
+        if any(not elem for elem in [building, event_day]):
+            return None, "invalid request, empty param(s)"
+
+        if not model_name:
+            model_name = 'best'
+
+        event_day = datetime.utcfromtimestamp(float(event_day / 1e9)).replace(tzinfo=pytz.utc)
+
+        if building not in self.supported_buildings:
+            return None, "invalid request, building not found; supported buildings: " + str(self.supported_buildings)
 
-        if any(not elem for elem in [self.building, self.event_day]):
-            return "invalid request, empty param(s)"
+        return EvaluationRequest(building, event_day, model_name), None
 
-        if not self.model_name:
-            self.model_name = 'best'
+    def get_batch_parameters(self, request):
+        """ Storing and error checking batch request parameters.
+
+        Parameters
+        ----------
+        request                 : gRPC request
+            Contains the buildings and event days to evaluate.
+
+        Returns
+        -------
+        dict, str
+            Maps each building to the list of its EvaluationRequest's, error message. If no error message, then
+            return None.
+
+        """
+
+        buildings = list(request.buildings)
+        event_days = list(request.event_days)
+        model_name = request.model_name
+
+        if any(not elem for elem in [buildings, event_days]) or any(not elem for elem in buildings + event_days):
+            return None, "invalid request, empty param(s)"
+
+        if not model_name:
+            model_name = 'best'
+
+        unsupported_buildings = [building for building in buildings if building not in self.supported_buildings]
+        if unsupported_buildings:
+            return None, "invalid request, building(s) not found: " + str(unsupported_buildings) + \
+                         "; supported buildings: " + str(self.supported_buildings)
+
+        event_days = [datetime.utcfromtimestamp(float(event_day / 1e9)).replace(tzinfo=pytz.utc)
+                      for event_day in sorted(set(event_days))]
+
+        site_requests = {}
+        for building in buildings:
+            site_requests[building] = [EvaluationRequest(building, event_day, model_name)
+                                       for event_day in event_days]
+
+        return site_requests, None
+
+    @staticmethod
+    def create_reply(result):
+        """ Create response object from the result of evaluate.evaluate().
+
+        Parameters
+        ----------
+        result  : dict
+            DR evaluation.
+
+        Returns
+        -------
+        dr_evaluation_pb2.Reply()
+            Response object.
+
+        """
+
+        return dr_evaluation_pb2.Reply(
+            building=result['site'],
+            event_day=result['date'].strftime('%Y-%m-%d %H:%M:%S'),
+            cost=dr_evaluation_pb2.Cost(actual=result['energy cost']['baseline'],
+                                        baseline=result['energy cost']['baseline']),
+            oat_mean=dr_evaluation_pb2.OAT_Mean(event=result['OAT_mean']['event'],
+                                                baseline=result['OAT_mean']['baseline']),
+            baseline_type=result['baseline-type'],
+            baseline_rmse=result['baseline-rmse'],
+            actual=result['actual'],
+            baseline=result['baseline']
+        )
+
+    @staticmethod
+    def create_error_reply(params, error):
+        """ Create response object of an evaluation that failed.
+
+        Parameters
+        ----------
+        params  : EvaluationRequest
+            Request parameters.
+        error   : str
+            Error message.
 
-        self.event_day = datetime.utcfromtimestamp(float(self.event_day / 1e9)).replace(tzinfo=pytz.utc)
+        Returns
+        -------
+        dr_evaluation_pb2.Reply()
+            Response object.
 
-        if self.building not in self.supported_buildings:
-            return "invalid request, building not found; supported buildings: " + str(self.supported_buildings)
+        """
 
-        return None
+        return dr_evaluation_pb2.Reply(
+            building=params.building,
+            event_day=params.event_day.strftime('%Y-%m-%d %H:%M:%S'),
+            error=str(error)
+        )
 
-    def evaluate(self):
+    def evaluate(self, params, model=None, data=None):
         """ Evaluate the DR day and make response object.
 
+        Parameters
+        ----------
+        params  : EvaluationRequest
+            Request parameters.
+        model   : BaselineModel
+            Already loaded model of the building; loaded from disk if None.
+        data    : pd.DataFrame()
+            Already fetched data covering the event day's window; fetched if None.
+
         Returns
         -------
         dr_evaluation_pb2.Reply(), str
@@ -76,23 +211,94 @@ class DREvaluationServicer(dr_evaluation_pb2_grpc.DREvaluationServicer):
         """
 
         try:
-            result = evaluate.evaluate(self.building, self.event_day, model_name=self.model_name)
-
-            return dr_evaluation_pb2.Reply(
-                building=result['site'],
-                event_day=result['date'].strftime('%Y-%m-%d %H:%M:%S'),
-                cost=dr_evaluation_pb2.Cost(actual=result['energy cost']['baseline'],
-                                            baseline=result['energy cost']['baseline']),
-                oat_mean=dr_evaluation_pb2.OAT_Mean(event=result['OAT_mean']['event'],
-                                                    baseline=result['OAT_mean']['baseline']),
-                baseline_type=result['baseline-type'],
-                baseline_rmse=result['baseline-rmse'],
-                actual=result['actual'],
-                baseline=result['baseline']
-            ), None
+            result = evaluate.evaluate(params.building, params.event_day, model_name=params.model_name,
+                                       model=model, data=data)
+            return self.create_reply(result), None
         except Exception as e:
             return None, e
 
+    def load_site(self, building, model_name, event_days):
+        """ Load the model of a building and fetch the data of all its event days at once.
+
+        Parameters
+        ----------
+        building    : str
+            Building name.
+        model_name  : str
+            Baseline model name.
+        event_days  : list(datetime.datetime)
+            Event days to evaluate.
+
+        Returns
+        -------
+        BaselineModel, pd.DataFrame()
+            Model, data covering the union of the event days' windows.
+
+        """
+
+        model = evaluate.load_model(building, model_name)
+        data = evaluate.get_batch_df(building, model, event_days)
+        return model, data
+
+    def evaluate_batch(self, site_requests, context):
+        """ Evaluate the event days of all the sites in parallel.
+
+        Note
+        ----
+        Each site's model is loaded and its data fetched once (in parallel across sites); as soon as a site is
+        ready its days are evaluated in parallel.
+
+        Parameters
+        ----------
+        site_requests   : dict
+            Maps each building to the list of its EvaluationRequest's.
+        context         : gRPC context
+            Used to stop when the client goes away.
+
+        Yields
+        ------
+        dr_evaluation_pb2.Reply()
+            Evaluations, in completion order.
+
+        """
+
+        # future -> list of EvaluationRequest's (site futures) or EvaluationRequest (day futures)
+        pending = {}
+        for building, requests in site_requests.items():
+            future = self.evaluation_executor.submit(self.load_site, building, requests[0].model_name,
+                                                     [params.event_day for params in requests])
+            pending[future] = requests
+
+        try:
+            while pending:
+                if not context.is_active():
+                    return
+
+                done, _ = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    requests = pending.pop(future)
+
+                    # Site is ready, evaluate its days
+                    if isinstance(requests, list):
+                        try:
+                            model, data = future.result()
+                        except Exception as e:
+                            for params in requests:
+                                yield self.create_error_reply(params, e)
+                            continue
+
+                        for params in requests:
+                            day_future = self.evaluation_executor.submit(self.evaluate, params, model, data)
+                            pending[day_future] = params
+
+                    # Day is evaluated
+                    else:
+                        result, error = future.result()
+                        yield result if not error else self.create_error_reply(requests, error)
+        finally:
+            for future in pending:
+                future.cancel()
+
     def GetDREvaluation(self, request, context):
         """ RPC.
 
@@ -110,20 +316,47 @@ class DREvaluationServicer(dr_evaluation_pb2_grpc.DREvaluationServicer):
 
         """
 
-        error = self.get_parameters(request)
+        params, error = self.get_parameters(request)
         if error:
             # List of status codes: https://github.com/grpc/grpc/blob/master/doc/statuscodes.md
             context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
             context.set_details(error)
             return dr_evaluation_pb2.Reply()
         else:
-            result, error = self.evaluate()
+            result, error = self.evaluate(params)
             if error:
                 context.set_code(grpc.StatusCode.UNAVAILABLE)
                 context.set_details(error)
                 return dr_evaluation_pb2.Reply()
         return result
 
+    def GetDREvaluationBatch(self, request, context):
+        """ RPC.
+
+        Parameters
+        ----------
+        request     : gRPC request
+            Contains the buildings and event days to evaluate.
+        context     : ???
+            ???
+
+        Returns
+        -------
+        gRPC response
+            Stream of the DR evaluations of each (building, event day).
+
+        """
+
+        site_requests, error = self.get_batch_parameters(request)
+        if error:
+            # List of status codes: https://github.com/grpc/grpc/blob/master/doc/statuscodes.md
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return
+
+        for reply in self.evaluate_batch(site_requests, context):
+            yield reply
+
 
 def serve():
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
@@ -0,0 +1,69 @@
+import os
+import sys
+import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dr_evaluation.baseline_engine import XInYBaselineEngine
+from dr_evaluation.baseline_functions import create_pivot, get_X_in_Y_baseline
+
+PDP_DATES = [datetime.date(2018, 7, 10), datetime.date(2018, 7, 27), datetime.date(2018, 8, 14)]
+
+
+def _make_pivots(seed=0):
+    index = pd.date_range('2018-05-01', '2018-09-01', freq='15min', tz='US/Pacific')[:-1]
+    t = index.asi8 // 10 ** 9
+    rng = np.random.RandomState(seed)
+    data = pd.DataFrame({
+        'power': (np.sin(t / 7e3) + np.cos(t / 5.1e5)) * 50 + 100 + rng.rand(len(t)) * 30,
+        'weather': np.sin(t / 9e3) * 10 + 70 + rng.rand(len(t)) * 5,
+    }, index=index)
+    data.loc[rng.rand(len(t)) < 0.02, 'power'] = np.nan
+    # A day without any power data can't be picked
+    data.loc['2018-07-18', 'power'] = np.nan
+    return create_pivot(data[['power']]), create_pivot(data[['weather']])
+
+
+@pytest.mark.parametrize('weather_mapping', [False, True])
+def test_matches_get_X_in_Y_baseline(weather_mapping):
+    demand_pivot, weather_pivot = _make_pivots()
+    event_days = PDP_DATES + [datetime.date(2018, 7, 19), datetime.date(2018, 8, 31)]
+
+    engine = XInYBaselineEngine.from_pivots(demand_pivot, weather_pivot, PDP_DATES)
+    result = engine.baselines(event_days, X=5, Y=10, event_start_h=14, event_end_h=18,
+                              weather_mapping=weather_mapping)
+
+    for i, event_day in enumerate(event_days):
+        expected, days, _, x_days, ratio = get_X_in_Y_baseline(
+            demand_pivot, weather_pivot, event_day, PDP_DATES, event_day.strftime('%Y-%m-%d'),
+            X=5, Y=10, event_start_h=14, event_end_h=18, weather_mapping=weather_mapping)
+
+        assert list(engine.dates[result['y_days'][i]]) == sorted(days.date)
+        assert list(engine.dates[result['x_days'][i]]) == sorted(pd.DatetimeIndex(x_days).date)
+        assert result['ratio'][i] == pytest.approx(ratio)
+        np.testing.assert_allclose(result['baseline'][i], expected['baseline'].values)
+
+
+def test_picks_highest_days():
+    # Power of each day is constant, the highest X of the last Y workdays are averaged
+    dates = pd.bdate_range('2018-06-04', '2018-06-15').date
+    levels = np.array([5, 1, 9, 3, 7, 2, 8, 4, 6, 10], dtype=float)
+    power = np.repeat(levels[:, None], 96, axis=1)
+    engine = XInYBaselineEngine(power, power, dates)
+
+    result = engine.baselines([datetime.date(2018, 6, 14)], X=2, Y=5, adj_ratio=False)
+    # Last 5 workdays up to June 14th: levels 2, 8, 4, 6 (June 11th-14th) and 7 (June 8th)
+    assert list(engine.dates[result['x_days'][0]]) == [datetime.date(2018, 6, 8), datetime.date(2018, 6, 12)]
+    np.testing.assert_allclose(result['baseline'][0], 7.5)
+
+
+def test_not_enough_data():
+    dates = pd.bdate_range('2018-06-04', '2018-06-08').date
+    power = np.ones((len(dates), 96))
+    engine = XInYBaselineEngine(power, power, dates)
+
+    with pytest.raises(AssertionError, match='not enough data'):
+        engine.baselines([datetime.date(2018, 6, 8)], Y=10)
@@ -0,0 +1,50 @@
+import os
+import sys
+import datetime
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import USFederalHolidayCalendar
+from pandas.tseries.offsets import CustomBusinessDay
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dr_evaluation.calendar_index import CalendarIndex, get_calendar_index, get_pdp_mask, to_dates
+
+
+def test_workdays_match_custom_business_days():
+    expected = pd.date_range('2016-01-01', '2020-12-31', freq=CustomBusinessDay(calendar=USFederalHolidayCalendar()))
+    workdays = get_calendar_index().workdays(datetime.date(2016, 1, 1), datetime.date(2020, 12, 31))
+    assert list(workdays) == list(expected)
+
+
+def test_masks():
+    dates = [datetime.date(2018, 7, 4), datetime.date(2018, 7, 5), datetime.date(2018, 7, 7)]
+    index = CalendarIndex(pdp_dates=[datetime.date(2018, 7, 5)])
+    assert list(index.holiday_mask(dates)) == [True, False, False]
+    assert list(index.weekend_mask(dates)) == [False, False, True]
+    assert list(index.pdp_mask(dates)) == [False, True, False]
+    assert list(index.workday_mask(dates)) == [False, True, False]
+
+
+def test_local_days_of_tz_aware_index():
+    # 02:00 UTC on July 5th is still July 4th in California
+    index = pd.DatetimeIndex(['2018-07-05 02:00', '2018-07-05 08:00'], tz='UTC').tz_convert('US/Pacific')
+    assert list(to_dates(index)) == [np.datetime64('2018-07-04'), np.datetime64('2018-07-05')]
+    assert list(get_calendar_index().workday_mask(index)) == [False, True]
+
+
+def test_pdp_mask_matches_isin():
+    dates = np.arange(np.datetime64('2018-01-01'), np.datetime64('2019-01-01'))
+    pdp_dates = [datetime.date(2018, 9, 4), datetime.date(2018, 7, 10), '2018-07-27', datetime.date(2018, 7, 10)]
+    expected = np.isin(dates, pd.to_datetime(pdp_dates).values.astype('datetime64[D]'))
+    assert (get_pdp_mask(dates, pdp_dates) == expected).all()
+    assert not get_pdp_mask(dates, []).any()
+
+
+def test_extends_beyond_horizon():
+    index = CalendarIndex(start='2018-01-01', end='2018-02-01')
+    dates = [datetime.date(2017, 12, 25), datetime.date(2019, 1, 1), datetime.date(2019, 1, 2)]
+    assert list(index.holiday_mask(dates)) == [True, True, False]
+    assert list(index.workday_mask(dates)) == [False, False, True]
+    # Dates inside the original horizon are still right
+    assert list(index.holiday_mask([datetime.date(2018, 1, 15)])) == [True]
@@ -0,0 +1,78 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dr_evaluation.day_matrix import DayMatrix, as_day_matrix
+
+
+def _legacy_pivot(series):
+    # create_pivot() before DayMatrix: MultiIndex of (date, hour) unstacked
+    data = series.to_frame()
+    data["date"] = data.index.date
+    data["combined"] = data.index.hour + (data.index.minute * (1.0 / 60.0))
+    data_multi = data.set_index(["date", "combined"])
+    data_multi = data_multi[~data_multi.index.duplicated(keep='last')]
+    data_pivot = data_multi.unstack()
+    data_pivot.columns = data_pivot.columns.droplevel(0)
+    return data_pivot.reindex(columns=np.arange(96) / 4.0)
+
+
+def _assert_matches_legacy(series):
+    matrix = DayMatrix.from_series(series)
+    expected = _legacy_pivot(series)
+    assert list(matrix.dates) == list(pd.to_datetime(expected.index).values.astype('datetime64[D]'))
+    np.testing.assert_array_equal(matrix.values, expected.values)
+    np.testing.assert_array_equal(matrix.valid, ~np.isnan(expected.values))
+
+
+def _series(start, end, tz=None):
+    index = pd.date_range(start, end, freq='15min', tz=tz)[:-1]
+    return pd.Series(np.arange(len(index), dtype=float), index=index)
+
+
+def test_whole_days():
+    _assert_matches_legacy(_series('2018-06-01', '2018-06-08', tz='US/Pacific'))
+
+
+def test_gaps_and_partial_days():
+    series = _series('2018-06-01 06:00', '2018-06-08 13:00', tz='US/Pacific')
+    series = series.drop(series.index[100:300]).drop(series.index[[400, 401, 402]])
+    series.iloc[10] = np.nan
+    _assert_matches_legacy(series)
+
+
+@pytest.mark.parametrize('start, end', [('2018-03-10', '2018-03-13'), ('2018-11-03', '2018-11-06')])
+def test_dst_days(start, end):
+    # Local days with 92 and 100 readings
+    _assert_matches_legacy(_series(start, end, tz='US/Pacific'))
+
+
+def test_non_nanosecond_index():
+    series = _series('2018-06-01', '2018-06-04', tz='US/Pacific')
+    if not hasattr(series.index, 'as_unit'):
+        pytest.skip("DatetimeIndex units aren't supported by this pandas")
+    series.index = series.index.as_unit('s')
+    _assert_matches_legacy(series)
+
+
+def test_pivot_round_trip():
+    matrix = DayMatrix.from_series(_series('2018-06-01', '2018-06-04'))
+    pivot = matrix.to_pivot()
+    assert np.shares_memory(pivot.values, matrix.values)
+
+    restored = as_day_matrix(pivot)
+    assert list(restored.dates) == list(matrix.dates)
+    np.testing.assert_array_equal(restored.values, matrix.values)
+
+
+def test_reindex():
+    matrix = DayMatrix.from_series(_series('2018-06-01', '2018-06-03'))
+    dates = np.array(['2018-05-31', '2018-06-02'], dtype='datetime64[D]')
+    reindexed = matrix.reindex(dates)
+    assert list(reindexed.dates) == list(dates)
+    assert np.isnan(reindexed.values[0]).all()
+    np.testing.assert_array_equal(reindexed.values[1], matrix.values[1])
@@ -0,0 +1,87 @@
+import os
+import sys
+import inspect
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from sklearn.linear_model import RidgeCV
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dr_evaluation.incremental_ridge import IncrementalRidge, DEFAULT_ALPHAS
+
+
+def _make_data(n=60, p=8, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.normal(size=(n, p))
+    # Nearly collinear columns, so that the alphas give different leave-one-out errors
+    X[:, 1] = X[:, 0] + 0.01 * rng.normal(size=n)
+    X[:, 2] = 0
+    y = X @ rng.normal(size=p) + 3 + rng.normal(size=n)
+    return X, y
+
+
+def _loo_errors(X, y, alphas):
+    # Explicit leave-one-out: columns centered and scaled on all the samples, as RidgeCV(normalize=True),
+    # then a ridge regression with an unpenalized intercept without each sample in turn
+    Z = X - X.mean(axis=0)
+    scale = np.sqrt((Z ** 2).sum(axis=0))
+    scale[scale == 0] = 1
+    Z = np.column_stack([np.ones(len(y)), Z / scale])
+    errors = []
+    for alpha in alphas:
+        penalty = alpha * np.eye(Z.shape[1])
+        penalty[0, 0] = 0
+        total = 0
+        for i in range(len(y)):
+            keep = np.arange(len(y)) != i
+            coef = np.linalg.solve(Z[keep].T @ Z[keep] + penalty, Z[keep].T @ y[keep])
+            total += (y[i] - Z[i] @ coef) ** 2
+        errors.append(total / len(y))
+    return np.array(errors)
+
+
+def test_alpha_minimizes_leave_one_out_error():
+    X, y = _make_data()
+    alphas = [0.001, 0.1, 1, 10, 100]
+    model = IncrementalRidge(alphas=alphas).fit(X, y)
+
+    errors = _loo_errors(X, y, alphas)
+    assert model.alpha_ == alphas[int(np.argmin(errors))]
+
+
+@pytest.mark.skipif('normalize' not in inspect.signature(RidgeCV).parameters,
+                    reason="RidgeCV(normalize=True) isn't supported by this scikit-learn")
+def test_matches_ridge_cv():
+    X, y = _make_data(n=200, p=12, seed=1)
+    model = IncrementalRidge().fit(X, y)
+    expected = RidgeCV(normalize=True, alphas=DEFAULT_ALPHAS).fit(X, y)
+
+    assert model.alpha_ == expected.alpha_
+    np.testing.assert_allclose(model.coef_, expected.coef_, rtol=1e-6, atol=1e-8)
+    np.testing.assert_allclose(model.intercept_, expected.intercept_, rtol=1e-6)
+    np.testing.assert_allclose(model.predict(X), expected.predict(X), rtol=1e-6)
+
+
+def test_sparse_matches_dense():
+    X, y = _make_data()
+    dense = IncrementalRidge().fit(X, y)
+    sparse = IncrementalRidge().fit(sp.csr_matrix(X), y)
+
+    assert sparse.alpha_ == dense.alpha_
+    np.testing.assert_allclose(sparse.coef_, dense.coef_, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(sparse.intercept_, dense.intercept_)
+
+
+def test_partial_fit_keeps_alpha():
+    X, y = _make_data(n=120)
+    model = IncrementalRidge(alphas=[0.001, 0.1, 1, 10, 100]).partial_fit(X[:80], y[:80])
+    alpha = model.alpha_
+    model.partial_fit(X[80:], y[80:])
+    assert model.alpha_ == alpha
+    assert model.n_samples_ == 120
+
+    # Same coefficients as a fit on all the samples at once with that alpha
+    expected = IncrementalRidge(alphas=[alpha]).fit(X, y)
+    np.testing.assert_allclose(model.coef_, expected.coef_, rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(model.intercept_, expected.intercept_)
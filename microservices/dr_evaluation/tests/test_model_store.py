@@ -0,0 +1,120 @@
+import os
+import sys
+import json
+import datetime
+import threading
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from dr_evaluation.incremental_ridge import IncrementalRidge
+from dr_evaluation.model_objects import PowerModel, RidgeModel
+from dr_evaluation.model_store import (ModelRegistry, get_artifact_paths, load_model_artifact, save_model,
+                                       _RIDGE_STATISTICS)
+
+
+def _make_ridge_model(seed=0, n=200):
+    rng = np.random.RandomState(seed)
+    X = rng.normal(size=(n, 5))
+    y = X @ rng.normal(size=5) + rng.normal(size=n)
+    model = RidgeModel(rmse=1.5)
+    model.site = 'ciee'
+    model.exclude_dates = [datetime.date(2018, 7, 16)]
+    model.model = IncrementalRidge().fit(X, y)
+    model.trained_until = '2018-08-01T00:00:00-07:00'
+    model.last_weather = 71.5
+    return model
+
+
+def _data(seed, n=50):
+    rng = np.random.RandomState(seed)
+    return rng.normal(size=(n, 5)), rng.normal(size=n)
+
+
+def test_ridge_round_trip(tmpdir):
+    model = _make_ridge_model()
+    save_model(model, 'ciee', 'ridge', root=str(tmpdir))
+    loaded = load_model_artifact('ciee', 'ridge', root=str(tmpdir))
+
+    assert isinstance(loaded, RidgeModel)
+    assert loaded.rmse == 1.5
+    assert loaded.site == 'ciee'
+    assert loaded.exclude_dates == [datetime.date(2018, 7, 16)]
+    assert loaded.trained_until == model.trained_until
+    assert loaded.last_weather == 71.5
+    assert loaded.model.alpha_ == model.model.alpha_
+    np.testing.assert_array_equal(loaded.model.coef_, model.model.coef_)
+    assert loaded.model.intercept_ == model.model.intercept_
+    for name in _RIDGE_STATISTICS:
+        np.testing.assert_array_equal(getattr(loaded.model, name), getattr(model.model, name))
+
+    # The restored statistics keep the model updating incrementally
+    X, y = _data(1)
+    model.model.partial_fit(X, y)
+    loaded.model.partial_fit(X, y)
+    np.testing.assert_allclose(loaded.model.coef_, model.model.coef_)
+    np.testing.assert_allclose(loaded.model.intercept_, model.model.intercept_)
+
+
+def test_power_model_round_trip(tmpdir):
+    model = PowerModel((5, 10), rmse=2.0)
+    model.site = 'ciee'
+    model.exclude_dates = []
+    save_model(model, 'ciee', 'power_5_10', root=str(tmpdir))
+    loaded = load_model_artifact('ciee', 'power_5_10', root=str(tmpdir))
+
+    assert isinstance(loaded, PowerModel)
+    assert (loaded.X, loaded.Y) == (5, 10)
+    assert loaded.rmse == 2.0
+    # Only the metadata is stored
+    _, npy_path, npz_path = get_artifact_paths('ciee', 'power_5_10', root=str(tmpdir))
+    assert not os.path.exists(npy_path) and not os.path.exists(npz_path)
+
+
+def test_version_1_artifact(tmpdir):
+    json_path, npy_path, _ = get_artifact_paths('ciee', 'ridge', root=str(tmpdir))
+    os.makedirs(os.path.dirname(json_path))
+    np.save(npy_path, np.array([3.0, 1.0, 2.0]))
+    with open(json_path, 'w') as f:
+        json.dump({'version': 1, 'type': 'RidgeModel', 'name': 'Ridge Model', 'site': 'ciee', 'rmse': None,
+                   'trained_at': '2018-08-01', 'exclude_dates': ['2018-07-16'], 'alpha': 0.5,
+                   'trained_until': '2018-08-01T00:00:00-07:00', 'last_weather': None}, f)
+
+    loaded = load_model_artifact('ciee', 'ridge', root=str(tmpdir))
+    assert loaded.model.intercept_ == 3.0
+    np.testing.assert_array_equal(loaded.model.coef_, [1.0, 2.0])
+    np.testing.assert_array_equal(loaded.model.predict(np.array([[1.0, 1.0]])), [6.0])
+    # Without statistics, update() retrains the model
+    assert loaded.model.xtx_ is None
+    assert np.isnan(loaded.last_weather)
+
+
+def test_registry_reloads_changed_model(tmpdir):
+    registry = ModelRegistry(root=str(tmpdir))
+    save_model(_make_ridge_model(seed=0), 'ciee', 'ridge', root=str(tmpdir))
+    first = registry.get('ciee', 'ridge')
+    assert registry.get('ciee', 'ridge') is first
+
+    save_model(_make_ridge_model(seed=1), 'ciee', 'ridge', root=str(tmpdir))
+    json_path, _, _ = get_artifact_paths('ciee', 'ridge', root=str(tmpdir))
+    mtime = os.path.getmtime(json_path) + 10
+    os.utime(json_path, (mtime, mtime))
+    second = registry.get('ciee', 'ridge')
+    assert second is not first
+    assert not np.array_equal(second.model.coef_, first.model.coef_)
+    assert registry.load_all() == []
+
+
+def test_concurrent_saves(tmpdir):
+    models = [_make_ridge_model(seed=seed) for seed in range(8)]
+    threads = [threading.Thread(target=save_model, args=(model, 'ciee', 'ridge'), kwargs={'root': str(tmpdir)})
+               for model in models]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Complete files of one of the saves, and no temporary files left
+    assert sorted(os.listdir(str(tmpdir.join('ciee')))) == ['ridge.json', 'ridge.npy', 'ridge.npz']
+    loaded = load_model_artifact('ciee', 'ridge', root=str(tmpdir))
+    assert any(np.array_equal(loaded.model.coef_, model.model.coef_) for model in models)
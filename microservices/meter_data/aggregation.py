@@ -0,0 +1,138 @@
+__author__ = "Pranav Gupta"
+__email__ = "pranavhgupta@lbl.gov"
+
+""" Local re-aggregation of fine-grained meter data into coarser windows. """
+
+import numpy as np
+import pandas as pd
+
+# Windowed aggregates are computed from the aggregates of this window
+BASE_WINDOW = '15m'
+
+# Aggregate -> aggregates of the base window it's computed from
+BASE_AGGREGATES = {
+    'MEAN': ('SUM', 'COUNT'),
+    'SUM': ('SUM',),
+    'COUNT': ('COUNT',),
+    'MIN': ('MIN',),
+    'MAX': ('MAX',),
+}
+
+
+def can_reaggregate(agg, window, start, base_window=BASE_WINDOW):
+    """ Check if an aggregate can be computed exactly from the base window's aggregates.
+
+    Parameters
+    ----------
+    agg             : str
+        Aggregation, e.g. MEAN, MAX.
+    window          : str
+        Requested window.
+    start           : str or datetime
+        Start time, i.e. start of the first window. Timezone naive values are assumed to be UTC.
+    base_window     : str
+        Window of the base aggregates.
+
+    Returns
+    -------
+    bool
+        True if the window is a multiple of the base window and starts on the base window's (UTC) grid.
+
+    """
+
+    if agg not in BASE_AGGREGATES:
+        return False
+
+    try:
+        duration = pd.Timedelta(window)
+        base_duration = pd.Timedelta(base_window)
+    except (ValueError, TypeError):
+        return False
+
+    if base_duration <= pd.Timedelta(0) or duration <= base_duration or duration % base_duration:
+        return False
+
+    start = pd.Timestamp(start)
+    start = start.tz_localize('UTC') if start.tzinfo is None else start.tz_convert('UTC')
+    return (start - start.normalize()) % base_duration == pd.Timedelta(0)
+
+
+def reaggregate(frames, agg, start, end, window):
+    """ Compute a windowed aggregate from the base window's aggregates.
+
+    Note
+    ----
+    Windows start at start, as upstream's do. Each window is reduced over its rows of the base data at once
+    with ufunc.reduceat(), the same way for all the columns. MEAN is the total SUM over the total COUNT,
+    i.e. the exact mean of the raw readings. NaN's are skipped and windows without any reading are NaN.
+
+    Parameters
+    ----------
+    frames  : dict
+        Maps each of the base aggregates of agg (see BASE_AGGREGATES) to its data, one column per uuid.
+    agg     : str
+        Aggregation, e.g. MEAN, MAX.
+    start   : str or datetime
+        Start time. Timezone naive values are assumed to be UTC.
+    end     : str or datetime
+        End time. Timezone naive values are assumed to be UTC.
+    window  : str
+        Requested window.
+
+    Returns
+    -------
+    pd.DataFrame()
+        Aggregated data with a UTC index, one row per window that has base rows.
+
+    """
+
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end)
+    start = start.tz_localize('UTC') if start.tzinfo is None else start.tz_convert('UTC')
+    end = end.tz_localize('UTC') if end.tzinfo is None else end.tz_convert('UTC')
+
+    base = {}
+    for base_agg in BASE_AGGREGATES[agg]:
+        df = frames[base_agg]
+        if df.index.tz is None:
+            df = df.tz_localize('UTC')
+        base[base_agg] = df[(df.index >= start) & (df.index < end)].sort_index()
+
+    first = base[BASE_AGGREGATES[agg][0]]
+    columns = first.columns
+    times = first.index.values.astype('datetime64[ns]').astype(np.int64)
+    if len(times) == 0:
+        return first
+
+    # First base row of each window; windows without rows are dropped
+    duration = pd.Timedelta(window).value
+    bucket_starts = np.arange(start.value, end.value, duration)
+    positions = np.searchsorted(times, bucket_starts)
+    bounds = np.append(positions, len(times))
+    non_empty = bounds[1:] > bounds[:-1]
+    offsets = positions[non_empty]
+    index = pd.DatetimeIndex(bucket_starts[non_empty]).tz_localize('UTC')
+
+    def reduce(base_agg, ufunc):
+        values = base[base_agg].reindex(index=first.index, columns=columns).values.astype(np.float64)
+        present = ~np.isnan(values)
+        counts = np.add.reduceat(present.astype(np.int64), offsets, axis=0)
+        if ufunc is np.add:
+            result = np.add.reduceat(np.where(present, values, 0), offsets, axis=0)
+        else:
+            result = ufunc.reduceat(values, offsets, axis=0)
+        return np.where(counts > 0, result, np.nan)
+
+    if agg == 'MEAN':
+        sums = reduce('SUM', np.add)
+        counts = reduce('COUNT', np.add)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.where(counts > 0, sums / counts, np.nan)
+    elif agg in ('SUM', 'COUNT'):
+        values = reduce(agg, np.add)
+    elif agg == 'MAX':
+        values = reduce(agg, np.fmax)
+    else:
+        values = reduce(agg, np.fmin)
+
+    return pd.DataFrame(values, index=index, columns=columns)
@@ -3,6 +3,7 @@ __email__ = "pranavhgupta@lbl.gov"
 
 import os
 import grpc
+import numpy as np
 import pandas as pd
 from pathlib import Path
 
@@ -16,7 +17,7 @@ import meter_data_historical_pb2_grpc
 METER_DATA_HOST_ADDRESS = 'localhost:1234'
 
 
-def run():
+def run(columnar=True):
 
     # NOTE(gRPC Python Team): .close() is possible on a channel and should be
     # used in circumstances in which the with statement does not fit the needs
@@ -44,20 +45,30 @@ def run():
                 window=window
             )
 
-            response = stub.GetMeterDataHistorical(request)
-
-            # NOTE
-            # Converting list(dic) to pd.DataFrame is significantly faster than appending a single row to pd.DataFrame.
-            row_list = []
-            for point in response.point:
-                dic = {
-                    'datetime': point.time,
-                    'power': point.power
-                }
-                row_list.append(dic)
-
-            df = pd.DataFrame(row_list)
-            df.set_index('datetime', inplace=True)
+            if columnar:
+                # Columnar reply - packed time/power arrays, much cheaper for long ranges
+                response = stub.GetMeterDataHistoricalColumnar(request)
+                if response.time:
+                    times = np.array(response.time, dtype=np.int64)
+                else:
+                    # Evenly spaced timestamps are sent as start + interval
+                    times = response.start + response.interval * np.arange(len(response.power), dtype=np.int64)
+                df = pd.DataFrame({'power': np.array(response.power)}, index=pd.Index(times, name='datetime'))
+            else:
+                response = stub.GetMeterDataHistorical(request)
+
+                # NOTE
+                # Converting list(dic) to pd.DataFrame is significantly faster than appending a single row to pd.DataFrame.
+                row_list = []
+                for point in response.point:
+                    dic = {
+                        'datetime': point.time,
+                        'power': point.power
+                    }
+                    row_list.append(dic)
+
+                df = pd.DataFrame(row_list)
+                df.set_index('datetime', inplace=True)
 
             # Store the dataframe in "data/" folder
             data_folder = 'data'
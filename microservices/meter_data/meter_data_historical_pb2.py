@@ -19,7 +19,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   package='meter_data_historical',
   syntax='proto3',
   serialized_options=None,
-  serialized_pb=_b('\n\x1bmeter_data_historical.proto\x12\x15meter_data_historical\"n\n\x07Request\x12\x10\n\x08\x62uilding\x18\x01 \x01(\t\x12\r\n\x05start\x18\x02 \x01(\x03\x12\x0b\n\x03\x65nd\x18\x03 \x01(\x03\x12\x12\n\npoint_type\x18\x04 \x01(\t\x12\x11\n\taggregate\x18\x05 \x01(\t\x12\x0e\n\x06window\x18\x06 \x01(\t\"-\n\x0eMeterDataPoint\x12\x0c\n\x04time\x18\x01 \x01(\x03\x12\r\n\x05power\x18\x02 \x01(\x01\"=\n\x05Reply\x12\x34\n\x05point\x18\x01 \x03(\x0b\x32%.meter_data_historical.MeterDataPoint2o\n\x13MeterDataHistorical\x12X\n\x16GetMeterDataHistorical\x12\x1e.meter_data_historical.Request\x1a\x1c.meter_data_historical.Reply\"\x00\x62\x06proto3')
+  serialized_pb=_b('\n\x1bmeter_data_historical.proto\x12\x15meter_data_historical\"}\n\x07Request\x12\x10\n\x08\x62uilding\x18\x01 \x01(\t\x12\r\n\x05start\x18\x02 \x01(\x03\x12\x0b\n\x03\x65nd\x18\x03 \x01(\x03\x12\x12\n\npoint_type\x18\x04 \x01(\t\x12\x11\n\taggregate\x18\x05 \x01(\t\x12\x0e\n\x06window\x18\x06 \x01(\t\x12\r\n\x05\x63hunk\x18\x07 \x01(\x03\"-\n\x0eMeterDataPoint\x12\x0c\n\x04time\x18\x01 \x01(\x03\x12\r\n\x05power\x18\x02 \x01(\x01\"=\n\x05Reply\x12\x34\n\x05point\x18\x01 \x03(\x0b\x32%.meter_data_historical.MeterDataPoint\"M\n\rColumnarReply\x12\x0c\n\x04time\x18\x01 \x03(\x03\x12\r\n\x05power\x18\x02 \x03(\x01\x12\r\n\x05start\x18\x03 \x01(\x03\x12\x10\n\x08interval\x18\x04 \x01(\x03\"w\n\x0fMultipleRequest\x12\x11\n\tbuildings\x18\x01 \x03(\t\x12\r\n\x05start\x18\x02 \x01(\x03\x12\x0b\n\x03\x65nd\x18\x03 \x01(\x03\x12\x12\n\npoint_type\x18\x04 \x01(\t\x12\x11\n\taggregate\x18\x05 \x01(\t\x12\x0e\n\x06window\x18\x06 \x01(\t\"d\n\rBuildingReply\x12\x10\n\x08\x62uilding\x18\x01 \x01(\t\x12\x32\n\x04\x64\x61ta\x18\x02 \x01(\x0b\x32$.meter_data_historical.ColumnarReply\x12\r\n\x05\x65rror\x18\x03 \x01(\t\"G\n\rMultipleReply\x12\x36\n\x08\x62uilding\x18\x01 \x03(\x0b\x32$.meter_data_historical.BuildingReply2\xb2\x03\n\x13MeterDataHistorical\x12X\n\x16GetMeterDataHistorical\x12\x1e.meter_data_historical.Request\x1a\x1c.meter_data_historical.Reply\"\x00\x12h\n\x1eGetMeterDataHistoricalColumnar\x12\x1e.meter_data_historical.Request\x1a$.meter_data_historical.ColumnarReply\"\x00\x12\x65\n\x19StreamMeterDataHistorical\x12\x1e.meter_data_historical.Request\x1a$.meter_data_historical.ColumnarReply\"\x00\x30\x01\x12p\n\x1eGetMeterDataHistoricalMultiple\x12&.meter_data_historical.MultipleRequest\x1a$.meter_data_historical.MultipleReply\"\x00\x62\x06proto3')
 )
 
 
@@ -74,6 +74,13 @@ _REQUEST = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='chunk', full_name='meter_data_historical.Request.chunk', index=6,
+      number=7, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
   ],
   extensions=[
   ],
@@ -87,7 +94,7 @@ _REQUEST = _descriptor.Descriptor(
   oneofs=[
   ],
   serialized_start=54,
-  serialized_end=164,
+  serialized_end=179,
 )
 
 
@@ -124,8 +131,8 @@ _METERDATAPOINT = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=166,
-  serialized_end=211,
+  serialized_start=181,
+  serialized_end=226,
 )
 
 
@@ -155,14 +162,214 @@ _REPLY = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=213,
-  serialized_end=274,
+  serialized_start=228,
+  serialized_end=289,
+)
+
+
+_COLUMNARREPLY = _descriptor.Descriptor(
+  name='ColumnarReply',
+  full_name='meter_data_historical.ColumnarReply',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='time', full_name='meter_data_historical.ColumnarReply.time', index=0,
+      number=1, type=3, cpp_type=2, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='power', full_name='meter_data_historical.ColumnarReply.power', index=1,
+      number=2, type=1, cpp_type=5, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='start', full_name='meter_data_historical.ColumnarReply.start', index=2,
+      number=3, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='interval', full_name='meter_data_historical.ColumnarReply.interval', index=3,
+      number=4, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=291,
+  serialized_end=368,
+)
+
+
+_MULTIPLEREQUEST = _descriptor.Descriptor(
+  name='MultipleRequest',
+  full_name='meter_data_historical.MultipleRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='buildings', full_name='meter_data_historical.MultipleRequest.buildings', index=0,
+      number=1, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='start', full_name='meter_data_historical.MultipleRequest.start', index=1,
+      number=2, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='end', full_name='meter_data_historical.MultipleRequest.end', index=2,
+      number=3, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='point_type', full_name='meter_data_historical.MultipleRequest.point_type', index=3,
+      number=4, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='aggregate', full_name='meter_data_historical.MultipleRequest.aggregate', index=4,
+      number=5, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='window', full_name='meter_data_historical.MultipleRequest.window', index=5,
+      number=6, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=370,
+  serialized_end=489,
+)
+
+
+_BUILDINGREPLY = _descriptor.Descriptor(
+  name='BuildingReply',
+  full_name='meter_data_historical.BuildingReply',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='building', full_name='meter_data_historical.BuildingReply.building', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='data', full_name='meter_data_historical.BuildingReply.data', index=1,
+      number=2, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+    _descriptor.FieldDescriptor(
+      name='error', full_name='meter_data_historical.BuildingReply.error', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=491,
+  serialized_end=591,
+)
+
+
+_MULTIPLEREPLY = _descriptor.Descriptor(
+  name='MultipleReply',
+  full_name='meter_data_historical.MultipleReply',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='building', full_name='meter_data_historical.MultipleReply.building', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=593,
+  serialized_end=664,
 )
 
 _REPLY.fields_by_name['point'].message_type = _METERDATAPOINT
+_BUILDINGREPLY.fields_by_name['data'].message_type = _COLUMNARREPLY
+_MULTIPLEREPLY.fields_by_name['building'].message_type = _BUILDINGREPLY
 DESCRIPTOR.message_types_by_name['Request'] = _REQUEST
 DESCRIPTOR.message_types_by_name['MeterDataPoint'] = _METERDATAPOINT
 DESCRIPTOR.message_types_by_name['Reply'] = _REPLY
+DESCRIPTOR.message_types_by_name['ColumnarReply'] = _COLUMNARREPLY
+DESCRIPTOR.message_types_by_name['MultipleRequest'] = _MULTIPLEREQUEST
+DESCRIPTOR.message_types_by_name['BuildingReply'] = _BUILDINGREPLY
+DESCRIPTOR.message_types_by_name['MultipleReply'] = _MULTIPLEREPLY
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
 Request = _reflection.GeneratedProtocolMessageType('Request', (_message.Message,), dict(
@@ -186,6 +393,34 @@ Reply = _reflection.GeneratedProtocolMessageType('Reply', (_message.Message,), d
   ))
 _sym_db.RegisterMessage(Reply)
 
+ColumnarReply = _reflection.GeneratedProtocolMessageType('ColumnarReply', (_message.Message,), dict(
+  DESCRIPTOR = _COLUMNARREPLY,
+  __module__ = 'meter_data_historical_pb2'
+  # @@protoc_insertion_point(class_scope:meter_data_historical.ColumnarReply)
+  ))
+_sym_db.RegisterMessage(ColumnarReply)
+
+MultipleRequest = _reflection.GeneratedProtocolMessageType('MultipleRequest', (_message.Message,), dict(
+  DESCRIPTOR = _MULTIPLEREQUEST,
+  __module__ = 'meter_data_historical_pb2'
+  # @@protoc_insertion_point(class_scope:meter_data_historical.MultipleRequest)
+  ))
+_sym_db.RegisterMessage(MultipleRequest)
+
+BuildingReply = _reflection.GeneratedProtocolMessageType('BuildingReply', (_message.Message,), dict(
+  DESCRIPTOR = _BUILDINGREPLY,
+  __module__ = 'meter_data_historical_pb2'
+  # @@protoc_insertion_point(class_scope:meter_data_historical.BuildingReply)
+  ))
+_sym_db.RegisterMessage(BuildingReply)
+
+MultipleReply = _reflection.GeneratedProtocolMessageType('MultipleReply', (_message.Message,), dict(
+  DESCRIPTOR = _MULTIPLEREPLY,
+  __module__ = 'meter_data_historical_pb2'
+  # @@protoc_insertion_point(class_scope:meter_data_historical.MultipleReply)
+  ))
+_sym_db.RegisterMessage(MultipleReply)
+
 
 
 _METERDATAHISTORICAL = _descriptor.ServiceDescriptor(
@@ -194,8 +429,8 @@ _METERDATAHISTORICAL = _descriptor.ServiceDescriptor(
   file=DESCRIPTOR,
   index=0,
   serialized_options=None,
-  serialized_start=276,
-  serialized_end=387,
+  serialized_start=667,
+  serialized_end=1101,
   methods=[
   _descriptor.MethodDescriptor(
     name='GetMeterDataHistorical',
@@ -206,6 +441,33 @@ _METERDATAHISTORICAL = _descriptor.ServiceDescriptor(
     output_type=_REPLY,
     serialized_options=None,
   ),
+  _descriptor.MethodDescriptor(
+    name='GetMeterDataHistoricalColumnar',
+    full_name='meter_data_historical.MeterDataHistorical.GetMeterDataHistoricalColumnar',
+    index=1,
+    containing_service=None,
+    input_type=_REQUEST,
+    output_type=_COLUMNARREPLY,
+    serialized_options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='StreamMeterDataHistorical',
+    full_name='meter_data_historical.MeterDataHistorical.StreamMeterDataHistorical',
+    index=2,
+    containing_service=None,
+    input_type=_REQUEST,
+    output_type=_COLUMNARREPLY,
+    serialized_options=None,
+  ),
+  _descriptor.MethodDescriptor(
+    name='GetMeterDataHistoricalMultiple',
+    full_name='meter_data_historical.MeterDataHistorical.GetMeterDataHistoricalMultiple',
+    index=3,
+    containing_service=None,
+    input_type=_MULTIPLEREQUEST,
+    output_type=_MULTIPLEREPLY,
+    serialized_options=None,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_METERDATAHISTORICAL)
 
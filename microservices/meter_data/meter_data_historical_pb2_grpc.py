@@ -19,6 +19,21 @@ class MeterDataHistoricalStub(object):
         request_serializer=meter__data__historical__pb2.Request.SerializeToString,
         response_deserializer=meter__data__historical__pb2.Reply.FromString,
         )
+    self.GetMeterDataHistoricalColumnar = channel.unary_unary(
+        '/meter_data_historical.MeterDataHistorical/GetMeterDataHistoricalColumnar',
+        request_serializer=meter__data__historical__pb2.Request.SerializeToString,
+        response_deserializer=meter__data__historical__pb2.ColumnarReply.FromString,
+        )
+    self.StreamMeterDataHistorical = channel.unary_stream(
+        '/meter_data_historical.MeterDataHistorical/StreamMeterDataHistorical',
+        request_serializer=meter__data__historical__pb2.Request.SerializeToString,
+        response_deserializer=meter__data__historical__pb2.ColumnarReply.FromString,
+        )
+    self.GetMeterDataHistoricalMultiple = channel.unary_unary(
+        '/meter_data_historical.MeterDataHistorical/GetMeterDataHistoricalMultiple',
+        request_serializer=meter__data__historical__pb2.MultipleRequest.SerializeToString,
+        response_deserializer=meter__data__historical__pb2.MultipleReply.FromString,
+        )
 
 
 class MeterDataHistoricalServicer(object):
@@ -33,6 +48,30 @@ class MeterDataHistoricalServicer(object):
     context.set_details('Method not implemented!')
     raise NotImplementedError('Method not implemented!')
 
+  def GetMeterDataHistoricalColumnar(self, request, context):
+    """A simple RPC returning the meter data as packed columns.
+    Preferred over GetMeterDataHistorical for long ranges/fine windows.
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def StreamMeterDataHistorical(self, request, context):
+    """A server-to-client streaming RPC.
+    The [start, end) range is split into time chunks, each chunk is sent as soon as it has been fetched.
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def GetMeterDataHistoricalMultiple(self, request, context):
+    """A simple RPC returning the meter data of several buildings as packed columns.
+    The data of all the buildings is fetched with a single upstream request.
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
 
 def add_MeterDataHistoricalServicer_to_server(servicer, server):
   rpc_method_handlers = {
@@ -41,6 +80,21 @@ def add_MeterDataHistoricalServicer_to_server(servicer, server):
           request_deserializer=meter__data__historical__pb2.Request.FromString,
           response_serializer=meter__data__historical__pb2.Reply.SerializeToString,
       ),
+      'GetMeterDataHistoricalColumnar': grpc.unary_unary_rpc_method_handler(
+          servicer.GetMeterDataHistoricalColumnar,
+          request_deserializer=meter__data__historical__pb2.Request.FromString,
+          response_serializer=meter__data__historical__pb2.ColumnarReply.SerializeToString,
+      ),
+      'StreamMeterDataHistorical': grpc.unary_stream_rpc_method_handler(
+          servicer.StreamMeterDataHistorical,
+          request_deserializer=meter__data__historical__pb2.Request.FromString,
+          response_serializer=meter__data__historical__pb2.ColumnarReply.SerializeToString,
+      ),
+      'GetMeterDataHistoricalMultiple': grpc.unary_unary_rpc_method_handler(
+          servicer.GetMeterDataHistoricalMultiple,
+          request_deserializer=meter__data__historical__pb2.MultipleRequest.FromString,
+          response_serializer=meter__data__historical__pb2.MultipleReply.SerializeToString,
+      ),
   }
   generic_handler = grpc.method_handlers_generic_handler(
       'meter_data_historical.MeterDataHistorical', rpc_method_handlers)
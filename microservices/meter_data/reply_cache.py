@@ -0,0 +1,98 @@
+__author__ = "Pranav Gupta"
+__email__ = "pranavhgupta@lbl.gov"
+
+""" Bounded LRU cache of serialized gRPC replies. """
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class ReplyCache:
+
+    def __init__(self, max_entries=4096, max_bytes=256 * 1024 * 1024):
+        """ Constructor.
+
+        Note
+        ----
+        Replies are stored already serialized, so a hit is sent without rebuilding the protobuf. When full,
+        the least recently used replies are dropped first.
+
+        Parameters
+        ----------
+        max_entries     : int
+            Maximum number of replies.
+        max_bytes       : int
+            Maximum total size of the replies.
+
+        """
+
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (expiry time or None, serialized reply); most recently used last
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ Get a serialized reply; None if it isn't cached or has expired.
+
+        Parameters
+        ----------
+        key     : hashable
+            Canonical request.
+
+        Returns
+        -------
+        bytes
+            Serialized reply.
+
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expiry, data = entry
+            if expiry is not None and expiry <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data, ttl=None):
+        """ Store a serialized reply.
+
+        Parameters
+        ----------
+        key     : hashable
+            Canonical request.
+        data    : bytes
+            Serialized reply.
+        ttl     : float
+            Number of seconds the reply stays valid; None to keep it until it's evicted.
+
+        """
+
+        if len(data) > self.max_bytes:
+            return
+
+        expiry = None if ttl is None else time.time() + ttl
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expiry, data)
+            self._size += len(data)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        _, data = self._entries.pop(key)
+        self._size -= len(data)
+
+    def clear(self):
+        """ Drop all the replies. """
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
@@ -3,9 +3,14 @@ __email__ = "pranavhgupta@lbl.gov"
 
 """ gRPC Server & client examples - https://grpc.io/docs/tutorials/basic/python.html """
 
+import sys
 import time
 import pytz
 import grpc
+import asyncio
+import functools
+import numpy as np
+import pandas as pd
 from concurrent import futures
 from datetime import datetime
 from collections import defaultdict
@@ -15,15 +20,154 @@ import xbos_services_getter
 
 import meter_data_historical_pb2
 import meter_data_historical_pb2_grpc
+from reply_cache import ReplyCache
+from aggregation import BASE_WINDOW, BASE_AGGREGATES, can_reaggregate, reaggregate
 import os
 
+# Caches shared with the other microservices, see microservices/xbos_cache
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xbos_cache import TimeSeriesCache, MetadataCache, SingleFlight
+
 # METER_DATA_HOST_ADDRESS = os.environ["METER_DATA_HISTORICAL_HOST_ADDRESS"]
 METER_DATA_HOST_ADDRESS = 'localhost:1234'
+CACHE_FOLDER = 'cache/'
+METADATA_TTL = 60 * 60 * 24
 _ONE_DAY_IN_SECONDS = 60 * 60 * 24
+_DEFAULT_CHUNK_NS = 7 * _ONE_DAY_IN_SECONDS * int(1e9)
+AIO_EXECUTOR_WORKERS = 64     # Threads running the blocking fetches/conversions in the asyncio server mode
+LIVE_REPLY_TTL_SECONDS = 60   # How long cached replies of ranges that may still change are served
+REPLY_CACHE_ENTRIES = 4096
+REPLY_CACHE_BYTES = 256 * 1024 * 1024
 
+# Identical upstream fetches in flight at the same time share a single pymortar call
+upstream_fetches = SingleFlight()
 
-def get_meter_data(pymortar_client, pymortar_objects, site, start, end,
-                   point_type="Green_Button_Meter", agg='MEAN', window='15m'):
+
+def get_window_key(agg, window):
+    """ Normalized window, e.g. '15m' and '15min' are the same; the window is ignored for RAW data. """
+    if agg == 'RAW':
+        return 'RAW'
+    try:
+        return pd.Timedelta(window).value
+    except (ValueError, TypeError):
+        return window
+
+
+def get_cache_key(site, point_type, agg, window):
+    """ Key of a site's meter data in the on-disk cache. """
+    return site, point_type, agg, get_window_key(agg, window)
+
+
+def can_reaggregate_cached(cache, sites, start, end, point_type, agg, window):
+    """ Check if agg over window can be computed from base window aggregates of the sites that are all cached.
+
+    Note
+    ----
+    With a cold cache, the base aggregates would take more (and larger) upstream fetches than fetching the
+    requested window directly, e.g. both SUM and COUNT for MEAN. They are stored by the requests of the base
+    window itself, see get_base_mean_multiple() for MEAN.
+
+    Parameters
+    ----------
+    cache               : TimeSeriesCache
+        On-disk cache of meter data.
+    sites               : list(str)
+        Building names.
+    start               : str
+        Start date - 'YYYY-MM-DDTHH:MM:SSZ'
+    end                 : str
+        End date - 'YYYY-MM-DDTHH:MM:SSZ'
+    point_type          : str
+        Type of data, i.e. Green_Button_Meter, Building_Electric_Meter...
+    agg                 : str
+        Values include MEAN, MAX, MIN, COUNT, SUM, RAW
+    window              : str
+        Size of the moving window.
+
+    Returns
+    -------
+    bool
+        True if the data can be re-aggregated without any upstream fetch.
+
+    """
+
+    if not can_reaggregate(agg, window, start):
+        return False
+
+    keys = [get_cache_key(site, point_type, base_agg, BASE_WINDOW)
+            for site in sites for base_agg in BASE_AGGREGATES[agg]]
+    return cache.covers(keys, start, end, BASE_AGGREGATES[agg][0], BASE_WINDOW)
+
+
+
+def is_base_mean(cache, start, end, agg, window):
+    """ Check if the request is a MEAN over the base window that can be served from the cached base aggregates. """
+    return (agg == 'MEAN' and get_window_key(agg, window) == get_window_key(agg, BASE_WINDOW) and
+            cache.is_cacheable(start, end, agg, window))
+
+
+def get_base_mean_multiple(pymortar_client, pymortar_objects, sites, start, end,
+                           point_type="Green_Button_Meter", cache=None, metadata=None):
+    """ Get the MEAN over the base window of several sites from the cached base aggregates (SUM and COUNT).
+
+    Note
+    ----
+    The missing days of SUM and COUNT are fetched together, with a single request, and stored, so that coarser
+    MEAN windows of the same days are then re-aggregated locally (see can_reaggregate_cached()). The MEAN of
+    each window is its SUM over its COUNT, i.e. what upstream computes.
+
+    Parameters
+    ----------
+    pymortar_client     : pymortar.Client({})
+        Pymortar Client Object.
+    pymortar_objects    : dict
+        Dictionary that maps aggregation values to corresponding pymortar objects.
+    sites               : list(str)
+        Building names.
+    start               : str
+        Start date - 'YYYY-MM-DDTHH:MM:SSZ'
+    end                 : str
+        End date - 'YYYY-MM-DDTHH:MM:SSZ'
+    point_type          : str
+        Type of data, i.e. Green_Button_Meter, Building_Electric_Meter...
+    cache               : TimeSeriesCache
+        On-disk cache of meter data.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's.
+
+    Returns
+    -------
+    dict
+        Maps each site to its meter data (one column per uuid).
+
+    """
+
+    base_aggs = BASE_AGGREGATES['MEAN']
+    keys = {get_cache_key(site, point_type, base_agg, BASE_WINDOW): (site, base_agg)
+            for site in sites for base_agg in base_aggs}
+
+    def fetch_func(fetch_keys, fetch_start, fetch_end):
+        fetch_sites = [site for site in sites if any(keys[key][0] == site for key in fetch_keys)]
+        frames, map_uuid_sitename = fetch_meter_aggregates_multiple(pymortar_client, pymortar_objects, fetch_sites,
+                                                                    fetch_start, fetch_end, point_type=point_type,
+                                                                    aggs=base_aggs, window=BASE_WINDOW,
+                                                                    metadata=metadata)
+        by_site = {base_agg: split_by_site(frames[base_agg], map_uuid_sitename, fetch_sites)
+                   for base_agg in base_aggs}
+        return {key: by_site[keys[key][1]][keys[key][0]] for key in fetch_keys}
+
+    frames = cache.fetch_many(list(keys), start, end, base_aggs[0], BASE_WINDOW, fetch_func)
+
+    result = {}
+    for site in sites:
+        sums = frames[get_cache_key(site, point_type, 'SUM', BASE_WINDOW)]
+        counts = frames[get_cache_key(site, point_type, 'COUNT', BASE_WINDOW)]
+        counts = counts.reindex(index=sums.index, columns=sums.columns)
+        result[site] = sums / counts.where(counts > 0)
+    return result
+
+def fetch_meter_data(pymortar_client, pymortar_objects, site, start, end,
+                     point_type="Green_Button_Meter", agg='MEAN', window='15m', metadata=None):
     """ Get meter data from pymortar.
 
     Parameters
@@ -44,72 +188,648 @@ def get_meter_data(pymortar_client, pymortar_objects, site, start, end,
         Values include MEAN, MAX, MIN, COUNT, SUM, RAW (the temporal window parameter is ignored)
     window              : str
         Size of the moving window.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's. If given, the data is requested by uuid without
+        running the meter view query again.
+
+    Returns
+    -------
+    pd.DataFrame(), defaultdict(list)
+        Meter data, dictionary that maps meter data's columns (uuid's) to sitenames.
+
+    """
+
+    return fetch_meter_data_multiple(pymortar_client, pymortar_objects, [site], start, end,
+                                     point_type=point_type, agg=agg, window=window, metadata=metadata)
+
+
+def fetch_meter_data_multiple(pymortar_client, pymortar_objects, sites, start, end,
+                              point_type="Green_Button_Meter", agg='MEAN', window='15m', metadata=None):
+    """ Get meter data of several sites from pymortar, with a single request.
+
+    Note
+    ----
+    Concurrent identical fetches (e.g. the same building and range requested by several clients at once) share
+    a single upstream call and its result.
+
+    Parameters
+    ----------
+    pymortar_client     : pymortar.Client({})
+        Pymortar Client Object.
+    pymortar_objects    : dict
+        Dictionary that maps aggregation values to corresponding pymortar objects.
+    sites               : list(str)
+        Building names.
+    start               : str
+        Start date - 'YYYY-MM-DDTHH:MM:SSZ'
+    end                 : str
+        End date - 'YYYY-MM-DDTHH:MM:SSZ'
+    point_type          : str
+        Type of data, i.e. Green_Button_Meter, Building_Electric_Meter...
+    agg                 : str
+        Values include MEAN, MAX, MIN, COUNT, SUM, RAW (the temporal window parameter is ignored)
+    window              : str
+        Size of the moving window.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's. If given, the data is requested by uuid without
+        running the meter view query again.
+
+    Returns
+    -------
+    pd.DataFrame(), defaultdict(list)
+        Meter data of all the sites, dictionary that maps meter data's columns (uuid's) to sitenames.
+
+    """
+
+    frames, map_uuid_sitename = fetch_meter_aggregates_multiple(pymortar_client, pymortar_objects, sites, start, end,
+                                                                point_type=point_type, aggs=(agg,), window=window,
+                                                                metadata=metadata)
+    return frames[agg], map_uuid_sitename
+
+
+def fetch_meter_aggregates_multiple(pymortar_client, pymortar_objects, sites, start, end,
+                                    point_type="Green_Button_Meter", aggs=('MEAN',), window='15m', metadata=None):
+    """ Get several aggregates of the meter data of several sites from pymortar, with a single request.
+
+    Note
+    ----
+    Concurrent identical fetches (e.g. the same building and range requested by several clients at once) share
+    a single upstream call and its result.
+
+    Parameters
+    ----------
+    pymortar_client     : pymortar.Client({})
+        Pymortar Client Object.
+    pymortar_objects    : dict
+        Dictionary that maps aggregation values to corresponding pymortar objects.
+    sites               : list(str)
+        Building names.
+    start               : str
+        Start date - 'YYYY-MM-DDTHH:MM:SSZ'
+    end                 : str
+        End date - 'YYYY-MM-DDTHH:MM:SSZ'
+    point_type          : str
+        Type of data, i.e. Green_Button_Meter, Building_Electric_Meter...
+    aggs                : tuple(str)
+        Aggregations, e.g. ('SUM', 'COUNT'); values include MEAN, MAX, MIN, COUNT, SUM, RAW.
+    window              : str
+        Size of the moving window.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's. If given, the data is requested by uuid without
+        running the meter view query again.
+
+    Returns
+    -------
+    dict, defaultdict(list)
+        Maps each aggregation to the meter data of all the sites, dictionary that maps meter data's columns
+        (uuid's) to sitenames.
+
+    """
+
+    aggs = tuple(aggs)
+    key = (tuple(sites), point_type, aggs, tuple(get_window_key(agg, window) for agg in aggs),
+           pd.Timestamp(start).value, pd.Timestamp(end).value, metadata is not None)
+
+    return upstream_fetches.do(key, _fetch_meter_aggregates_multiple, pymortar_client, pymortar_objects, sites,
+                               start, end, point_type=point_type, aggs=aggs, window=window, metadata=metadata)
+
+
+def _fetch_meter_aggregates_multiple(pymortar_client, pymortar_objects, sites, start, end,
+                                     point_type="Green_Button_Meter", aggs=('MEAN',), window='15m', metadata=None):
+    """ fetch_meter_aggregates_multiple() without coalescing. """
+
+    for agg in aggs:
+        if agg not in pymortar_objects:
+            raise ValueError('Invalid aggregate type; should be string and in caps; values include: ' +
+                             str(list(pymortar_objects.keys())))
+
+    # One dataframe per aggregation
+    names = {agg: 'data_meter_' + agg.lower() for agg in aggs}
+
+    query_meter = "SELECT ?meter WHERE { ?meter rdf:type brick:" + point_type + " };"
+
+    # Define timeframe
+    time_params = pymortar.TimeParams(
+        start=start,
+        end=end
+    )
+
+    if metadata is not None:
+        # Resolves all the sites that aren't cached yet with one metadata request
+        metadata.prefetch(sites, query_meter)
+
+        uuids = []
+        map_uuid_sitename = defaultdict(list)
+        for site in sites:
+            for uuid in metadata.get_uuids(site, query_meter):
+                if uuid not in map_uuid_sitename:
+                    uuids.append(uuid)
+                map_uuid_sitename[uuid].append(site)
+
+        if not uuids:
+            return {agg: pd.DataFrame() for agg in aggs}, map_uuid_sitename
+
+        # Define the meter timeseries streams directly by uuid's
+        data_views_meter = [
+            pymortar.DataFrame(
+                name=names[agg],  # dataframe column name
+                aggregation=pymortar_objects[agg],
+                window=window,
+                uuids=uuids
+            )
+            for agg in aggs
+        ]
+
+        request = pymortar.FetchRequest(
+            sites=sites,
+            dataFrames=data_views_meter,
+            time=time_params
+        )
+
+        response = pymortar_client.fetch(request)
+        return {agg: response[names[agg]] for agg in aggs}, map_uuid_sitename
+
+    # Define the view of meters (metadata)
+    meter = pymortar.View(
+        name="view_meter",
+        sites=sites,
+        definition=query_meter
+    )
+
+    # Define the meter timeseries streams
+    data_views_meter = [
+        pymortar.DataFrame(
+            name=names[agg],  # dataframe column name
+            aggregation=pymortar_objects[agg],
+            window=window,
+            timeseries=[
+                pymortar.Timeseries(
+                    view="view_meter",
+                    dataVars=["?meter"]
+                )
+            ]
+        )
+        for agg in aggs
+    ]
+
+    # Form the full request object
+    request = pymortar.FetchRequest(
+        sites=sites,
+        views=[meter],
+        dataFrames=data_views_meter,
+        time=time_params
+    )
+
+    # Fetch data from request
+    response = pymortar_client.fetch(request)
+
+    # resp_meter = (url, uuid, sitename)
+    resp_meter = response.query('select * from view_meter')
+
+    # Map's uuid's to the site names
+    map_uuid_sitename = defaultdict(list)
+    for (url, uuid, sitename) in resp_meter:
+        map_uuid_sitename[uuid].append(sitename)
+
+    return {agg: response[names[agg]] for agg in aggs}, map_uuid_sitename
+
+
+def get_meter_data(pymortar_client, pymortar_objects, site, start, end,
+                   point_type="Green_Button_Meter", agg='MEAN', window='15m', cache=None, metadata=None):
+    """ Get meter data from the local cache, fetching the days that are not cached yet from pymortar.
+
+    Parameters
+    ----------
+    pymortar_client     : pymortar.Client({})
+        Pymortar Client Object.
+    pymortar_objects    : dict
+        Dictionary that maps aggregation values to corresponding pymortar objects.
+    site                : str
+        Building name.
+    start               : str
+        Start date - 'YYYY-MM-DDTHH:MM:SSZ'
+    end                 : str
+        End date - 'YYYY-MM-DDTHH:MM:SSZ'
+    point_type          : str
+        Type of data, i.e. Green_Button_Meter, Building_Electric_Meter...
+    agg                 : str
+        Values include MEAN, MAX, MIN, COUNT, SUM, RAW (the temporal window parameter is ignored)
+    window              : str
+        Size of the moving window.
+    cache               : TimeSeriesCache
+        On-disk cache of meter data. If None, always fetch from pymortar.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's.
+
+    Returns
+    -------
+    pd.DataFrame(), defaultdict(list)
+        Meter data, dictionary that maps meter data's columns (uuid's) to sitenames.
+
+    """
+
+    if cache is None or agg not in pymortar_objects:
+        return fetch_meter_data(pymortar_client, pymortar_objects, site, start, end,
+                                point_type=point_type, agg=agg, window=window, metadata=metadata)
+
+    # MEAN over the base window is computed from (and stores) the base SUM and COUNT
+    if is_base_mean(cache, start, end, agg, window):
+        df = get_base_mean_multiple(pymortar_client, pymortar_objects, [site], start, end, point_type=point_type,
+                                    cache=cache, metadata=metadata)[site]
+        map_uuid_sitename = defaultdict(list)
+        for uuid in df.columns:
+            map_uuid_sitename[uuid].append(site)
+        return df, map_uuid_sitename
+
+    # Coarser windows are computed from the cached base window aggregates instead of being fetched
+    if can_reaggregate_cached(cache, [site], start, end, point_type, agg, window):
+        frames = {}
+        for base_agg in BASE_AGGREGATES[agg]:
+            frames[base_agg], map_uuid_sitename = get_meter_data(pymortar_client, pymortar_objects, site, start,
+                                                                 end, point_type=point_type, agg=base_agg,
+                                                                 window=BASE_WINDOW, cache=cache, metadata=metadata)
+        return reaggregate(frames, agg, start, end, window), map_uuid_sitename
+
+    def fetch_func(fetch_start, fetch_end):
+        df, _ = fetch_meter_data(pymortar_client, pymortar_objects, site, fetch_start, fetch_end,
+                                 point_type=point_type, agg=agg, window=window, metadata=metadata)
+        return df
+
+    key = get_cache_key(site, point_type, agg, window)
+    df = cache.fetch(key, start, end, agg, window, fetch_func)
+
+    # Only one site is requested, so all the columns (uuid's) belong to it
+    map_uuid_sitename = defaultdict(list)
+    for uuid in df.columns:
+        map_uuid_sitename[uuid].append(site)
+
+    return df, map_uuid_sitename
+
+
+def split_by_site(df, map_uuid_sitename, sites):
+    """ Split meter data of several sites into one dataframe per site.
+
+    Parameters
+    ----------
+    df                  : pd.DataFrame()
+        Meter data, one column per uuid.
+    map_uuid_sitename   : dict
+        Maps meter data's columns (uuid's) to sitenames.
+    sites               : list(str)
+        Building names.
+
+    Returns
+    -------
+    dict
+        Maps each site to the dataframe of its columns.
+
+    """
+
+    columns = {site: [] for site in sites}
+    for uuid in df.columns:
+        for site in map_uuid_sitename.get(uuid, []):
+            if site in columns:
+                columns[site].append(uuid)
+    return {site: df[uuids] for site, uuids in columns.items()}
+
+
+def get_meter_data_multiple(pymortar_client, pymortar_objects, sites, start, end,
+                            point_type="Green_Button_Meter", agg='MEAN', window='15m', cache=None, metadata=None):
+    """ Get meter data of several sites from the local cache, fetching the days that are not cached yet from
+    pymortar with a single request for all the sites.
+
+    Parameters
+    ----------
+    pymortar_client     : pymortar.Client({})
+        Pymortar Client Object.
+    pymortar_objects    : dict
+        Dictionary that maps aggregation values to corresponding pymortar objects.
+    sites               : list(str)
+        Building names.
+    start               : str
+        Start date - 'YYYY-MM-DDTHH:MM:SSZ'
+    end                 : str
+        End date - 'YYYY-MM-DDTHH:MM:SSZ'
+    point_type          : str
+        Type of data, i.e. Green_Button_Meter, Building_Electric_Meter...
+    agg                 : str
+        Values include MEAN, MAX, MIN, COUNT, SUM, RAW (the temporal window parameter is ignored)
+    window              : str
+        Size of the moving window.
+    cache               : TimeSeriesCache
+        On-disk cache of meter data. If None, always fetch from pymortar.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's.
+
+    Returns
+    -------
+    dict
+        Maps each site to its meter data (one column per uuid).
+
+    """
+
+    def fetch_sites(fetch_sites, fetch_start, fetch_end):
+        df, map_uuid_sitename = fetch_meter_data_multiple(pymortar_client, pymortar_objects, fetch_sites,
+                                                          fetch_start, fetch_end, point_type=point_type, agg=agg,
+                                                          window=window, metadata=metadata)
+        return split_by_site(df, map_uuid_sitename, fetch_sites)
+
+    if cache is None or agg not in pymortar_objects:
+        return fetch_sites(sites, start, end)
+
+    # MEAN over the base window is computed from (and stores) the base SUM and COUNT
+    if is_base_mean(cache, start, end, agg, window):
+        return get_base_mean_multiple(pymortar_client, pymortar_objects, sites, start, end, point_type=point_type,
+                                      cache=cache, metadata=metadata)
+
+    # Coarser windows are computed from the cached base window aggregates instead of being fetched
+    if can_reaggregate_cached(cache, sites, start, end, point_type, agg, window):
+        base = {base_agg: get_meter_data_multiple(pymortar_client, pymortar_objects, sites, start, end,
+                                                  point_type=point_type, agg=base_agg, window=BASE_WINDOW,
+                                                  cache=cache, metadata=metadata)
+                for base_agg in BASE_AGGREGATES[agg]}
+        return {site: reaggregate({base_agg: frames[site] for base_agg, frames in base.items()}, agg, start, end,
+                                  window)
+                for site in sites}
+
+    keys = {get_cache_key(site, point_type, agg, window): site for site in sites}
+
+    def fetch_func(fetch_keys, fetch_start, fetch_end):
+        frames = fetch_sites([keys[key] for key in fetch_keys], fetch_start, fetch_end)
+        return {key: frames[keys[key]] for key in fetch_keys}
+
+    frames = cache.fetch_many(list(keys), start, end, agg, window, fetch_func)
+    return {site: frames[key] for key, site in keys.items()}
+
+
+def combine_power_columns(df):
+    """ Combine the meter columns of a site into a single 'power' column.
+
+    Parameters
+    ----------
+    df      : pd.DataFrame()
+        Meter data of a site, one column per uuid.
+
+    Returns
+    -------
+    pd.DataFrame()
+        Meter data with a single 'power' column.
+
+    """
+
+    if df.empty:
+        return df.reindex(columns=['power'])
+
+    if len(df.columns) == 2:
+        df[df.columns[0]] = df[df.columns[0]] + df[df.columns[1]]
+        df = df.drop(columns=[df.columns[1]])
+
+    df.columns = ['power']
+
+    return df
+
+
+def get_power_data(request, pymortar_client, pymortar_objects, start=None, end=None, cache=None, metadata=None):
+    """ Get historical meter data using pymortar and combine it into a single power column.
+
+    Parameters
+    ----------
+    request                 : gRPC request
+        Contains parameters to fetch data.
+    pymortar_client     : pymortar.Client({})
+        Pymortar Client Object.
+    pymortar_objects    : dict
+        Dictionary that maps aggregation values to corresponding pymortar objects.
+    start               : int
+        Start time in unix nanoseconds. Defaults to request.start.
+    end                 : int
+        End time in unix nanoseconds. Defaults to request.end.
+    cache               : TimeSeriesCache
+        On-disk cache of meter data.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's.
+
+    Returns
+    -------
+    pd.DataFrame(), str
+        Meter data with a single 'power' column; Error Message
+
+    """
+
+    start = request.start if start is None else start
+    end = request.end if end is None else end
+
+    start_time = datetime.utcfromtimestamp(float(start / 1e9)).replace(tzinfo=pytz.utc)
+    end_time = datetime.utcfromtimestamp(float(end / 1e9)).replace(tzinfo=pytz.utc)
+
+    try:
+        df, map_uuid_meter = get_meter_data(pymortar_client=pymortar_client,
+                                            pymortar_objects=pymortar_objects,
+                                            site=request.building,
+                                            point_type=request.point_type,
+                                            start=start_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                                            end=end_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                                            agg=request.aggregate,
+                                            window=request.window,
+                                            cache=cache,
+                                            metadata=metadata)
+    except Exception as e:
+        return None, e
+
+    return combine_power_columns(df), None
+
+
+def get_historical_data(request, pymortar_client, pymortar_objects, cache=None, metadata=None):
+    """ Get historical meter data using pymortar and create gRPC repsonse object.
+
+    Parameters
+    ----------
+    request                 : gRPC request
+        Contains parameters to fetch data.
+    pymortar_client     : pymortar.Client({})
+        Pymortar Client Object.
+    pymortar_objects    : dict
+        Dictionary that maps aggregation values to corresponding pymortar objects.
+    cache               : TimeSeriesCache
+        On-disk cache of meter data.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's.
+
+    Returns
+    -------
+    gRPC response, str
+        List of points containing the datetime and power consumption; Error Message
+
+    """
+
+    df, error = get_power_data(request, pymortar_client, pymortar_objects, cache=cache, metadata=metadata)
+    if error:
+        return None, error
+
+    result = []
+    for index, row in df.iterrows():
+        point = meter_data_historical_pb2.MeterDataPoint(time=int(index.timestamp()*1e9), power=row['power'])
+        result.append(point)
+
+    return meter_data_historical_pb2.Reply(point=result), None
+
+
+def create_columnar_reply(df):
+    """ Create columnar gRPC response object from a dataframe with a 'power' column.
+
+    Note
+    ----
+    The packed repeated fields are filled straight from the dataframe's numpy arrays, which avoids creating one
+    MeterDataPoint message per row. If the timestamps are evenly spaced (the usual case for aggregated data), only
+    the first timestamp and the spacing are sent instead of the full time column.
+
+    Parameters
+    ----------
+    df      : pd.DataFrame()
+        Meter data with a single 'power' column and a datetime index.
+
+    Returns
+    -------
+    gRPC response
+        Columns of datetimes (unix nanoseconds) and power consumption.
+
+    """
+
+    # Datetime64 values are in UTC, irrespective of the index's timezone
+    times = df.index.values.astype('datetime64[ns]').astype(np.int64)
+    reply = meter_data_historical_pb2.ColumnarReply()
+
+    deltas = np.diff(times)
+    if len(times) > 1 and (deltas == deltas[0]).all():
+        reply.start = int(times[0])
+        reply.interval = int(deltas[0])
+    else:
+        reply.time.extend(times.tolist())
+
+    reply.power.extend(df['power'].values.astype(np.float64).tolist())
+    return reply
+
+
+def get_historical_data_columnar(request, pymortar_client, pymortar_objects, cache=None, metadata=None):
+    """ Get historical meter data using pymortar and create columnar gRPC response object.
+
+    Parameters
+    ----------
+    request                 : gRPC request
+        Contains parameters to fetch data.
+    pymortar_client     : pymortar.Client({})
+        Pymortar Client Object.
+    pymortar_objects    : dict
+        Dictionary that maps aggregation values to corresponding pymortar objects.
+    cache               : TimeSeriesCache
+        On-disk cache of meter data.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's.
+
+    Returns
+    -------
+    gRPC response, str
+        Columns of datetimes and power consumption; Error Message
+
+    """
+
+    df, error = get_power_data(request, pymortar_client, pymortar_objects, cache=cache, metadata=metadata)
+    if error:
+        return None, error
+
+    return create_columnar_reply(df), None
+
+
+def get_historical_data_multiple(request, pymortar_client, pymortar_objects, cache=None, metadata=None):
+    """ Get historical meter data of several buildings using a single pymortar request and create gRPC
+    response object.
+
+    Parameters
+    ----------
+    request                 : gRPC request
+        Contains parameters to fetch data.
+    pymortar_client     : pymortar.Client({})
+        Pymortar Client Object.
+    pymortar_objects    : dict
+        Dictionary that maps aggregation values to corresponding pymortar objects.
+    cache               : TimeSeriesCache
+        On-disk cache of meter data.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's.
 
     Returns
     -------
-    pd.DataFrame(), defaultdict(list)
-        Meter data, dictionary that maps meter data's columns (uuid's) to sitenames.
+    gRPC response, str
+        Columns of datetimes and power consumption of each building; Error Message
 
     """
 
-    agg = pymortar_objects.get(agg, 'ERROR')
+    start_time = datetime.utcfromtimestamp(float(request.start / 1e9)).replace(tzinfo=pytz.utc)
+    end_time = datetime.utcfromtimestamp(float(request.end / 1e9)).replace(tzinfo=pytz.utc)
 
-    if agg == 'ERROR':
-        raise ValueError('Invalid aggregate type; should be string and in caps; values include: ' +
-                         pymortar_objects.keys())
+    try:
+        frames = get_meter_data_multiple(pymortar_client=pymortar_client,
+                                         pymortar_objects=pymortar_objects,
+                                         sites=list(dict.fromkeys(request.buildings)),
+                                         point_type=request.point_type,
+                                         start=start_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                                         end=end_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                                         agg=request.aggregate,
+                                         window=request.window,
+                                         cache=cache,
+                                         metadata=metadata)
+    except Exception as e:
+        return None, e
 
-    query_meter = "SELECT ?meter WHERE { ?meter rdf:type brick:" + point_type + " };"
+    # A building whose data can't be combined gets an error, the others are still returned
+    result = []
+    for building in request.buildings:
+        try:
+            df = combine_power_columns(frames[building].copy())
+            result.append(meter_data_historical_pb2.BuildingReply(building=building,
+                                                                  data=create_columnar_reply(df)))
+        except Exception as e:
+            result.append(meter_data_historical_pb2.BuildingReply(building=building, error=str(e)))
 
-    # Define the view of meters (metadata)
-    meter = pymortar.View(
-        name="view_meter",
-        sites=[site],
-        definition=query_meter
-    )
+    return meter_data_historical_pb2.MultipleReply(building=result), None
 
-    # Define the meter timeseries stream
-    data_view_meter = pymortar.DataFrame(
-        name="data_meter",  # dataframe column name
-        aggregation=agg,
-        window=window,
-        timeseries=[
-            pymortar.Timeseries(
-                view="view_meter",
-                dataVars=["?meter"]
-            )
-        ]
-    )
 
-    # Define timeframe
-    time_params = pymortar.TimeParams(
-        start=start,
-        end=end
-    )
+def get_chunks(request):
+    """ Split the [start, end) range of the request into consecutive time chunks.
 
-    # Form the full request object
-    request = pymortar.FetchRequest(
-        sites=[site],
-        views=[meter],
-        dataFrames=[data_view_meter],
-        time=time_params
-    )
+    Note
+    ----
+    For aggregated data, the chunk duration is rounded down to a multiple of the window so that
+    the aggregation buckets are the same as when fetching the whole range at once.
 
-    # Fetch data from request
-    response = pymortar_client.fetch(request)
+    Parameters
+    ----------
+    request                 : gRPC request
+        Contains parameters to fetch data.
 
-    # resp_meter = (url, uuid, sitename)
-    resp_meter = response.query('select * from view_meter')
+    Returns
+    -------
+    list(tuple(int, int))
+        List of (start, end) in unix nanoseconds.
 
-    # Map's uuid's to the site names
-    map_uuid_sitename = defaultdict(list)
-    for (url, uuid, sitename) in resp_meter:
-        map_uuid_sitename[uuid].append(sitename)
+    """
 
-    return response['data_meter'], map_uuid_sitename
+    chunk = request.chunk if request.chunk > 0 else _DEFAULT_CHUNK_NS
 
+    if request.aggregate != 'RAW':
+        window = pd.Timedelta(request.window).value
+        if window > 0:
+            chunk = max(window, chunk - chunk % window)
 
-def get_historical_data(request, pymortar_client, pymortar_objects):
-    """ Get historical meter data using pymortar and create gRPC repsonse object.
+    return [(start, min(start + chunk, request.end)) for start in range(request.start, request.end, chunk)]
+
+
+def stream_historical_data(request, pymortar_client, pymortar_objects, cache=None, metadata=None):
+    """ Get historical meter data using pymortar, chunk by chunk, and create columnar gRPC response objects.
+
+    Note
+    ----
+    Only one chunk is held in memory at a time.
 
     Parameters
     ----------
@@ -119,41 +839,122 @@ def get_historical_data(request, pymortar_client, pymortar_objects):
         Pymortar Client Object.
     pymortar_objects    : dict
         Dictionary that maps aggregation values to corresponding pymortar objects.
+    cache               : TimeSeriesCache
+        On-disk cache of meter data.
+    metadata            : MetadataCache
+        Cache of the sites' meter uuid's.
+
+    Yields
+    ------
+    gRPC response, str
+        Columns of datetimes and power consumption of one chunk; Error Message
+
+    """
+
+    for start, end in get_chunks(request):
+        df, error = get_power_data(request, pymortar_client, pymortar_objects, start=start, end=end,
+                                   cache=cache, metadata=metadata)
+        if error:
+            yield None, error
+            return
+        if not df.empty:
+            yield create_columnar_reply(df), None
+
+
+def get_reply_key(method, request):
+    """ Canonical form of a request, to cache its reply.
+
+    Parameters
+    ----------
+    method      : str
+        RPC name.
+    request     : gRPC request
+        Contains parameters to fetch data.
 
     Returns
     -------
-    gRPC response, str
-        List of points containing the datetime and power consumption; Error Message
+    tuple
+        Key of the reply.
 
     """
 
-    start_time = datetime.utcfromtimestamp(float(request.start / 1e9)).replace(tzinfo=pytz.utc)
-    end_time = datetime.utcfromtimestamp(float(request.end / 1e9)).replace(tzinfo=pytz.utc)
+    return (method, request.building, request.start, request.end, request.point_type, request.aggregate,
+            get_window_key(request.aggregate, request.window))
 
-    try:
-        df, map_uuid_meter = get_meter_data(pymortar_client=pymortar_client,
-                                            pymortar_objects=pymortar_objects,
-                                            site=request.building,
-                                            point_type=request.point_type,
-                                            start=start_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                                            end=end_time.strftime('%Y-%m-%dT%H:%M:%SZ'),
-                                            agg=request.aggregate,
-                                            window=request.window)
-    except Exception as e:
-        return None, e
 
-    if len(df.columns) == 2:
-        df[df.columns[0]] = df[df.columns[0]] + df[df.columns[1]]
-        df = df.drop(columns=[df.columns[1]])
+def get_reply_ttl(request, safety_margin, live_ttl=LIVE_REPLY_TTL_SECONDS):
+    """ Number of seconds the reply of a request stays valid.
 
-    df.columns = ['power']
+    Note
+    ----
+    Closed historical ranges don't change (data is final once it's older than safety_margin, as for the data
+    cache), so their replies are kept until evicted; replies of ranges touching now expire after live_ttl.
 
-    result = []
-    for index, row in df.iterrows():
-        point = meter_data_historical_pb2.MeterDataPoint(time=int(index.timestamp()*1e9), power=row['power'])
-        result.append(point)
+    Parameters
+    ----------
+    request         : gRPC request
+        Contains parameters to fetch data.
+    safety_margin   : pd.Timedelta
+        Age after which data is final.
+    live_ttl        : float
+        Number of seconds replies of recent ranges are valid.
 
-    return meter_data_historical_pb2.Reply(point=result), None
+    Returns
+    -------
+    float
+        Number of seconds; None if the reply is valid indefinitely.
+
+    """
+
+    if request.end <= (pd.Timestamp.now(tz='UTC') - safety_margin).value:
+        return None
+    return live_ttl
+
+
+def serialize_reply(reply):
+    """ Response serializer that sends pre-serialized replies (bytes) as they are. """
+    return reply if isinstance(reply, bytes) else reply.SerializeToString()
+
+
+def add_servicer_to_server(servicer, server):
+    """ Same as meter_data_historical_pb2_grpc.add_MeterDataHistoricalServicer_to_server(), but the handlers can
+    return pre-serialized replies (see serialize_reply). """
+
+    rpc_method_handlers = {
+        'GetMeterDataHistorical': grpc.unary_unary_rpc_method_handler(
+            servicer.GetMeterDataHistorical,
+            request_deserializer=meter_data_historical_pb2.Request.FromString,
+            response_serializer=serialize_reply,
+        ),
+        'GetMeterDataHistoricalColumnar': grpc.unary_unary_rpc_method_handler(
+            servicer.GetMeterDataHistoricalColumnar,
+            request_deserializer=meter_data_historical_pb2.Request.FromString,
+            response_serializer=serialize_reply,
+        ),
+        'StreamMeterDataHistorical': grpc.unary_stream_rpc_method_handler(
+            servicer.StreamMeterDataHistorical,
+            request_deserializer=meter_data_historical_pb2.Request.FromString,
+            response_serializer=serialize_reply,
+        ),
+        'GetMeterDataHistoricalMultiple': grpc.unary_unary_rpc_method_handler(
+            servicer.GetMeterDataHistoricalMultiple,
+            request_deserializer=meter_data_historical_pb2.MultipleRequest.FromString,
+            response_serializer=serialize_reply,
+        ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler('meter_data_historical.MeterDataHistorical',
+                                                           rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+
+
+def is_valid_window(agg, window):
+    """ Check if the window of an aggregated request is a positive duration; the window of RAW data is unused. """
+    if agg == 'RAW':
+        return True
+    try:
+        return pd.Timedelta(window) > pd.Timedelta(0)
+    except (ValueError, TypeError):
+        return False
 
 
 def get_parameters(request, supported_buildings):
@@ -187,7 +988,10 @@ def get_parameters(request, supported_buildings):
         return "invalid request, start date is equal or after end date."
 
     if request.building not in supported_buildings:
-        return "invalid request, building not found; supported buildings: " + str(self.supported_buildings)
+        return "invalid request, building not found; supported buildings: " + str(supported_buildings)
+
+    if not is_valid_window(request.aggregate, request.window):
+        return "invalid request, window is not a positive duration, e.g. 15m, 1h"
 
     return None
 
@@ -199,6 +1003,44 @@ def get_parameters(request, supported_buildings):
     #     return None, "invalid request, start date + window is greater than end date"
 
 
+def get_multiple_parameters(request, supported_buildings):
+    """ Storing and error checking request parameters of several buildings.
+
+    Parameters
+    ----------
+    request                 : gRPC request
+        Contains parameters to fetch data.
+    supported_buildings     : list(str)
+        List of buildings available.
+
+    Returns
+    -------
+    str
+        Error message. If no error message, then return None.
+
+    """
+
+    if not request.buildings or any(not elem for elem in [request.start, request.end, request.aggregate,
+                                                          request.window, request.point_type]):
+        return "invalid request, empty param(s)"
+
+    if request.start > int(time.time() * 1e9) or request.end > int(time.time() * 1e9):
+        return "invalid request, start/end date is in the future"
+
+    if request.start >= request.end:
+        return "invalid request, start date is equal or after end date."
+
+    unknown = [building for building in request.buildings if building not in supported_buildings]
+    if unknown:
+        return "invalid request, building(s) not found: " + str(unknown) + "; supported buildings: " + \
+               str(supported_buildings)
+
+    if not is_valid_window(request.aggregate, request.window):
+        return "invalid request, window is not a positive duration, e.g. 15m, 1h"
+
+    return None
+
+
 class MeterDataHistoricalServicer(meter_data_historical_pb2_grpc.MeterDataHistoricalServicer):
 
     def __init__(self):
@@ -233,6 +1075,47 @@ class MeterDataHistoricalServicer(meter_data_historical_pb2_grpc.MeterDataHistor
             'RAW': pymortar.RAW
         }
 
+        # On-disk cache of historical meter data, partitioned by day
+        self.cache = TimeSeriesCache(CACHE_FOLDER)
+
+        # Meter uuid's of each site, resolved once instead of on every fetch
+        self.metadata = MetadataCache(self.pymortar_client, ttl=METADATA_TTL)
+
+        # Serialized replies of recent requests, repeated requests skip the fetch and the protobuf creation
+        self.reply_cache = ReplyCache(max_entries=REPLY_CACHE_ENTRIES, max_bytes=REPLY_CACHE_BYTES)
+
+    def get_serialized_reply(self, method, request, get_reply):
+        """ Get the serialized reply of a request from the reply cache, creating and caching it if needed.
+
+        Parameters
+        ----------
+        method      : str
+            RPC name.
+        request     : gRPC request
+            Contains parameters to fetch data.
+        get_reply   : function
+            Returns the gRPC response and error message of the request.
+
+        Returns
+        -------
+        bytes, str
+            Serialized reply; Error Message
+
+        """
+
+        key = get_reply_key(method, request)
+        data = self.reply_cache.get(key)
+        if data is not None:
+            return data, None
+
+        result, error = get_reply()
+        if error:
+            return None, error
+
+        data = result.SerializeToString()
+        self.reply_cache.put(key, data, ttl=get_reply_ttl(request, self.cache.safety_margin))
+        return data, None
+
     def GetMeterDataHistorical(self, request, context):
         """ RPC.
 
@@ -246,7 +1129,7 @@ class MeterDataHistoricalServicer(meter_data_historical_pb2_grpc.MeterDataHistor
         Returns
         -------
         gRPC response
-            List of points containing the datetime and power consumption.
+            List of points containing the datetime and power consumption (serialized, see serialize_reply).
 
         """
 
@@ -257,17 +1140,213 @@ class MeterDataHistoricalServicer(meter_data_historical_pb2_grpc.MeterDataHistor
             context.set_details(error)
             return meter_data_historical_pb2.Reply()
         else:
-            result, error = get_historical_data(request, self.pymortar_client, self.pymortar_objects)
+            result, error = self.get_serialized_reply(
+                'GetMeterDataHistorical', request,
+                lambda: get_historical_data(request, self.pymortar_client, self.pymortar_objects,
+                                            cache=self.cache, metadata=self.metadata))
             if error:
                 context.set_code(grpc.StatusCode.UNAVAILABLE)
-                context.set_details(error)
+                context.set_details(str(error))
                 return meter_data_historical_pb2.Reply()
         return result
 
+    def GetMeterDataHistoricalColumnar(self, request, context):
+        """ RPC.
+
+        Parameters
+        ----------
+        request     : gRPC request
+            Contains parameters to fetch data.
+        context     : ???
+            ???
+
+        Returns
+        -------
+        gRPC response
+            Columns of datetimes and power consumption.
+
+        """
+
+        error = get_parameters(request, self.supported_buildings)
+        if error:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return meter_data_historical_pb2.ColumnarReply()
+        else:
+            result, error = self.get_serialized_reply(
+                'GetMeterDataHistoricalColumnar', request,
+                lambda: get_historical_data_columnar(request, self.pymortar_client, self.pymortar_objects,
+                                                     cache=self.cache, metadata=self.metadata))
+            if error:
+                context.set_code(grpc.StatusCode.UNAVAILABLE)
+                context.set_details(str(error))
+                return meter_data_historical_pb2.ColumnarReply()
+        return result
+
+    def StreamMeterDataHistorical(self, request, context):
+        """ RPC.
+
+        Parameters
+        ----------
+        request     : gRPC request
+            Contains parameters to fetch data.
+        context     : ???
+            ???
+
+        Yields
+        ------
+        gRPC response
+            Columns of datetimes and power consumption, one message per time chunk.
+
+        """
+
+        error = get_parameters(request, self.supported_buildings)
+        if error:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return
+
+        for result, error in stream_historical_data(request, self.pymortar_client, self.pymortar_objects,
+                                                    cache=self.cache, metadata=self.metadata):
+            if error:
+                context.set_code(grpc.StatusCode.UNAVAILABLE)
+                context.set_details(str(error))
+                return
+            yield result
+
+    def GetMeterDataHistoricalMultiple(self, request, context):
+        """ RPC.
+
+        Parameters
+        ----------
+        request     : gRPC request
+            Contains parameters to fetch data.
+        context     : ???
+            ???
+
+        Returns
+        -------
+        gRPC response
+            Columns of datetimes and power consumption of each building.
+
+        """
+
+        error = get_multiple_parameters(request, self.supported_buildings)
+        if error:
+            context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
+            context.set_details(error)
+            return meter_data_historical_pb2.MultipleReply()
+        else:
+            result, error = get_historical_data_multiple(request, self.pymortar_client, self.pymortar_objects,
+                                                         cache=self.cache, metadata=self.metadata)
+            if error:
+                context.set_code(grpc.StatusCode.UNAVAILABLE)
+                context.set_details(str(error))
+                return meter_data_historical_pb2.MultipleReply()
+        return result
+
+
+class _ContextRecorder:
+
+    def __init__(self):
+        """ Stand-in for the gRPC context of the synchronous handlers run on the executor.
+
+        Note
+        ----
+        The status they set is recorded and applied to the real context on the event loop's thread.
+
+        """
+
+        self.code = None
+        self.details = None
+
+    def set_code(self, code):
+        self.code = code
+
+    def set_details(self, details):
+        self.details = details
+
+    def apply(self, context):
+        if self.code is not None:
+            context.set_code(self.code)
+        if self.details is not None:
+            context.set_details(self.details)
+
+
+class AsyncMeterDataHistoricalServicer(meter_data_historical_pb2_grpc.MeterDataHistoricalServicer):
+
+    def __init__(self, servicer=None, max_workers=AIO_EXECUTOR_WORKERS):
+        """ Constructor.
+
+        Note
+        ----
+        grpc.aio version of MeterDataHistoricalServicer: the same handlers run on a bounded thread pool, so a
+        request waiting for its turn or for pymortar costs a coroutine instead of a server thread.
+
+        Parameters
+        ----------
+        servicer    : MeterDataHistoricalServicer
+            Synchronous servicer whose handlers are run. Created if None.
+        max_workers : int
+            Number of threads running the blocking fetches and dataframe conversions.
+
+        """
+
+        self.servicer = servicer if servicer is not None else MeterDataHistoricalServicer()
+        self.executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+
+    async def run_in_executor(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def run_unary(self, handler, request, context):
+        """ Run a unary handler of the synchronous servicer on the executor. """
+        recorder = _ContextRecorder()
+        result = await self.run_in_executor(handler, request, recorder)
+        recorder.apply(context)
+        return result
+
+    async def GetMeterDataHistorical(self, request, context):
+        """ RPC, see MeterDataHistoricalServicer.GetMeterDataHistorical(). """
+        return await self.run_unary(self.servicer.GetMeterDataHistorical, request, context)
+
+    async def GetMeterDataHistoricalColumnar(self, request, context):
+        """ RPC, see MeterDataHistoricalServicer.GetMeterDataHistoricalColumnar(). """
+        return await self.run_unary(self.servicer.GetMeterDataHistoricalColumnar, request, context)
+
+    async def GetMeterDataHistoricalMultiple(self, request, context):
+        """ RPC, see MeterDataHistoricalServicer.GetMeterDataHistoricalMultiple(). """
+        return await self.run_unary(self.servicer.GetMeterDataHistoricalMultiple, request, context)
+
+    async def StreamMeterDataHistorical(self, request, context):
+        """ RPC, see MeterDataHistoricalServicer.StreamMeterDataHistorical().
+
+        Note
+        ----
+        Each chunk is fetched on the executor.
+
+        """
+
+        recorder = _ContextRecorder()
+        chunks = self.servicer.StreamMeterDataHistorical(request, recorder)
+        done = object()
+        try:
+            while True:
+                result = await self.run_in_executor(next, chunks, done)
+                if result is done:
+                    break
+                yield result
+        finally:
+            # Still running on the executor if the RPC was cancelled during a fetch
+            try:
+                chunks.close()
+            except ValueError:
+                pass
+        recorder.apply(context)
+
 
 def serve():
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    meter_data_historical_pb2_grpc.add_MeterDataHistoricalServicer_to_server(MeterDataHistoricalServicer(), server)
+    add_servicer_to_server(MeterDataHistoricalServicer(), server)
     server.add_insecure_port(METER_DATA_HOST_ADDRESS)
     server.start()
     try:
@@ -277,5 +1356,17 @@ def serve():
         server.stop(0)
 
 
+async def serve_aio(max_workers=AIO_EXECUTOR_WORKERS):
+    server = grpc.aio.server()
+    add_servicer_to_server(AsyncMeterDataHistoricalServicer(max_workers=max_workers), server)
+    server.add_insecure_port(METER_DATA_HOST_ADDRESS)
+    await server.start()
+    await server.wait_for_termination()
+
+
 if __name__ == '__main__':
-    serve()
+    # python server.py --aio to run the asyncio server
+    if '--aio' in sys.argv:
+        asyncio.run(serve_aio())
+    else:
+        serve()
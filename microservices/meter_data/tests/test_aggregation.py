@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from aggregation import BASE_AGGREGATES, can_reaggregate, reaggregate
+
+START = pd.Timestamp('2018-06-01', tz='UTC')
+END = pd.Timestamp('2018-06-03', tz='UTC')
+
+
+def _make_raw(seed=0):
+    # Irregular readings of two meters, with gaps and missing values
+    rng = np.random.RandomState(seed)
+    index = pd.DatetimeIndex(np.sort(rng.randint(START.value, END.value, size=3000))).tz_localize('UTC')
+    raw = pd.DataFrame(rng.normal(100, 20, size=(len(index), 2)), index=index, columns=['uuid-1', 'uuid-2'])
+    raw.iloc[rng.rand(len(raw)) < 0.1, 1] = np.nan
+    gap = (raw.index >= '2018-06-01 10:00') & (raw.index < '2018-06-01 13:00')
+    return raw[~gap]
+
+
+def _aggregate(raw, agg, window):
+    # What upstream returns: one row per window with readings
+    resampled = raw.resample(window)
+    df = {'MEAN': resampled.mean, 'SUM': resampled.sum, 'COUNT': resampled.count,
+          'MIN': resampled.min, 'MAX': resampled.max}[agg]()
+    count = resampled.count()
+    df = df.where(count > 0)
+    return df[(count > 0).any(axis=1)]
+
+
+@pytest.mark.parametrize('agg', sorted(BASE_AGGREGATES))
+@pytest.mark.parametrize('window', ['1h', '4h', '24h'])
+def test_reaggregate_matches_direct_aggregate(agg, window):
+    raw = _make_raw()
+    frames = {base_agg: _aggregate(raw, base_agg, '15min') for base_agg in BASE_AGGREGATES[agg]}
+
+    result = reaggregate(frames, agg, START, END, window)
+    expected = _aggregate(raw, agg, window)
+
+    assert list(result.index) == list(expected.index)
+    np.testing.assert_allclose(result.values, expected.values.astype(float), rtol=1e-10)
+
+
+def test_reaggregate_only_keeps_range():
+    raw = _make_raw()
+    frames = {'MAX': _aggregate(raw, 'MAX', '15min')}
+    result = reaggregate(frames, 'MAX', '2018-06-01T12:00:00Z', '2018-06-02T00:00:00Z', '1h')
+    # 12:00 is in the gap
+    assert result.index[0] == pd.Timestamp('2018-06-01 13:00', tz='UTC')
+    assert result.index[-1] == pd.Timestamp('2018-06-01 23:00', tz='UTC')
+
+
+def test_reaggregate_empty():
+    frames = {'SUM': pd.DataFrame(columns=['uuid-1'], index=pd.DatetimeIndex([], tz='UTC'), dtype=float),
+              'COUNT': pd.DataFrame(columns=['uuid-1'], index=pd.DatetimeIndex([], tz='UTC'), dtype=float)}
+    assert reaggregate(frames, 'MEAN', START, END, '1h').empty
+
+
+@pytest.mark.parametrize('agg, window, start, expected', [
+    ('MEAN', '1h', '2018-06-01T00:00:00Z', True),
+    ('MAX', '24h', '2018-06-01T05:45:00Z', True),
+    ('MEAN', '1h', '2018-06-01T00:10:00Z', False),  # off the 15 min grid
+    ('MEAN', '15m', '2018-06-01T00:00:00Z', False),  # base window itself
+    ('MEAN', '20m', '2018-06-01T00:00:00Z', False),  # not a multiple of the base window
+    ('RAW', '1h', '2018-06-01T00:00:00Z', False),
+    ('MEAN', 'bad', '2018-06-01T00:00:00Z', False),
+    ('SUM', '1h', '2018-06-01T00:00:00', True),  # naive times are UTC
+])
+def test_can_reaggregate(agg, window, start, expected):
+    assert can_reaggregate(agg, window, start) == expected
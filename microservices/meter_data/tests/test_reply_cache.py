@@ -0,0 +1,78 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import reply_cache
+from reply_cache import ReplyCache
+
+
+def test_get_put():
+    cache = ReplyCache()
+    assert cache.get('a') is None
+    cache.put('a', b'reply')
+    assert cache.get('a') == b'reply'
+
+    # Replacing a reply updates its size
+    cache.put('a', b'longer reply')
+    assert cache.get('a') == b'longer reply'
+    assert cache._size == len(b'longer reply')
+
+
+def test_evicts_least_recently_used_entries():
+    cache = ReplyCache(max_entries=2)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    cache.get('a')
+    cache.put('c', b'3')
+
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1'
+    assert cache.get('c') == b'3'
+
+
+def test_evicts_by_size():
+    cache = ReplyCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'5678')
+    cache.put('c', b'90ab')
+
+    assert cache.get('a') is None
+    assert cache.get('b') == b'5678'
+    assert cache.get('c') == b'90ab'
+    assert cache._size == 8
+
+
+def test_oversized_reply_is_not_stored():
+    cache = ReplyCache(max_bytes=10)
+    cache.put('a', b'1234')
+    cache.put('b', b'x' * 11)
+
+    assert cache.get('b') is None
+    # Nothing was evicted for it
+    assert cache.get('a') == b'1234'
+
+
+def test_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(reply_cache.time, 'time', lambda: now[0])
+    cache = ReplyCache()
+    cache.put('live', b'1', ttl=60)
+    cache.put('historical', b'2')
+
+    now[0] += 59
+    assert cache.get('live') == b'1'
+    now[0] += 1
+    assert cache.get('live') is None
+    assert 'live' not in cache._entries
+    assert cache._size == 1
+
+    now[0] += 10 ** 6
+    assert cache.get('historical') == b'2'
+
+
+def test_clear():
+    cache = ReplyCache()
+    cache.put('a', b'1')
+    cache.clear()
+    assert cache.get('a') is None
+    assert cache._size == 0
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+import server
+from xbos_cache import TimeSeriesCache
+
+PYMORTAR_OBJECTS = {agg: agg for agg in ['MEAN', 'MAX', 'MIN', 'COUNT', 'SUM', 'RAW']}
+START = '2018-06-01T00:00:00Z'
+END = '2018-06-03T00:00:00Z'
+
+
+class _Response:
+
+    def __init__(self, frames, rows):
+        self.frames = frames
+        self.rows = rows
+
+    def __getitem__(self, name):
+        return self.frames[name]
+
+    def query(self, query):
+        return self.rows
+
+
+class _Client:
+    """ Upstream with one meter per site: SUM is 10 * COUNT, COUNT cycles through 0, 1 and 2 from midnight. """
+
+    def __init__(self):
+        self.requests = []
+
+    def fetch(self, request):
+        self.requests.append(request)
+        frames = {}
+        for data_frame in request.dataFrames:
+            index = pd.date_range(pd.Timestamp(request.time.start), pd.Timestamp(request.time.end),
+                                  freq=pd.Timedelta(data_frame.window))[:-1]
+            start = pd.Timestamp(request.time.start).normalize()
+            count = np.asarray((index - start) // pd.Timedelta('15min') % 3, dtype=float)
+            values = {'SUM': 10 * count, 'COUNT': count, 'MAX': count}[data_frame.aggregation]
+            frames[data_frame.name] = pd.DataFrame({'uuid-' + site: values for site in request.sites}, index=index)
+        return _Response(frames, [('url', 'uuid-' + site, site) for site in request.sites])
+
+
+def test_base_window_mean_stores_base_aggregates(tmpdir):
+    client = _Client()
+    cache = TimeSeriesCache(str(tmpdir))
+
+    frames = server.get_meter_data_multiple(client, PYMORTAR_OBJECTS, ['ciee', 'avenal'], START, END,
+                                            agg='MEAN', window='15m', cache=cache)
+
+    # SUM and COUNT of all the sites in a single request
+    assert len(client.requests) == 1
+    assert sorted(data_frame.aggregation for data_frame in client.requests[0].dataFrames) == ['COUNT', 'SUM']
+    for site in ['ciee', 'avenal']:
+        df = frames[site]
+        assert list(df.columns) == ['uuid-' + site]
+        assert len(df) == 192
+        values = df.iloc[:, 0].values
+        assert np.isnan(values[::3]).all()
+        assert (values[1::3] == 10).all() and (values[2::3] == 10).all()
+
+    # Coarser MEAN windows of the same days are re-aggregated without fetching
+    df, map_uuid_sitename = server.get_meter_data(client, PYMORTAR_OBJECTS, 'ciee', START, END, agg='MEAN',
+                                                  window='1h', cache=cache)
+    assert len(client.requests) == 1
+    assert dict(map_uuid_sitename) == {'uuid-ciee': ['ciee']}
+    assert len(df) == 48
+    assert (df['uuid-ciee'] == 10).all()
+
+    # Other aggregates are fetched as before
+    server.get_meter_data(client, PYMORTAR_OBJECTS, 'ciee', START, END, agg='MAX', window='1h', cache=cache)
+    assert len(client.requests) == 2
+    assert [data_frame.aggregation for data_frame in client.requests[1].dataFrames] == ['MAX']
@@ -0,0 +1,139 @@
+""" In-memory registry of the buildings' power consumption models. """
+
+import os
+import json
+import pickle
+import threading
+
+
+def rearrange_columns(model_info):
+    """ Helper function to return ordered list according to json file specifications.
+
+    Note
+    ----
+    1. This can be optimized and generalized to any json object.
+
+    Parameters
+    ----------
+    model_info  : dict
+        Json file data of the building's model.
+
+    Returns
+    -------
+    list(str)
+        List of columns in the correct order.
+
+    """
+
+    dic = model_info['features']
+    new_dic = {}
+
+    for key, value in dic.items():
+        if type(value) == dict:
+            if key == 'iat':
+                for key1, value1, in value.items():
+                    new_dic['iat-' + key1] = value1
+            else:
+                for key1, value1 in value.items():
+                    new_dic[key1] = value1
+        else:
+            new_dic[key] = value
+
+    return sorted(new_dic, key=new_dic.get)
+
+
+class Model:
+
+    def __init__(self, estimator, model_info, mtimes):
+        """ A loaded model of a building.
+
+        Parameters
+        ----------
+        estimator   : object
+            Unpickled model, i.e. anything with a predict() method.
+        model_info  : dict
+            Json file data of the model.
+        mtimes      : tuple(float, float)
+            Modification times of the .sav and .json files the model was loaded from.
+
+        """
+
+        self.estimator = estimator
+        self.model_info = model_info
+        self.mtimes = mtimes
+
+        # Precomputed once instead of on every prediction
+        self.columns = rearrange_columns(model_info)
+        self.time_features = list(model_info['features'].get('time_features', {}).keys())
+
+
+class ModelRegistry:
+
+    def __init__(self, model_folder):
+        """ Constructor.
+
+        Note
+        ----
+        Each building's estimator (<building>-model.sav) and specification (<building>-model.json) are loaded once
+        and kept in memory. When either file changes on disk the model is reloaded and swapped in atomically;
+        requests that are in flight keep using the model they started with.
+
+        Parameters
+        ----------
+        model_folder    : str
+            Folder containing the model files.
+
+        """
+
+        self.model_folder = model_folder
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _get_paths(self, building_name):
+        return (os.path.join(self.model_folder, building_name + '-model.sav'),
+                os.path.join(self.model_folder, building_name + '-model.json'))
+
+    def _load(self, building_name, mtimes):
+        model_path, info_path = self._get_paths(building_name)
+        with open(model_path, 'rb') as model_file:
+            estimator = pickle.load(model_file)
+        with open(info_path) as json_file:
+            model_info = json.load(json_file)
+        return Model(estimator, model_info, mtimes)
+
+    def get(self, building_name):
+        """ Get the model of a building, (re)loading it if it's not loaded yet or the files changed.
+
+        Parameters
+        ----------
+        building_name   : str
+            Building name.
+
+        Returns
+        -------
+        Model
+            Loaded model.
+
+        """
+
+        mtimes = tuple(os.path.getmtime(path) for path in self._get_paths(building_name))
+
+        model = self._models.get(building_name)
+        if model is not None and model.mtimes == mtimes:
+            return model
+
+        with self._lock:
+            # Another thread may have reloaded it in the meantime
+            model = self._models.get(building_name)
+            if model is None or model.mtimes != mtimes:
+                model = self._load(building_name, mtimes)
+                self._models[building_name] = model
+            return model
+
+    def invalidate(self, building_name=None):
+        """ Drop a building's model (or all models if building_name is None) so that it's reloaded on next use. """
+        with self._lock:
+            if building_name is None:
+                self._models.clear()
+            else:
+                self._models.pop(building_name, None)
@@ -3,44 +3,85 @@
 import time
 import grpc
 import pytz
-import json
 import datetime
-import pickle
 import pandas as pd
 from concurrent import futures
 import xbos_services_getter
 
 import power_consumption_predictions_pb2
 import power_consumption_predictions_pb2_grpc
+from model_registry import ModelRegistry
+from stub_pool import StubPool
 
 # CHECK: Change port!
 HOST_ADDRESS = 'localhost:1234'
 _ONE_DAY_IN_SECONDS = 60 * 60 * 24
 _ONE_HOUR_IN_SECONDS = 60 * 60
+FETCH_WORKERS = 32              # Threads shared by all requests to fetch features from the upstream services
+FETCH_TIMEOUT_SECONDS = 60      # Per-request deadline for fetching features if the client didn't set one
 UTC_TZ = pytz.timezone('UTC')
 PT_TZ = pytz.timezone('US/Pacific')
 
 
+class PredictionRequest:
+
+    def __init__(self, building_name, window, end_time, map_zone_state, zones, model, deadline):
+        """ Per-request state of a power consumption prediction.
+
+        Note
+        ----
+        The servicer handles requests concurrently, so nothing request specific may be stored on the servicer itself.
+
+        Parameters
+        ----------
+        building_name   : str
+            Building name.
+        window          : int
+            Prediction interval in minutes.
+        end_time        : datetime.datetime
+            Prediction end time (UTC).
+        map_zone_state  : dict
+            Maps zone name to its list of HVAC states.
+        zones           : list(str)
+            Zones of the building.
+        model           : model_registry.Model
+            The building's model; kept for the whole request even if a newer one is loaded meanwhile.
+        deadline        : float
+            Time (seconds since epoch) by which all the features have to be fetched.
+
+        """
+
+        self.building_name = building_name
+        self.window = window
+        self.end_time = end_time
+        self.map_zone_state = map_zone_state
+        self.zones = zones
+        self.model = model
+        self.model_info = model.model_info
+        self.deadline = deadline
+
+        self.curr_time_rounded = None   # Current time rounded down to 'window' min
+        self.start_time = None          # Start time of first of num_timesteps required for prediction
+
+
 class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc.PowerConsumptionPredictionsServicer):
 
     def __init__(self):
         """ Constructor. """
 
         self.model_folder = 'models/'
-        self.model_info = None          # json file data
 
-        self.building_name = None
-        self.window = None
-        self.end_time = None
-        self.map_zone_state = {}
+        # Estimators and json specifications, loaded once and reloaded when the files change
+        self.model_registry = ModelRegistry(self.model_folder)
 
-        self.zones = None
-        self.curr_time_rounded = None   # Current time rounded down to 'window' min
-        self.start_time = None          # Start time of first of num_timesteps required for prediction
+        # Channels to the upstream services, created once and reused by all requests
+        self.stub_pool = StubPool()
 
         # List of zones in building
-        self.building_zone_names_stub = xbos_services_getter.get_building_zone_names_stub()
-        self.supported_buildings = xbos_services_getter.get_buildings(self.building_zone_names_stub)
+        self.supported_buildings = self.stub_pool.call('building_zone_names', xbos_services_getter.get_buildings)
+
+        # Zone states and OAT of a request are fetched concurrently on this pool
+        self.fetch_executor = futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS)
 
     @staticmethod
     def round_minutes(dt, direction, resolution):
@@ -64,43 +105,15 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
         new_minute = (dt.minute // resolution + (1 if direction == 'up' else 0)) * resolution
         return dt + datetime.timedelta(minutes=new_minute - dt.minute)
 
-    def rearrange_columns(self):
-        """ Helper function to return ordered list according to json file specifications.
-
-        Note
-        ----
-        1. This can be optimized and generalized to any json object.
-
-        Returns
-        -------
-        list(str)
-            List of columns in the correct order.
-
-        """
-
-        dic = self.model_info['features']
-        new_dic = {}
-
-        for key, value in dic.items():
-            if type(value) == dict:
-                if key == 'iat':
-                    for key1, value1, in value.items():
-                        new_dic['iat-' + key1] = value1
-                else:
-                    for key1, value1 in value.items():
-                        new_dic[key1] = value1
-            else:
-                new_dic[key] = value
-
-        return sorted(new_dic, key=new_dic.get)
-
-    def add_time_features(self, data):
+    def add_time_features(self, data, params):
         """ Add time features to dataframe.
 
         Parameters
         ----------
         data    : pd.DataFrame()
             Dataframe to add time features to.
+        params  : PredictionRequest
+            Request parameters.
 
         Returns
         -------
@@ -109,38 +122,33 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
 
         """
 
-        with open(self.model_folder + self.building_name + '-model.json') as json_file:
-
-            model_info = json.load(json_file)
-            dic = model_info['features']['time_features']
-
-            var_to_expand = []
-            for key in dic.keys():
-                if key == 'year':
-                    data["year"] = data.index.year
-                    var_to_expand.append("year")
-                if key == 'month':
-                    data["month"] = data.index.month
-                    var_to_expand.append("month")
-                if key == 'week':
-                    data["week"] = data.index.week
-                    var_to_expand.append("week")
-                if key == 'weekday':
-                    data["weekday"] = data.index.weekday
-                    var_to_expand.append("weekday")
-                if key == 'hour':
-                    data["hour"] = data.index.hour
-                    var_to_expand.append("hour")
-
-            # # One-hot encode the time features
-            # for var in var_to_expand:
-            #     add_var = pd.get_dummies(data[var], prefix=var, drop_first=True)
-            #
-            #     # Add all the columns to the model data
-            #     data = data.join(add_var)
-            #
-            #     # Drop the original column that was expanded
-            #     data.drop(columns=[var], inplace=True)
+        var_to_expand = []
+        for key in params.model.time_features:
+            if key == 'year':
+                data["year"] = data.index.year
+                var_to_expand.append("year")
+            if key == 'month':
+                data["month"] = data.index.month
+                var_to_expand.append("month")
+            if key == 'week':
+                data["week"] = data.index.week
+                var_to_expand.append("week")
+            if key == 'weekday':
+                data["weekday"] = data.index.weekday
+                var_to_expand.append("weekday")
+            if key == 'hour':
+                data["hour"] = data.index.hour
+                var_to_expand.append("hour")
+
+        # # One-hot encode the time features
+        # for var in var_to_expand:
+        #     add_var = pd.get_dummies(data[var], prefix=var, drop_first=True)
+        #
+        #     # Add all the columns to the model data
+        #     data = data.join(add_var)
+        #
+        #     # Drop the original column that was expanded
+        #     data.drop(columns=[var], inplace=True)
 
         return data
 
@@ -149,13 +157,85 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
         # Do hyper-parameter training for LSTM/RF and save the model in a pickle file
         pass
 
-    def add_oat(self, data):
+    def fetch_features(self, params):
+        """ Fetch the zones' HVAC states and the historic & predicted OAT concurrently.
+
+        Note
+        ----
+        All the upstream calls are in flight at the same time, so the latency is that of the slowest one
+        instead of the sum of all of them.
+
+        Parameters
+        ----------
+        params  : PredictionRequest
+            Request parameters.
+
+        Returns
+        -------
+        dict, pd.DataFrame(), pd.DataFrame()
+            Maps zone name to its historic HVAC states, historic OAT, predicted OAT.
+
+        Raises
+        ------
+        futures.TimeoutError
+            If the fetches didn't complete before the request's deadline.
+
+        """
+
+        window = str(params.window) + 'm'
+
+        # prev_minutes to curr_time historic data
+        zone_futures = {}
+        for zone in params.model_info['features']['zones'].keys():
+            zone_futures[zone] = self.fetch_executor.submit(self.stub_pool.call, 'indoor_historic',
+                                                            xbos_services_getter.get_indoor_actions_historic,
+                                                            building=params.building_name,
+                                                            zone=zone,
+                                                            start=params.start_time,
+                                                            end=params.curr_time_rounded,
+                                                            window=window,
+                                                            agg='MAX')
+
+        historic_oat_future = self.fetch_executor.submit(self.stub_pool.call, 'outdoor_temperature_historic',
+                                                         xbos_services_getter.get_preprocessed_outdoor_temperature,
+                                                         building=params.building_name,
+                                                         start=params.start_time,
+                                                         end=params.curr_time_rounded,
+                                                         window=window)
+
+        predicted_oat_future = self.fetch_executor.submit(self.stub_pool.call, 'outdoor_temperature_prediction',
+                                                          xbos_services_getter.get_outdoor_temperature_prediction,
+                                                          building=params.building_name,
+                                                          start=datetime.datetime.today()
+                                                          + datetime.timedelta(seconds=1),
+                                                          end=params.end_time.replace(tzinfo=PT_TZ),
+                                                          window=window)
+
+        all_futures = list(zone_futures.values()) + [historic_oat_future, predicted_oat_future]
+        done, not_done = futures.wait(all_futures, timeout=max(params.deadline - time.time(), 0),
+                                      return_when=futures.FIRST_EXCEPTION)
+        if not_done:
+            for future in not_done:
+                future.cancel()
+            # Re-raise the first upstream error, if any
+            for future in done:
+                future.result()
+            raise futures.TimeoutError("fetching features of %s exceeded the deadline" % params.building_name)
+
+        zone_states = {zone: future.result() for zone, future in zone_futures.items()}
+        return zone_states, historic_oat_future.result(), predicted_oat_future.result()
+
+    def add_oat(self, data, historic_oat, predicted_oat):
         """ Add outdoor air temperature to dataframe.
 
         Parameters
         ----------
-        data    : pd.DataFrame()
+        data            : pd.DataFrame()
             Dataframe to add OAT to.
+        historic_oat    : pd.DataFrame()
+            Historic OAT, from start_time to curr_time.
+        predicted_oat   : pd.DataFrame()
+            Predicted OAT, from now to end_time.
 
         Returns
         -------
@@ -164,34 +244,23 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
 
         """
 
-        outdoor_historic_stub = xbos_services_getter.get_outdoor_temperature_historic_stub()
-        historic_oat = xbos_services_getter.get_preprocessed_outdoor_temperature(outdoor_historic_stub,
-                                                                                 building=self.building_name,
-                                                                                 start=self.start_time,
-                                                                                 end=self.curr_time_rounded,
-                                                                                 window=str(self.window)+'m')
-
-        outdoor_prediction_stub = xbos_services_getter.get_outdoor_temperature_prediction_stub()
-        predicted_oat = xbos_services_getter.get_outdoor_temperature_prediction(outdoor_prediction_stub,
-                                                                                building=self.building_name,
-                                                                                start=datetime.datetime.today()
-                                                                                + datetime.timedelta(seconds=1),
-                                                                                end=self.end_time.replace(tzinfo=PT_TZ),
-                                                                                window=str(self.window)+'m')
-
         data = data.join(historic_oat['temperature'])
         data = data.merge(predicted_oat[['temperature']], on='temperature', how='outer',
                           left_index=True, right_index=True)
 
         return data
 
-    def add_zone_states(self, data):
+    def add_zone_states(self, data, params, zone_states):
         """ Add each of the zones' HVAC states.
 
         Parameters
         ----------
-        data    : pd.DataFrame()
+        data        : pd.DataFrame()
             Dataframe to add zones' HVAC states to.
+        params      : PredictionRequest
+            Request parameters.
+        zone_states : dict
+            Maps zone name to its historic HVAC states.
 
         Returns
         -------
@@ -200,32 +269,13 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
 
         """
 
-        dic = self.model_info['features']['zones']
-        for key in dic.keys():
-
-            # prev_minutes to curr_time historic data
-            indoor_historic_stub = xbos_services_getter.get_indoor_historic_stub()
-            historic_states = xbos_services_getter.get_indoor_actions_historic(indoor_historic_stub,
-                                                                               building=self.building_name,
-                                                                               zone=key,
-                                                                               start=self.start_time,
-                                                                               end=self.curr_time_rounded,
-                                                                               window=str(self.window)+'m',
-                                                                               agg='MAX')
-
-            print('historic_states: ', historic_states)
-            print('data before joining: \n', data.head())
-
-            # Join historic HVAC zone states
-            data = data.join(historic_states)
-
-            print('data after joining: \n', data.head())
-
-        print('data: \n', data.head())
+        # Join historic HVAC zone states
+        for zone in params.model_info['features']['zones'].keys():
+            data = data.join(zone_states[zone])
 
         # curr_time to future_minutes (user inputted data)
-        for zone, states in self.map_zone_state.items():
-            data.loc[self.curr_time_rounded:self.end_time, zone] = states
+        for zone, states in params.map_zone_state.items():
+            data.loc[params.curr_time_rounded:params.end_time, zone] = states
 
         return data
 
@@ -270,9 +320,14 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
     #
     #     return data
 
-    def create_testing_dataframe(self):
+    def create_testing_dataframe(self, params):
         """ Create test dataframe to be used for model prediction.
 
+        Parameters
+        ----------
+        params  : PredictionRequest
+            Request parameters.
+
         Returns
         -------
         pd.DataFrame()
@@ -281,31 +336,39 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
         """
 
         # Create empty dataframe with correct indices
-        indices = pd.date_range(start=self.curr_time_rounded, freq=str(self.window)+'T', end=self.end_time)
+        indices = pd.date_range(start=params.curr_time_rounded, freq=str(params.window)+'T', end=params.end_time)
         x_test = pd.DataFrame(index=indices)
 
         # CHECK: Add IAT
         # x_test = self.add_iat(x_test)
 
+        # Fetch all the features at once
+        zone_states, historic_oat, predicted_oat = self.fetch_features(params)
+
         # Add zone states
-        x_test = self.add_zone_states(x_test)
+        x_test = self.add_zone_states(x_test, params, zone_states)
 
         # Add OAT
-        x_test = self.add_oat(x_test)
+        x_test = self.add_oat(x_test, historic_oat, predicted_oat)
 
         # Add time features such as hour, day of week, etc.
-        x_test = self.add_time_features(x_test)
+        x_test = self.add_time_features(x_test, params)
 
         # print('x_test: \n', x_test.head())
 
         # CHECK: Rearrange columns of dataframe according to .json file specifications.
-        x_test.columns = self.rearrange_columns()
+        x_test.columns = params.model.columns
 
         return x_test
 
-    def predictions(self):
+    def predictions(self, params):
         """ Retrieve saved model weights and make predictions.
 
+        Parameters
+        ----------
+        params  : PredictionRequest
+            Request parameters.
+
         Returns
         -------
         gRPC response
@@ -316,29 +379,35 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
         # Round down to the nearest 5min mark.
         # Example: If current time is 17:47, round down to 17:45 and then make predictions!
         date_today = datetime.datetime.today()
-        self.curr_time_rounded = self.round_minutes(UTC_TZ.localize(date_today), 'down', self.window)
+        params.curr_time_rounded = self.round_minutes(UTC_TZ.localize(date_today), 'down', params.window)
 
         # Calculate start time of testing dataframe
-        self.start_time = self.curr_time_rounded - datetime.timedelta(minutes=self.model_info['num_prev_minutes'])
+        params.start_time = params.curr_time_rounded - datetime.timedelta(minutes=params.model_info['num_prev_minutes'])
 
-        x_test = self.create_testing_dataframe()
+        x_test = self.create_testing_dataframe(params)
 
-        loaded_model = pickle.load(open(self.model_folder + self.building_name + '-model.sav', 'rb'))
-        y_pred = loaded_model.predict(x_test)
+        y_pred = params.model.estimator.predict(x_test)
 
         result = []
         for i in range(len(y_pred)):
 
-            tim = self.curr_time_rounded + datetime.timedelta(minutes=i*self.model_info['freq_minutes'])
-            tim = time.strftime('%Y-%m-%d %H:%M:%S')
+            tim = params.curr_time_rounded + datetime.timedelta(minutes=i*params.model_info['freq_minutes'])
+            tim = tim.strftime('%Y-%m-%d %H:%M:%S')
 
-            point = power_consumption_predictions_pb2.Reply.PowerConsumptionPredictionPoint(time=tim, power=y_pred[i])
+            point = power_consumption_predictions_pb2.Reply.PowerConsumptionPredictionsPoint(time=tim, power=y_pred[i])
             result.append(point)
 
         return power_consumption_predictions_pb2.Reply(point=result)
 
-    def retrain(self):
-        """ Retrain model of building with updated data. """
+    def retrain(self, building_name):
+        """ Retrain model of building with updated data.
+
+        Parameters
+        ----------
+        building_name   : str
+            Building name.
+
+        """
 
         # Dictionary that maps building name to training model function
         # Add more key, value pairs as the number of buildings increase
@@ -347,58 +416,63 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
         }
 
         try:
-            retrain_bldg[self.building_name]
+            retrain_bldg[building_name]
         except KeyError as e:
             print(e)
 
-    def get_parameters(self, request):
+    def get_parameters(self, request, timeout=FETCH_TIMEOUT_SECONDS):
         """ Storing and error checking request parameters.
 
         Parameters
         ----------
         request     : gRPC request
             Contains parameters to fetch data.
+        timeout     : float
+            Number of seconds the request has to fetch its features.
 
         Returns
         -------
-        str
-            Error message.
+        PredictionRequest, str
+            Request parameters, error message.
 
         """
 
         # Retrieve parameters from gRPC request object
-        self.building_name = request.building
-        self.end_time = datetime.datetime.utcfromtimestamp(float(request.end/1e9)).replace(tzinfo=pytz.utc)
+        building_name = request.building
+        end_time = datetime.datetime.utcfromtimestamp(float(request.end/1e9)).replace(tzinfo=pytz.utc)
 
         if request.window[-1] != 'm':
-            return "invalid request, window can be only in min. correct format: \'15m\', \'5m\'..."
-        self.window = int(request.window[:-1])
+            return None, "invalid request, window can be only in min. correct format: \'15m\', \'5m\'..."
+        window = int(request.window[:-1])
 
+        map_zone_state = {}
         for dic in request.map_zone_state:
-            self.map_zone_state[dic.zone] = dic.state
+            map_zone_state[dic.zone] = dic.state
 
-        if any(not elem for elem in [self.building_name, self.window, self.map_zone_state]):
-            return "invalid request, empty param(s)"
+        if any(not elem for elem in [building_name, window, map_zone_state]):
+            return None, "invalid request, empty param(s)"
 
         if request.building not in self.supported_buildings:
-            return "invalid request, building not found, supported buildings:" + str(self.supported_buildings)
+            return None, "invalid request, building not found, supported buildings:" + str(self.supported_buildings)
 
-        self.zones = xbos_services_getter.get_zones(self.building_zone_names_stub, self.building_name)
+        zones = self.stub_pool.call('building_zone_names', xbos_services_getter.get_zones, building_name)
 
-        if set(self.map_zone_state.keys()) != set(self.zones):
-            return "invalid request, specify all zones and their states in the building."
+        if set(map_zone_state.keys()) != set(zones):
+            return None, "invalid request, specify all zones and their states in the building."
 
         # Add error checking for window
 
         if request.end < time.time():
-            return "invalid request, end time has to be in the future"
+            return None, "invalid request, end time has to be in the future"
 
-        with open(self.model_folder + self.building_name + '-model.json') as json_file:
-            self.model_info = json.load(json_file)
+        try:
+            model = self.model_registry.get(building_name)
+        except (OSError, ValueError) as e:
+            return None, "invalid request, model of building couldn't be loaded; Error: {0}".format(str(e))
 
-            if self.end_time > self.round_minutes(UTC_TZ.localize(datetime.datetime.today()), 'down', self.window) + \
-                    datetime.timedelta(minutes=self.model_info['num_future_minutes']):
-                return "invalid request, end date is further than what model can predict"
+        if end_time > self.round_minutes(UTC_TZ.localize(datetime.datetime.today()), 'down', window) + \
+                datetime.timedelta(minutes=model.model_info['num_future_minutes']):
+            return None, "invalid request, end date is further than what model can predict"
 
         # # Other error checkings
         # duration = utils.get_window_in_sec(request.window)
@@ -407,9 +481,10 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
         # if request.start + (duration * 1e9) > request.end:
         #     return None, "invalid request, start date + window is greater than end date"
 
-        return
+        return PredictionRequest(building_name, window, end_time, map_zone_state, zones, model,
+                                 time.time() + timeout), None
 
-    def get_power_predictions(self, request):
+    def get_power_predictions(self, request, timeout=FETCH_TIMEOUT_SECONDS):
         """ Main function of micro-service. This function does error checking of request parameters and
         decides if the model for given building needs to be re-trained or not.
 
@@ -417,27 +492,29 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
         ----------
         request     : gRPC request
             Contains parameters to fetch data.
+        timeout     : float
+            Number of seconds the request has to fetch its features.
 
         Returns
         -------
-        pd.DataFrame, str
-            Dataframe with predictions, error message.
+        gRPC response, str
+            List of points containing the datetime and power consumption prediction, error message.
 
         """
 
-        error = self.get_parameters(request)
+        params, error = self.get_parameters(request, timeout)
         if error:
             return None, error
 
         retraining_period = datetime.timedelta(days=14)
         date_today = datetime.datetime.today()
-        last_trained_date = datetime.datetime.utcfromtimestamp(self.model_info['last_trained'])
+        last_trained_date = datetime.datetime.utcfromtimestamp(params.model_info['last_trained'])
         delta = date_today - last_trained_date
 
         # Check if time passed since last update has been more than the retraining_period
         if delta >= retraining_period:
-            self.retrain()
-        self.predictions()
+            self.retrain(params.building_name)
+        return self.predictions(params), None
 
     def GetPowerConsumptionPredictions(self, request, context):
         """
@@ -456,7 +533,19 @@ class PowerConsumptionPredictionsServicer(power_consumption_predictions_pb2_grpc
 
         """
 
-        result, error = self.get_power_predictions(request)
+        # Honour the client's deadline if it's shorter than the default one
+        # (without a deadline, time_remaining() is either None or practically infinite)
+        timeout = context.time_remaining()
+        if timeout is None or timeout > FETCH_TIMEOUT_SECONDS:
+            timeout = FETCH_TIMEOUT_SECONDS
+
+        try:
+            result, error = self.get_power_predictions(request, timeout)
+        except futures.TimeoutError as e:
+            context.set_code(grpc.StatusCode.DEADLINE_EXCEEDED)
+            context.set_details(str(e))
+            return power_consumption_predictions_pb2.Reply()
+
         if error:
             # List of status codes: https://github.com/grpc/grpc/blob/master/doc/statuscodes.md
             context.set_code(grpc.StatusCode.INVALID_ARGUMENT)
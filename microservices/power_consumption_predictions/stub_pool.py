@@ -0,0 +1,161 @@
+""" Pool of long-lived gRPC channels/stubs to the XBOS services the predictions depend on. """
+
+import os
+import grpc
+import threading
+
+from xbos_services_getter.lib import building_zone_names_pb2_grpc
+from xbos_services_getter.lib import indoor_data_historical_pb2_grpc
+from xbos_services_getter.lib import outdoor_temperature_historical_pb2_grpc
+from xbos_services_getter.lib import outdoor_temperature_prediction_pb2_grpc
+
+# Keep idle connections alive (and detect dead ones) instead of re-connecting on every request
+KEEPALIVE_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30 * 1000),
+    ('grpc.keepalive_timeout_ms', 10 * 1000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
+# Service name -> (environment variable with the host address, stub class)
+SERVICES = {
+    'building_zone_names': ('BUILDING_ZONE_NAMES_HOST_ADDRESS',
+                            building_zone_names_pb2_grpc.BuildingZoneNamesStub),
+    'indoor_historic': ('INDOOR_DATA_HISTORICAL_HOST_ADDRESS',
+                        indoor_data_historical_pb2_grpc.IndoorDataHistoricalStub),
+    'outdoor_temperature_historic': ('OUTDOOR_TEMPERATURE_HISTORICAL_HOST_ADDRESS',
+                                     outdoor_temperature_historical_pb2_grpc.OutdoorTemperatureStub),
+    'outdoor_temperature_prediction': ('OUTDOOR_TEMPERATURE_PREDICTION_HOST_ADDRESS',
+                                       outdoor_temperature_prediction_pb2_grpc.OutdoorTemperatureStub),
+}
+
+# Channels in these states are replaced by a new one on next use
+_UNHEALTHY_STATES = (grpc.ChannelConnectivity.TRANSIENT_FAILURE, grpc.ChannelConnectivity.SHUTDOWN)
+
+
+class _PooledChannel:
+
+    def __init__(self, channel, stub):
+        self.channel = channel
+        self.stub = stub
+        self.state = grpc.ChannelConnectivity.IDLE
+
+        # Connects eagerly and keeps track of the channel's health
+        self.channel.subscribe(self._on_state_change, try_to_connect=True)
+
+    def _on_state_change(self, state):
+        self.state = state
+
+    def is_healthy(self):
+        return self.state not in _UNHEALTHY_STATES
+
+    def release(self):
+        # Not closed explicitly: calls of other requests may still be in flight on it,
+        # the channel is closed once it's garbage collected.
+        self.channel.unsubscribe(self._on_state_change)
+
+
+class StubPool:
+
+    def __init__(self, secure=True, options=KEEPALIVE_OPTIONS):
+        """ Constructor.
+
+        Note
+        ----
+        One channel is created per service and shared by all requests (gRPC channels are thread-safe and multiplex
+        concurrent calls). Same host addresses (environment variables) and credentials as xbos_services_getter's
+        get_*_stub() functions, but with keepalive settings.
+
+        Parameters
+        ----------
+        secure      : bool
+            Use SSL credentials.
+        options     : list(tuple)
+            gRPC channel options.
+
+        """
+
+        self.secure = secure
+        self.options = options
+
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def _create(self, service):
+        env_var, stub_class = SERVICES[service]
+        host_address = os.environ[env_var]
+
+        if not self.secure:
+            channel = grpc.insecure_channel(host_address, options=self.options)
+        else:
+            credentials = grpc.ssl_channel_credentials()
+            channel = grpc.secure_channel(host_address, credentials, options=self.options)
+        return _PooledChannel(channel, stub_class(channel))
+
+    def get(self, service):
+        """ Get the stub of a service, (re)creating its channel if there's none yet or it's unhealthy.
+
+        Parameters
+        ----------
+        service     : str
+            Service name, one of SERVICES.
+
+        Returns
+        -------
+        gRPC stub
+            Stub of the service.
+
+        """
+
+        with self._lock:
+            pooled = self._channels.get(service)
+            if pooled is None or not pooled.is_healthy():
+                if pooled is not None:
+                    pooled.release()
+                pooled = self._create(service)
+                self._channels[service] = pooled
+            return pooled.stub
+
+    def call(self, service, func, *args, **kwargs):
+        """ Call an xbos_services_getter function with the pooled stub of the service.
+
+        Note
+        ----
+        If the service is unavailable the channel is dropped, so that the next call uses a new one.
+
+        Parameters
+        ----------
+        service     : str
+            Service name, one of SERVICES.
+        func        : function
+            xbos_services_getter function taking the stub as first argument.
+
+        Returns
+        -------
+        object
+            Return value of func.
+
+        """
+
+        stub = self.get(service)
+        try:
+            return func(stub, *args, **kwargs)
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                self.invalidate(service, stub)
+            raise
+
+    def invalidate(self, service, stub=None):
+        """ Drop the channel of a service (only if it still belongs to stub, when given). """
+        with self._lock:
+            pooled = self._channels.get(service)
+            if pooled is not None and (stub is None or pooled.stub is stub):
+                del self._channels[service]
+                pooled.release()
+
+    def clear(self):
+        """ Drop all the channels. """
+        with self._lock:
+            for pooled in self._channels.values():
+                pooled.release()
+            self._channels.clear()
@@ -0,0 +1,69 @@
+import os
+import sys
+import json
+import pickle
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from model_registry import ModelRegistry, rearrange_columns
+
+MODEL_INFO = {
+    'features': {
+        'time_features': {'hour': 2, 'weekday': 3},
+        'iat': {'zone1': 1},
+        'oat': 0,
+    }
+}
+
+
+def _write_model(folder, building_name, estimator, model_info=MODEL_INFO, mtime=None):
+    model_path = os.path.join(folder, building_name + '-model.sav')
+    info_path = os.path.join(folder, building_name + '-model.json')
+    with open(model_path, 'wb') as f:
+        pickle.dump(estimator, f)
+    with open(info_path, 'w') as f:
+        json.dump(model_info, f)
+    if mtime is not None:
+        os.utime(model_path, (mtime, mtime))
+        os.utime(info_path, (mtime, mtime))
+
+
+def test_rearrange_columns_orders_by_position():
+    assert rearrange_columns(MODEL_INFO) == ['oat', 'iat-zone1', 'hour', 'weekday']
+
+
+def test_model_is_loaded_once(tmp_path):
+    _write_model(str(tmp_path), 'ciee', {'version': 1}, mtime=1000)
+    registry = ModelRegistry(str(tmp_path))
+
+    model = registry.get('ciee')
+    assert model.estimator == {'version': 1}
+    assert model.columns == ['oat', 'iat-zone1', 'hour', 'weekday']
+    assert model.time_features == ['hour', 'weekday']
+    assert registry.get('ciee') is model
+
+
+def test_model_is_reloaded_when_its_files_change(tmp_path):
+    _write_model(str(tmp_path), 'ciee', {'version': 1}, mtime=1000)
+    registry = ModelRegistry(str(tmp_path))
+    old = registry.get('ciee')
+
+    _write_model(str(tmp_path), 'ciee', {'version': 2}, mtime=2000)
+    new = registry.get('ciee')
+    assert new is not old
+    assert new.estimator == {'version': 2}
+    # Requests in flight keep the model they started with
+    assert old.estimator == {'version': 1}
+
+
+def test_invalidate(tmp_path):
+    _write_model(str(tmp_path), 'ciee', {'version': 1}, mtime=1000)
+    _write_model(str(tmp_path), 'avenal', {'version': 1}, mtime=1000)
+    registry = ModelRegistry(str(tmp_path))
+    ciee, avenal = registry.get('ciee'), registry.get('avenal')
+
+    registry.invalidate('ciee')
+    assert registry.get('ciee') is not ciee
+    assert registry.get('avenal') is avenal
+
+    registry.invalidate()
+    assert registry.get('avenal') is not avenal
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import grpc
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from stub_pool import StubPool, SERVICES
+
+
+class _Unavailable(grpc.RpcError):
+
+    def code(self):
+        return grpc.StatusCode.UNAVAILABLE
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    for env_var, _ in SERVICES.values():
+        monkeypatch.setenv(env_var, 'localhost:1')
+    pool = StubPool(secure=False)
+    yield pool
+    pool.clear()
+
+
+def test_stub_is_shared(pool):
+    stub = pool.get('indoor_historic')
+    assert pool.get('indoor_historic') is stub
+    assert pool.get('building_zone_names') is not stub
+
+
+def test_unhealthy_channel_is_replaced(pool):
+    stub = pool.get('indoor_historic')
+    pool._channels['indoor_historic'].state = grpc.ChannelConnectivity.TRANSIENT_FAILURE
+    assert pool.get('indoor_historic') is not stub
+
+
+def test_unavailable_call_drops_the_channel(pool):
+    stub = pool.get('indoor_historic')
+
+    def func(stub):
+        raise _Unavailable()
+
+    with pytest.raises(grpc.RpcError):
+        pool.call('indoor_historic', func)
+    assert pool.get('indoor_historic') is not stub
+
+
+def test_call_passes_the_stub(pool):
+    assert pool.call('indoor_historic', lambda stub, x: (stub, x), 1) == (pool.get('indoor_historic'), 1)
+
+
+def test_invalidate_only_drops_the_given_stub(pool):
+    stub = pool.get('indoor_historic')
+    pool.invalidate('indoor_historic', stub=object())
+    assert pool.get('indoor_historic') is stub
+    pool.invalidate('indoor_historic')
+    assert pool.get('indoor_historic') is not stub
@@ -24,8 +24,13 @@ PT_TZ = pytz.timezone('US/Pacific')
 class skysparkServicer(skyspark_pb2_grpc.skysparkServicer):
 
     def __init__(self):
-        """ Constructor. """
-        self.query = None
+        """ Constructor.
+
+        Note
+        ----
+        Requests are handled concurrently, so request parameters are passed around instead of being stored on self.
+
+        """
 
     def get_parameters(self, request):
         """ Storing and error checking request parameters.
@@ -37,22 +42,27 @@ class skysparkServicer(skyspark_pb2_grpc.skysparkServicer):
 
         Returns
         -------
-        str
-            Error message.
+        str, str
+            Axon query, error message.
 
         """
 
-        self.query = request.query
-        if not self.query:
-            return "invalid request, query parameter empty"
-        if not isinstance(self.query, str):
-            return "invalid request, query must be a string; " \
-                   "example query: readAll(id==@abcd1234).hisRead(date(2010,01,01)..date(2019,07,01), {limit: null})"
-        return
+        query = request.query
+        if not query:
+            return None, "invalid request, query parameter empty"
+        if not isinstance(query, str):
+            return None, "invalid request, query must be a string; " \
+                         "example query: readAll(id==@abcd1234).hisRead(date(2010,01,01)..date(2019,07,01), {limit: null})"
+        return query, None
 
-    def _get_skyspark_data(self):
+    def _get_skyspark_data(self, query):
         """ Query skyspark and retrieve data.
 
+        Parameters
+        ----------
+        query       : str
+            Axon query.
+
         Returns
         -------
         pd.Dataframe, str
@@ -61,7 +71,7 @@ class skysparkServicer(skyspark_pb2_grpc.skysparkServicer):
         """
 
         try:
-            result_str = spyspark.axon_request(self.query, "application/json")
+            result_str = spyspark.axon_request(query, "application/json")
             result_json = json.loads(result_str)
         except Exception as e:
             return None, "Invalid query or failure in skyspark connection; Error: {0}".format(str(e))
@@ -94,11 +104,11 @@ class skysparkServicer(skyspark_pb2_grpc.skysparkServicer):
 
         """
 
-        error = self.get_parameters(request)
+        query, error = self.get_parameters(request)
         if error:
             return None, error
         else:
-            result, error = self._get_skyspark_data()
+            result, error = self._get_skyspark_data(query)
             if error:
                 return None, error
         return result, None
@@ -0,0 +1,12 @@
+""" Caches shared by the microservices: on-disk time-series days, Brick metadata and in-flight upstream calls. """
+
+from .ts_cache import TimeSeriesCache
+from .single_flight import SingleFlight
+
+
+def __getattr__(name):
+    # metadata_cache needs pymortar, so it's only imported when used
+    if name == 'MetadataCache':
+        from .metadata_cache import MetadataCache
+        return MetadataCache
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,137 @@
+__author__ = "Pranav Gupta"
+__email__ = "pranavhgupta@lbl.gov"
+
+""" In-memory cache of the Brick metadata (uuid's of meters, weather sensors...) of each site. """
+
+import time
+import threading
+import pymortar
+
+_ONE_DAY_IN_SECONDS = 60 * 60 * 24
+_FIVE_MINUTES_IN_SECONDS = 60 * 5
+
+
+class MetadataCache:
+
+    def __init__(self, pymortar_client, ttl=_ONE_DAY_IN_SECONDS, empty_ttl=_FIVE_MINUTES_IN_SECONDS):
+        """ Constructor.
+
+        Parameters
+        ----------
+        pymortar_client     : pymortar.Client({})
+            Pymortar Client Object.
+        ttl                 : int
+            Number of seconds a resolved view stays valid.
+        empty_ttl           : int
+            Number of seconds a view without any uuid stays valid, so that a site whose metadata is briefly
+            missing is resolved again soon.
+
+        """
+
+        self.pymortar_client = pymortar_client
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+
+        # (site, query) -> (expiry time, list of uuid's)
+        self._views = {}
+
+        # uuid -> site name
+        self._map_uuid_sitename = {}
+
+        self._lock = threading.Lock()
+
+    def _resolve(self, sites, query):
+        """ Run the SPARQL query for the sites with a metadata-only pymortar request.
+
+        Returns
+        -------
+        dict
+            Maps each site to the list of uuid's matching the query.
+
+        """
+
+        view = pymortar.View(
+            name="view_metadata",
+            sites=sites,
+            definition=query
+        )
+
+        request = pymortar.FetchRequest(
+            sites=sites,
+            views=[view]
+        )
+
+        response = self.pymortar_client.fetch(request)
+
+        # rows = (url, uuid, sitename)
+        result = {site: [] for site in sites}
+        for (url, uuid, sitename) in response.query('select * from view_metadata'):
+            if uuid not in result.setdefault(sitename, []):
+                result[sitename].append(uuid)
+        return result
+
+    def prefetch(self, sites, query):
+        """ Resolve the query for the sites that are not cached (or expired) in a single request.
+
+        Parameters
+        ----------
+        sites   : list(str)
+            Building names.
+        query   : str
+            SPARQL query, e.g. "SELECT ?meter WHERE { ?meter rdf:type brick:Green_Button_Meter };"
+
+        """
+
+        now = time.time()
+        with self._lock:
+            missing = [site for site in sites
+                       if (site, query) not in self._views or self._views[(site, query)][0] <= now]
+        if not missing:
+            return
+
+        result = self._resolve(missing, query)
+
+        with self._lock:
+            for site in missing:
+                uuids = result.get(site, [])
+                self._views[(site, query)] = (now + (self.ttl if uuids else self.empty_ttl), uuids)
+                for uuid in uuids:
+                    self._map_uuid_sitename[uuid] = site
+
+    def get_uuids(self, site, query):
+        """ Get the uuid's of the points of a site that match the query.
+
+        Parameters
+        ----------
+        site    : str
+            Building name.
+        query   : str
+            SPARQL query.
+
+        Returns
+        -------
+        list(str)
+            List of uuid's.
+
+        """
+
+        self.prefetch([site], query)
+        with self._lock:
+            return list(self._views[(site, query)][1])
+
+    def get_sitename(self, uuid):
+        """ Get the site name of a resolved uuid; None if the uuid hasn't been resolved. """
+        with self._lock:
+            return self._map_uuid_sitename.get(uuid)
+
+    def invalidate(self, site=None):
+        """ Drop the cached metadata of a site, or of all sites if site is None. """
+        with self._lock:
+            if site is None:
+                self._views.clear()
+                self._map_uuid_sitename.clear()
+            else:
+                for key in [key for key in self._views if key[0] == site]:
+                    del self._views[key]
+                for uuid in [uuid for uuid, sitename in self._map_uuid_sitename.items() if sitename == site]:
+                    del self._map_uuid_sitename[uuid]
@@ -0,0 +1,94 @@
+__author__ = "Pranav Gupta"
+__email__ = "pranavhgupta@lbl.gov"
+
+""" Coalescing of identical concurrent calls, e.g. upstream fetches of the same data. """
+
+import copy
+import threading
+
+
+class _Call:
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.results = []
+        self.error = None
+
+
+class SingleFlight:
+
+    def __init__(self, share=copy.deepcopy):
+        """ Constructor.
+
+        Note
+        ----
+        While a call of a key is in flight, calls of the same key wait for it and get its result (or exception)
+        instead of calling the function again. Once the call is done, the next call of the key calls it again.
+
+        Parameters
+        ----------
+        share   : function
+            Applied to the result before handing it to each waiting caller, so that callers can modify
+            what they get (e.g. dataframes) without affecting each other. Defaults to a deep copy.
+
+        """
+
+        self.share = share
+
+        # key -> _Call in flight
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """ Call func(*args, **kwargs), unless a call of the key is already in flight.
+
+        Parameters
+        ----------
+        key     : hashable
+            Identifies the call, i.e. the normalized parameters.
+        func    : function
+            Function to call.
+
+        Returns
+        -------
+        object
+            Return value of func.
+
+        """
+
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                call.waiters += 1
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            with self._lock:
+                return call.results.pop()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._calls[key]
+            call.error = e
+            call.done.set()
+            raise
+
+        # No caller can join the call anymore; one copy per waiting caller, made before the result is
+        # returned (and possibly modified)
+        with self._lock:
+            del self._calls[key]
+        try:
+            call.results = [self.share(result) for _ in range(call.waiters)]
+        except Exception as e:
+            call.error = e
+        call.done.set()
+        return result
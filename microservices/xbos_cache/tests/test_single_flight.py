@@ -0,0 +1,120 @@
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from xbos_cache import SingleFlight
+
+
+def _run_concurrently(flight, key, func, n_callers):
+    """ Call flight.do() from n_callers threads, the first one being the leader that the others wait for. """
+    results = [None] * n_callers
+    errors = [None] * n_callers
+
+    def call(i):
+        try:
+            results[i] = flight.do(key, func)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(n_callers)]
+    threads[0].start()
+    while key not in flight._calls:
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    while flight._calls[key].waiters < n_callers - 1:
+        time.sleep(0.001)
+    return threads, results, errors
+
+
+def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def func():
+        calls.append(1)
+        release.wait()
+        return {'data': [1, 2, 3]}
+
+    threads, results, errors = _run_concurrently(flight, 'key', func, 5)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert errors == [None] * 5
+    assert all(result == {'data': [1, 2, 3]} for result in results)
+    # Each caller gets its own copy
+    assert len(set(id(result) for result in results)) == 5
+
+
+def test_exception_is_propagated_to_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def func():
+        release.wait()
+        raise ValueError('upstream failed')
+
+    threads, results, errors = _run_concurrently(flight, 'key', func, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(error, ValueError) for error in errors)
+    # The failed call isn't kept, the next call runs again
+    assert flight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    calls = []
+
+    def func(value):
+        calls.append(value)
+        return value
+
+    assert flight.do('key', func, 1) == 1
+    assert flight.do('key', func, 2) == 2
+    assert calls == [1, 2]
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    threads, results, _ = _run_concurrently(flight, 'a', lambda: release.wait() and 'a', 1)
+    assert flight.do('b', lambda: 'b') == 'b'
+    release.set()
+    threads[0].join()
+    assert results == ['a']
+
+
+def test_share_function():
+    flight = SingleFlight(share=lambda result: result)
+    release = threading.Event()
+    result = ['shared']
+
+    threads, results, _ = _run_concurrently(flight, 'key', lambda: release.wait() and result, 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(r is result for r in results)
+
+
+def test_share_failure_is_raised_to_waiters_only():
+    def share(result):
+        raise TypeError('not copyable')
+
+    flight = SingleFlight(share=share)
+    release = threading.Event()
+
+    threads, results, errors = _run_concurrently(flight, 'key', lambda: release.wait() and 'result', 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert results[0] == 'result' and errors[0] is None
+    assert isinstance(errors[1], TypeError)
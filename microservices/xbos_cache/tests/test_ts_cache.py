@@ -0,0 +1,93 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from xbos_cache import TimeSeriesCache
+
+
+def test_site_without_uuids_is_cached_as_empty_days(tmp_path):
+    # Upstream returns an empty pd.DataFrame() (RangeIndex) when a site has no matching meter uuid's
+    calls = []
+
+    def fetch_func(keys, start, end):
+        calls.append((keys, start, end))
+        return {key: pd.DataFrame() for key in keys}
+
+    cache = TimeSeriesCache(str(tmp_path))
+    key = ('site_without_meters', 'Green_Button_Meter', 'MEAN', '15m')
+
+    for _ in range(2):
+        df = cache.fetch_many([key], '2018-01-01T00:00:00Z', '2018-01-03T00:00:00Z', 'MEAN', '15m', fetch_func)[key]
+        assert df.empty
+        assert isinstance(df.index, pd.DatetimeIndex)
+        assert str(df.index.tz) == 'UTC'
+
+    # The second request is served from the empty day partitions
+    assert len(calls) == 1
+    assert sorted(os.listdir(os.path.join(str(tmp_path), *key))) == ['2018-01-01.pkl', '2018-01-02.pkl']
+
+
+def test_empty_frame_of_uncacheable_request(tmp_path):
+    cache = TimeSeriesCache(str(tmp_path))
+    df = cache.fetch(('site_without_meters', 'Green_Button_Meter', 'MEAN', '7m'), '2018-01-01T00:00:00Z',
+                     '2018-01-02T00:00:00Z', 'MEAN', '7m', lambda start, end: pd.DataFrame())
+    assert df.empty
+    assert str(df.index.tz) == 'UTC'
+
+
+def _fake_upstream(calls):
+    # Like pymortar: windowed buckets in fixed (UTC) steps from the requested start
+    def fetch_func(start, end):
+        calls.append((start, end))
+        start, end = pd.Timestamp(start).tz_convert('UTC'), pd.Timestamp(end).tz_convert('UTC')
+        index = pd.date_range(start, periods=int((end - start) / pd.Timedelta('15min')) + 1, freq='15min')
+        index = index[index < end]
+        return pd.DataFrame({'uuid': index.asi8 // 10 ** 9}, index=index)
+    return fetch_func
+
+
+def _fake_windowed_upstream(window, calls):
+    raw = _fake_upstream([])
+
+    def fetch_func(start, end):
+        calls.append((start, end))
+        df = raw(start, end)
+        buckets = (df.index - df.index[0]) // pd.Timedelta(window)
+        result = df.groupby(buckets).first()
+        result.index = df.index[0] + buckets.unique() * pd.Timedelta(window)
+        return result
+    return fetch_func
+
+
+def test_daily_windows_across_dst_match_upstream(tmp_path):
+    # 2018-11-04 is the end of DST in US/Pacific
+    start = pd.Timestamp('2018-11-01', tz='US/Pacific').isoformat()
+    end = pd.Timestamp('2018-11-08', tz='US/Pacific').isoformat()
+    key = ('site', 'Weather_Temperature_Sensor', 'MEAN', '24h')
+
+    cache = TimeSeriesCache(str(tmp_path), tz='US/Pacific')
+    cache.fetch(key, start, end, 'MEAN', '24h', _fake_windowed_upstream('24h', []))
+
+    # A later request of part of the range gets the same days as upstream
+    start = pd.Timestamp('2018-11-05', tz='US/Pacific').isoformat()
+    direct = _fake_windowed_upstream('24h', [])(start, end)
+    df = cache.fetch(key, start, end, 'MEAN', '24h', _fake_windowed_upstream('24h', []))
+    assert list(df.index) == list(direct.index)
+    assert list(df['uuid']) == list(direct['uuid'])
+
+
+def test_hourly_windows_across_dst_are_cached(tmp_path):
+    start = pd.Timestamp('2018-11-01', tz='US/Pacific').isoformat()
+    end = pd.Timestamp('2018-11-08', tz='US/Pacific').isoformat()
+    key = ('site', 'Weather_Temperature_Sensor', 'MEAN', '1h')
+
+    direct = _fake_windowed_upstream('1h', [])(start, end)
+    cache = TimeSeriesCache(str(tmp_path), tz='US/Pacific')
+    calls = []
+    for _ in range(2):
+        df = cache.fetch(key, start, end, 'MEAN', '1h', _fake_windowed_upstream('1h', calls))
+        assert list(df.index) == list(direct.index)
+        assert list(df['uuid']) == list(direct['uuid'])
+    assert len(calls) == 1
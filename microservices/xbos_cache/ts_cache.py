@@ -0,0 +1,312 @@
+__author__ = "Pranav Gupta"
+__email__ = "pranavhgupta@lbl.gov"
+
+""" Persistent on-disk cache of time-series data, stored as one partition per day. """
+
+import os
+import uuid
+import pandas as pd
+from datetime import timedelta
+
+_ONE_DAY = timedelta(days=1)
+
+
+class TimeSeriesCache:
+
+    def __init__(self, cache_folder, tz='UTC', safety_margin=_ONE_DAY):
+        """ Constructor.
+
+        Note
+        ----
+        Historical data is assumed to be immutable. A day is only written to disk once it ended more than
+        safety_margin ago, so that late arriving data does not get frozen into the cache.
+
+        Parameters
+        ----------
+        cache_folder    : str
+            Folder to store the day partitions in.
+        tz              : str
+            Timezone that defines the day boundaries of the partitions.
+        safety_margin   : datetime.timedelta
+            Minimum age of the end of a day before it is stored.
+
+        """
+
+        self.cache_folder = cache_folder
+        self.tz = tz
+        self.safety_margin = pd.Timedelta(safety_margin)
+
+    @staticmethod
+    def parse_window(window):
+        """ Convert an aggregation window to a timedelta.
+
+        Parameters
+        ----------
+        window  : str
+            Aggregation window, e.g. '15m', '15min', '1h', '24h'.
+
+        Returns
+        -------
+        pd.Timedelta
+            Window duration, None if the window can't be parsed.
+
+        """
+
+        try:
+            return pd.Timedelta(window)
+        except (ValueError, TypeError):
+            return None
+
+    def is_cacheable(self, start, end, agg, window):
+        """ Check if the requested range can be assembled from day partitions without changing the result.
+
+        Parameters
+        ----------
+        start   : str or datetime
+            Start time. Timezone naive values are assumed to be UTC.
+        end     : str or datetime
+            End time. Timezone naive values are assumed to be UTC.
+        agg     : str
+            Aggregation, e.g. MEAN, MAX, RAW.
+        window  : str
+            Aggregation window.
+
+        Returns
+        -------
+        bool
+            True if the aggregation buckets of the request line up with the day partitions.
+
+        """
+
+        start, end = self._to_timestamps(start, end)
+
+        if str(agg).upper() == 'RAW':
+            return True
+
+        duration = self.parse_window(window)
+        if duration is None or duration <= pd.Timedelta(0) or pd.Timedelta(days=1) % duration:
+            return False
+
+        # Upstream lays the buckets out in fixed (UTC) steps from the start, so across a DST change they only stay
+        # on the local day boundaries if they divide the 1h shift (e.g. 24h buckets would straddle two days)
+        if str(self.tz) != 'UTC' and pd.Timedelta(hours=1) % duration:
+            return False
+
+        # Buckets start at the requested start time, so it must lie on the window grid of its day
+        for t in (start, end):
+            t = t.tz_convert(self.tz)
+            if (t - t.normalize()) % duration:
+                return False
+        return True
+
+    @staticmethod
+    def _to_utc(df):
+        """ Set a UTC DatetimeIndex on upstream data; empty frames (e.g. no matching uuid's) may have a RangeIndex. """
+        index = pd.DatetimeIndex(df.index)
+        df.index = index.tz_localize('UTC') if index.tz is None else index.tz_convert('UTC')
+        return df
+
+    def _get_days(self, start, end):
+        """ Days (midnight in self.tz) of the partitions that cover [start, end). """
+        return list(pd.date_range(start=start.tz_convert(self.tz).normalize(),
+                                  end=(end - pd.Timedelta(1)).tz_convert(self.tz).normalize(),
+                                  freq='D'))
+
+    @staticmethod
+    def _to_timestamps(start, end):
+        start = pd.Timestamp(start)
+        end = pd.Timestamp(end)
+        start = start.tz_localize('UTC') if start.tzinfo is None else start
+        end = end.tz_localize('UTC') if end.tzinfo is None else end
+        return start, end
+
+    def covers(self, keys, start, end, agg, window):
+        """ Check if all the days of [start, end) of the keys are stored, i.e. fetch_many() wouldn't fetch anything.
+
+        Parameters
+        ----------
+        keys        : list(tuple)
+            Time series, see fetch().
+        start       : str or datetime
+            Start time. Timezone naive values are assumed to be UTC.
+        end         : str or datetime
+            End time. Timezone naive values are assumed to be UTC.
+        agg         : str
+            Aggregation, e.g. MEAN, MAX, RAW.
+        window      : str
+            Aggregation window.
+
+        Returns
+        -------
+        bool
+            True if every day partition of every key is on disk.
+
+        """
+
+        start, end = self._to_timestamps(start, end)
+        if start >= end or not self.is_cacheable(start, end, agg, window):
+            return False
+        days = self._get_days(start, end)
+        return all(os.path.exists(self._get_partition_path(key, day)) for key in keys for day in days)
+
+    def _next_day(self, day):
+        """ Midnight of the following day; not always 24h later because of daylight saving time. """
+        return (day.tz_localize(None) + _ONE_DAY).tz_localize(self.tz)
+
+    def _get_partition_path(self, key, day):
+        return os.path.join(self.cache_folder, *[str(k) for k in key]) + os.sep + day.strftime('%Y-%m-%d') + '.pkl'
+
+    def _read_partition(self, key, day):
+        path = self._get_partition_path(key, day)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            print('Error reading cache partition {0}: {1}'.format(path, e))
+            return None
+
+    def _write_partition(self, key, day, df):
+        path = self._get_partition_path(key, day)
+        folder = os.path.dirname(path)
+        if not os.path.exists(folder):
+            os.makedirs(folder, exist_ok=True)
+
+        # Write to a temporary file first so that concurrent readers never see a partial partition
+        tmp_path = path + '.' + uuid.uuid4().hex + '.tmp'
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def _fetch_days(self, keys, days, fetch_func):
+        """ Fetch a contiguous run of days of the keys from upstream, in a single request, and store the complete ones.
+
+        Returns
+        -------
+        dict
+            Maps each key to a dictionary that maps each day to its dataframe.
+
+        """
+
+        start = days[0]
+        end = self._next_day(days[-1])
+
+        frames = fetch_func(keys, start.tz_convert('UTC').isoformat(), end.tz_convert('UTC').isoformat())
+        cutoff = pd.Timestamp.now(tz='UTC') - self.safety_margin
+
+        result = {}
+        for key in keys:
+            df = self._to_utc(frames[key])
+            row_days = df.index.tz_convert(self.tz).normalize()
+
+            result[key] = {}
+            for day in days:
+                day_df = df[row_days == day]
+                result[key][day] = day_df
+                if self._next_day(day) <= cutoff:
+                    self._write_partition(key, day, day_df)
+        return result
+
+    def fetch(self, key, start, end, agg, window, fetch_func):
+        """ Get data for [start, end), reading the stored days from disk and fetching only the missing ones.
+
+        Parameters
+        ----------
+        key         : tuple
+            Identifies the time series, e.g. (site, point type, aggregation, window).
+        start       : str or datetime
+            Start time. Timezone naive values are assumed to be UTC.
+        end         : str or datetime
+            End time. Timezone naive values are assumed to be UTC.
+        agg         : str
+            Aggregation, e.g. MEAN, MAX, RAW.
+        window      : str
+            Aggregation window.
+        fetch_func  : function
+            fetch_func(start, end) returns the upstream data for [start, end) as a pd.DataFrame();
+            start and end are passed as ISO formatted strings.
+
+        Returns
+        -------
+        pd.DataFrame()
+            Data with a UTC index.
+
+        """
+
+        def fetch_many_func(keys, fetch_start, fetch_end):
+            return {key: fetch_func(fetch_start, fetch_end)}
+
+        return self.fetch_many([key], start, end, agg, window, fetch_many_func)[key]
+
+    def fetch_many(self, keys, start, end, agg, window, fetch_func):
+        """ Get data of several time series for [start, end), fetching the days missing from any of them together.
+
+        Note
+        ----
+        The missing days of all the keys are grouped into contiguous runs, and each run is fetched with a single
+        upstream request for the keys that miss some of its days (e.g. one multi-site request).
+
+        Parameters
+        ----------
+        keys        : list(tuple)
+            Time series, see fetch().
+        start       : str or datetime
+            Start time. Timezone naive values are assumed to be UTC.
+        end         : str or datetime
+            End time. Timezone naive values are assumed to be UTC.
+        agg         : str
+            Aggregation, e.g. MEAN, MAX, RAW.
+        window      : str
+            Aggregation window.
+        fetch_func  : function
+            fetch_func(keys, start, end) returns a dictionary that maps each of the keys to its upstream data for
+            [start, end) as a pd.DataFrame(); start and end are passed as ISO formatted strings.
+
+        Returns
+        -------
+        dict
+            Maps each key to its data, with a UTC index.
+
+        """
+
+        start, end = self._to_timestamps(start, end)
+
+        if start >= end or not self.is_cacheable(start, end, agg, window):
+            frames = fetch_func(list(keys), start.isoformat(), end.isoformat())
+            return {key: self._to_utc(df) for key, df in frames.items()}
+
+        days = self._get_days(start, end)
+
+        frames = {key: {} for key in keys}
+        missing = {}
+        for key in keys:
+            for day in days:
+                df = self._read_partition(key, day)
+                if df is None:
+                    missing.setdefault(day, []).append(key)
+                else:
+                    frames[key][day] = df
+
+        # Group the missing days into contiguous runs, one upstream request per run
+        runs = []
+        for day in sorted(missing):
+            if runs and self._next_day(runs[-1][-1]) == day:
+                runs[-1].append(day)
+            else:
+                runs.append([day])
+        for run in runs:
+            run_keys = [key for key in keys if any(key in missing[day] for day in run)]
+            fetched = self._fetch_days(run_keys, run, fetch_func)
+            for key in run_keys:
+                for day in run:
+                    if key in missing[day]:
+                        frames[key][day] = fetched[key][day]
+
+        result = {}
+        for key in keys:
+            non_empty = [frames[key][day] for day in days if len(frames[key][day].columns)]
+            if not non_empty:
+                result[key] = frames[key][days[0]]
+                continue
+            df = pd.concat(non_empty, sort=False)
+            result[key] = df[(df.index >= start) & (df.index < end)]
+        return result